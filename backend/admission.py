@@ -0,0 +1,251 @@
+"""
+LLM 요청 입장 제어 (admission control)
+
+- ClientRateLimiter: 클라이언트(IP)별 토큰 버킷. 초당 rate개씩 채워지고 최대 burst개까지 모아 둘 수 있습니다.
+- ProviderLimiter: 제공자별 동시 업스트림 호출 수 상한과 크기가 정해진 FIFO 대기열.
+  대기열이 가득 차면 기다리지 않고 바로 429를, 대기 시간이 queue_timeout을 넘으면 503을 Retry-After와 함께 반환합니다.
+
+한도를 넘은 요청은 업스트림 쿼터를 쓰기 전에 거절되므로 과부하에서도 이미 받아들인 요청의 지연은 늘어나지 않습니다.
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from fastapi import HTTPException
+
+from metrics import REGISTRY
+
+# 대기 시간 분위수 계산에 쓰는 최근 표본 수
+WAIT_SAMPLE_SIZE = 1024
+# 업스트림 호출 시간 EWMA 가중치 (Retry-After 추정용)
+SERVICE_TIME_ALPHA = 0.2
+
+QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_queue_wait_seconds", "제공자 대기열에서 기다린 시간 (바로 시작한 요청은 0)", ("provider",),
+    (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def too_many_requests(detail: str, retry_after: float, status_code: int = 429) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+
+class ClientRateLimiter:
+    """클라이언트별 토큰 버킷 (최근에 본 max_clients개만 유지하는 LRU, rate가 0 이하면 비활성화)"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.allowed = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def check(self, client: str, cost: float = 1.0):
+        """토큰을 cost만큼 쓰고, 모자라면 다시 시도할 수 있을 때까지의 시간과 함께 429"""
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.burst, now)
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            self._buckets.move_to_end(client)
+
+        cost = min(cost, self.burst)
+        if bucket.tokens >= cost:
+            bucket.tokens -= cost
+            self.allowed += 1
+            return
+        self.rejected += 1
+        raise too_many_requests(
+            "요청이 너무 많습니다. 잠시 후 다시 시도해주세요.",
+            (cost - bucket.tokens) / self.rate,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rate": self.rate,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+class ProviderLimiter:
+    """한 제공자의 동시 호출 한도와 대기열 (이벤트 루프 안에서만 사용)"""
+
+    def __init__(self, provider: str, max_concurrency: int, queue_size: int, queue_timeout: float):
+        self.provider = provider
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self._service_time = 0.0
+        self._wait_histogram = QUEUE_WAIT_SECONDS.labels(provider)
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_wait = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> float:
+        """지금 대기열 끝에 선 요청이 시작될 때까지의 추정 시간"""
+        return self._service_time * (self.queued + 1) / self.max_concurrency
+
+    def check(self):
+        """대기열이 가득 찼으면 바로 429 (스트리밍 응답을 시작하기 전 빠른 거절용)"""
+        if self.in_flight >= self.max_concurrency and self.queued >= self.queue_size:
+            self.rejected += 1
+            raise too_many_requests(
+                f"{self.provider.capitalize()} 요청이 밀려 있습니다. 잠시 후 다시 시도해주세요.",
+                self.retry_after(),
+            )
+
+    def _record_wait(self, waited: float):
+        self._waits.append(waited)
+        self._wait_histogram.observe(waited)
+        self.max_wait = max(self.max_wait, waited)
+
+    async def acquire(self):
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            self._record_wait(0.0)
+            return
+        self.check()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued_total += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # 시간 초과와 동시에 자리를 넘겨받았으면 그 자리는 다음 대기자에게 넘김
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            self.timed_out += 1
+            raise too_many_requests(
+                f"{self.provider.capitalize()} 요청 대기 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.",
+                self.retry_after(),
+                status_code=503,
+            )
+        except asyncio.CancelledError:
+            # 자리를 넘겨받은 직후 취소되었으면 다음 대기자에게 넘김
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+        self.admitted += 1
+        self._record_wait(time.monotonic() - started)
+
+    def release(self):
+        # 자리를 줄이지 않고 기다리던 다음 요청에 그대로 넘김
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._service_time += SERVICE_TIME_ALPHA * (elapsed - self._service_time)
+            self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+        return {
+            "maxConcurrency": self.max_concurrency,
+            "inFlight": self.in_flight,
+            "queued": self.queued,
+            "queueSize": self.queue_size,
+            "queueTimeout": self.queue_timeout,
+            "admitted": self.admitted,
+            "queuedTotal": self.queued_total,
+            "rejected": self.rejected,
+            "timedOut": self.timed_out,
+            "waitP50Ms": round(_percentile(waits, 50) * 1000, 2),
+            "waitP95Ms": round(_percentile(waits, 95) * 1000, 2),
+            "waitP99Ms": round(_percentile(waits, 99) * 1000, 2),
+            "waitMaxMs": round(self.max_wait * 1000, 2),
+            "serviceTimeMs": round(self._service_time * 1000, 1),
+        }
+
+
+class ProviderAdmission:
+    """제공자별 ProviderLimiter 묶음"""
+
+    def __init__(self, providers: Iterable[str], max_concurrency: int, queue_size: int, queue_timeout: float):
+        self.limiters = {
+            provider: ProviderLimiter(provider, max_concurrency, queue_size, queue_timeout)
+            for provider in providers
+        }
+
+    def check(self, provider: str):
+        self.limiters[provider].check()
+
+    def slot(self, provider: str):
+        return self.limiters[provider].slot()
+
+    def stats(self) -> Dict[str, Any]:
+        return {provider: limiter.stats() for provider, limiter in self.limiters.items()}
+
+
+def client_key(host: Optional[str], forwarded_for: Optional[str] = None) -> str:
+    """요청 클라이언트 식별자 (forwarded_for가 있으면 프록시가 붙인 첫 번째 주소)"""
+    if forwarded_for:
+        first = forwarded_for.split(",")[0].strip()
+        if first:
+            return first
+    return host or "unknown"
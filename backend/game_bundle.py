@@ -0,0 +1,274 @@
+"""
+플레이용 게임 번들
+
+게임을 저장하면 플레이어가 바로 쓸 수 있는 형태로 백그라운드에서 한 번 컴파일해 둡니다.
+
+- nodes: 정수 인덱스 순서의 노드 (플레이에 필요한 필드만)
+- children: 노드별 자식 인덱스 목록 (엣지 순서, 존재하지 않는 노드를 가리키는 엣지 제외)
+- root: 시작 노드 인덱스 (어떤 엣지의 target도 아닌 첫 노드, 프론트엔드와 동일)
+- assets: 이미지 URL 목록 (노드는 image에 인덱스만 가짐, 인라인 base64는 해시 이름 파일로 옮김)
+
+프론트엔드는 엣지를 훑지 않고 children[i]로 선택지를 바로 찾습니다.
+번들은 내용 해시로 저장하므로 같은 내용(포크 등)은 한 번만 저장되고, ?v=<해시> URL은 영구 캐시할 수 있습니다.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from game_codec import AVAILABLE_ENCODINGS, STORAGE_ENCODING, decompress, encode_variants
+from game_store import BackgroundQueue, GameStore
+from image_store import ImageReferences, upload_references
+from story_analysis import CompactGraph
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+# 번들에 넣는 노드 필드 (imageUrl은 assets 인덱스로 바뀜)
+NODE_FIELDS = ("label", "story", "choice", "statChanges")
+GAME_FIELDS = ("title", "description", "gameConfig")
+
+
+def compile_bundle(
+    game_dict: Dict[str, Any],
+    store_image: Optional[Callable[[str], Optional[str]]] = None,
+) -> Dict[str, Any]:
+    """
+    게임 → 번들
+
+    store_image(data URI)는 인라인 이미지를 저장하고 URL을 반환합니다 (저장하지 못하면 None이고 원래 값을 그대로 씀).
+    """
+    nodes = game_dict.get("nodes") or []
+    graph = CompactGraph((node["id"] for node in nodes), game_dict.get("edges") or [])
+    by_id = {str(node["id"]): node for node in nodes}
+    assets: List[str] = []
+    asset_index: Dict[str, int] = {}
+
+    bundle_nodes = []
+    for node_id in graph.ids:
+        node = by_id[node_id]
+        entry = {"id": node_id}
+        for field in NODE_FIELDS:
+            if node.get(field) is not None:
+                entry[field] = node[field]
+        image_url = node.get("imageUrl")
+        if image_url:
+            if image_url.startswith("data:") and store_image is not None:
+                image_url = store_image(image_url) or image_url
+            if image_url not in asset_index:
+                asset_index[image_url] = len(assets)
+                assets.append(image_url)
+            entry["image"] = asset_index[image_url]
+        bundle_nodes.append(entry)
+
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    return {
+        "format": BUNDLE_FORMAT,
+        **{field: game_dict.get(field) for field in GAME_FIELDS},
+        "root": graph.start_node(),
+        "nodes": bundle_nodes,
+        "children": [targets[offsets[i]:offsets[i + 1]] for i in range(len(graph))],
+        "assets": assets,
+    }
+
+
+def encode_bundle(bundle: Dict[str, Any]) -> bytes:
+    return json.dumps(bundle, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode('utf-8')
+
+
+class BundleStore:
+    """
+    WAL 모드 SQLite에 저장하는 게임 번들
+
+    GameStore 관찰자로 등록하면 게임이 저장될 때 번들 컴파일을 백그라운드 스레드에 예약합니다
+    (저장 요청과 쓰기 스레드는 기다리지 않고, 연속 저장은 마지막 본문으로 한 번만 컴파일).
+    game_bundles는 게임별 현재 번들 해시, 컴파일한 본문의 ETag, 번들이 참조하는 업로드 파일을,
+    bundle_data는 해시별 압축 사본을 보관합니다.
+    인라인 이미지를 옮겨 만든 파일은 본문이 아니라 번들만 참조하므로, image_references에 게임의 참조로 기록하고
+    고아 이미지 GC는 iter_upload_files()로 함께 확인합니다.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS game_bundles (
+        game_id TEXT PRIMARY KEY,
+        source_etag TEXT NOT NULL,
+        hash TEXT NOT NULL,
+        size_bytes INTEGER NOT NULL DEFAULT 0,
+        upload_files TEXT NOT NULL DEFAULT '[]',
+        created_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_game_bundles_hash ON game_bundles(hash);
+    CREATE TABLE IF NOT EXISTS bundle_data (
+        hash TEXT NOT NULL,
+        encoding TEXT NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (hash, encoding)
+    );
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        game_store: GameStore,
+        store_image: Optional[Callable[[str], Optional[str]]] = None,
+        image_references: Optional[ImageReferences] = None,
+    ):
+        self.path = path
+        self.game_store = game_store
+        self.store_image = store_image
+        self.image_references = image_references
+        # 컴파일 전용 스레드 (같은 게임의 컴파일과 삭제 정리를 순서대로 실행)
+        self._builds = BackgroundQueue("game-bundle-builder")
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self.SCHEMA)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    def info(self, game_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT hash, source_etag, size_bytes FROM game_bundles WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"hash": row["hash"], "sourceEtag": row["source_etag"], "sizeBytes": row["size_bytes"]}
+
+    def current(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """게임 본문과 같은 버전의 번들 정보 (없거나 오래되었으면 None)"""
+        info = self.info(game_id)
+        if info is None or info["sourceEtag"] != self.game_store.get_etag(game_id):
+            return None
+        return info
+
+    @staticmethod
+    def _forget_unreferenced(connection: sqlite3.Connection, digest: str):
+        connection.execute(
+            "DELETE FROM bundle_data WHERE hash = ? "
+            "AND NOT EXISTS (SELECT 1 FROM game_bundles WHERE hash = ?)",
+            (digest, digest),
+        )
+
+    def build(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """현재 게임 본문으로 번들 컴파일 후 저장 (게임이 없으면 None, 컴파일 스레드에서 호출)"""
+        # 본문과 ETag를 같은 저장 시점에서 읽음
+        encoded = self.game_store.get_encoded(game_id, [])
+        if encoded is None:
+            return None
+        data, _, source_etag = encoded
+        store_image = self.store_image
+        if store_image is not None and self.image_references is not None:
+            store_image = self.image_references.track(game_id, store_image)
+        content = encode_bundle(compile_bundle(json.loads(data), store_image))
+        digest = hashlib.sha256(content).hexdigest()
+        upload_files = sorted(upload_references(content))
+
+        connection = self._connection()
+        with connection:
+            previous = self.info(game_id)
+            exists = connection.execute(
+                "SELECT 1 FROM bundle_data WHERE hash = ? LIMIT 1", (digest,)
+            ).fetchone()
+            if exists is None:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO bundle_data (hash, encoding, data) VALUES (?, ?, ?)",
+                    [(digest, encoding, data) for encoding, data in encode_variants(content).items()],
+                )
+            connection.execute(
+                "INSERT OR REPLACE INTO game_bundles "
+                "(game_id, source_etag, hash, size_bytes, upload_files, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (game_id, source_etag, digest, len(content), json.dumps(upload_files), datetime.now().isoformat()),
+            )
+            if previous is not None and previous["hash"] != digest:
+                self._forget_unreferenced(connection, previous["hash"])
+        return {"hash": digest, "sourceEtag": source_etag, "sizeBytes": len(content)}
+
+    def upload_files(self, game_id: str) -> Set[str]:
+        """게임의 현재 번들이 참조하는 업로드 파일"""
+        row = self._connection().execute(
+            "SELECT upload_files FROM game_bundles WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return set(json.loads(row["upload_files"])) if row is not None else set()
+
+    def iter_upload_files(self) -> Iterator[str]:
+        """모든 번들이 참조하는 업로드 파일 (고아 이미지 GC의 mark 단계용)"""
+        for row in self._connection().execute("SELECT upload_files FROM game_bundles"):
+            yield from json.loads(row["upload_files"])
+
+    def get_encoded(self, digest: str, encodings: List[str]) -> Optional[Tuple[bytes, str]]:
+        """encodings(선호 순서) 중 저장된 첫 번째 사본, 없으면 압축을 푼 본문 ("identity")"""
+        rows = self._connection().execute(
+            "SELECT encoding, data FROM bundle_data WHERE hash = ?", (digest,)
+        ).fetchall()
+        if not rows:
+            return None
+        stored = {row["encoding"]: bytes(row["data"]) for row in rows}
+        for encoding in encodings:
+            if encoding in stored:
+                return stored[encoding], encoding
+        encoding = STORAGE_ENCODING if STORAGE_ENCODING in stored else next(iter(stored))
+        return decompress(stored[encoding], encoding), "identity"
+
+    def get_bundle(self, digest: str) -> Optional[Dict[str, Any]]:
+        encoded = self.get_encoded(digest, [])
+        return json.loads(encoded[0]) if encoded is not None else None
+
+    def _ensure(self, game_id: str) -> Optional[Dict[str, Any]]:
+        return self.current(game_id) or self.build(game_id)
+
+    def _forget(self, game_id: str):
+        connection = self._connection()
+        with connection:
+            info = self.info(game_id)
+            connection.execute("DELETE FROM game_bundles WHERE game_id = ?", (game_id,))
+            if info is not None:
+                self._forget_unreferenced(connection, info["hash"])
+
+    def flush(self):
+        """예약된 컴파일이 모두 끝날 때까지 대기 (스크립트, 테스트용)"""
+        self._builds.flush()
+
+    def close(self):
+        self._builds.shutdown()
+
+    # GameStore 알림 (쓰기 스레드)
+    def game_saved(self, summary: Dict[str, Any]):
+        # 번들이 없어도 조회 시 다시 컴파일하므로 실패는 로그만 남김
+        self._builds.schedule(summary["id"], self.build, summary["id"])
+
+    def game_deleted(self, game_id: str):
+        # 이미 예약된 컴파일 뒤에 정리 (정리 후 오래된 번들이 다시 저장되지 않도록)
+        self._builds.submit(self._forget, game_id)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "encodings": AVAILABLE_ENCODINGS, "pendingBuilds": self._builds.pending()}
+
+    # 비동기 API
+    async def aensure(self, game_id: str) -> Optional[Dict[str, Any]]:
+        """현재 번들 정보 (번들이 아직 없거나 오래되었으면 예약된 컴파일 뒤에 컴파일 스레드에서 컴파일)"""
+        info = await asyncio.to_thread(self.current, game_id)
+        if info is not None:
+            return info
+        return await asyncio.wrap_future(self._builds.submit(self._ensure, game_id))
+
+    async def aget_encoded(self, digest: str, encodings: List[str]) -> Optional[Tuple[bytes, str]]:
+        return await asyncio.to_thread(self.get_encoded, digest, encodings)
+
+    async def aget_bundle(self, digest: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_bundle, digest)
@@ -0,0 +1,92 @@
+"""
+게임 데이터 저장 형식
+
+게임은 공백 없는 JSON으로 직렬화한 뒤 저장 시점에 압축해 두고,
+요청 시에는 클라이언트가 받을 수 있는 인코딩의 바이트를 그대로 보냅니다.
+저장 요청 중에는 빠른 수준(fast)으로 본문만 압축하고, 높은 수준의 사본은 저장소가 백그라운드에서 만듭니다.
+
+- zstd: zstandard 패키지가 설치된 경우 기본 저장 형식
+- br: brotli 패키지가 설치된 경우 응답용 사본
+- gzip: 항상 사용 가능 (zstandard가 없으면 기본 저장 형식)
+"""
+import gzip
+import json
+import os
+from typing import Any, Dict, List
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ZSTD_LEVEL = int(os.getenv("GAME_ZSTD_LEVEL", "19"))
+BROTLI_QUALITY = int(os.getenv("GAME_BROTLI_QUALITY", "9"))
+GZIP_LEVEL = 9
+
+# 저장 요청을 처리하는 쓰기 스레드에서 쓰는 빠른 압축 수준 (위의 높은 수준 사본은 백그라운드에서 만듦)
+ZSTD_WRITE_LEVEL = int(os.getenv("GAME_ZSTD_WRITE_LEVEL", "3"))
+BROTLI_WRITE_QUALITY = 4
+GZIP_WRITE_LEVEL = 6
+
+# 응답 시 선호 순서 (설치된 압축 방식만)
+AVAILABLE_ENCODINGS: List[str] = (
+    (["zstd"] if zstandard is not None else [])
+    + (["br"] if brotli is not None else [])
+    + ["gzip"]
+)
+
+# 저장소의 기본 형식 (나머지는 응답용 사본)
+STORAGE_ENCODING = AVAILABLE_ENCODINGS[0]
+
+# 파일 저장소의 사본 확장자
+FILE_EXTENSIONS = {"zstd": "zst", "br": "br", "gzip": "gz"}
+
+
+def encode_game(game_dict: Dict[str, Any]) -> bytes:
+    """
+    공백 없는 JSON으로 직렬화
+
+    조회 시에는 저장된 바이트를 파싱 없이 그대로 보내므로, 브라우저가 읽을 수 없는 값(NaN/Infinity)은
+    여기서 ValueError로 거부합니다.
+    """
+    return json.dumps(game_dict, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode('utf-8')
+
+
+def compress(data: bytes, encoding: str, fast: bool = False) -> bytes:
+    """encoding으로 압축 (fast면 압축률보다 속도를 우선하는 수준)"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_WRITE_LEVEL if fast else ZSTD_LEVEL).compress(data)
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_WRITE_QUALITY if fast else BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0으로 같은 입력이면 같은 바이트가 나오도록 함
+        return gzip.compress(data, compresslevel=GZIP_WRITE_LEVEL if fast else GZIP_LEVEL, mtime=0)
+    if encoding == "identity":
+        return data
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    if encoding == "identity":
+        return data
+    if encoding == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd로 저장된 게임을 읽으려면 zstandard 패키지가 필요합니다.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if encoding == "br":
+        if brotli is None:
+            raise RuntimeError("br로 저장된 게임을 읽으려면 brotli 패키지가 필요합니다.")
+        return brotli.decompress(data)
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def encode_variants(data: bytes) -> Dict[str, bytes]:
+    """사용 가능한 모든 압축 방식으로 미리 압축한 사본"""
+    return {encoding: compress(data, encoding) for encoding in AVAILABLE_ENCODINGS}
@@ -0,0 +1,90 @@
+"""
+저장된 게임의 스토리 생성 컨텍스트 인덱스
+
+프롬프트에는 현재 노드와 부모/자식 노드만 쓰이므로, 저장된 게임에서
+이미지 등 불필요한 필드를 뺀 노드와 인접 인덱스를 만들어 메모리에 캐시합니다.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from story_graph import GraphIndex
+
+# 프롬프트 구성에 필요한 노드 필드
+CONTEXT_NODE_FIELDS = ("id", "label", "story", "choice")
+
+
+class GameContext:
+    def __init__(self, game_data: Dict[str, Any]):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        for node in game_data.get("nodes", []):
+            node_id = str(node.get("id"))
+            self.nodes[node_id] = {field: node.get(field) for field in CONTEXT_NODE_FIELDS}
+            self.nodes[node_id]["id"] = node_id
+        self.edges: List[Dict[str, Any]] = [
+            {"id": edge.get("id"), "source": edge.get("source"), "target": edge.get("target")}
+            for edge in game_data.get("edges", [])
+        ]
+        self.game_config: Dict[str, Any] = game_data.get("gameConfig") or {}
+        self.graph = GraphIndex(self.nodes.keys(), self.edges)
+
+    def with_delta(
+        self,
+        node_updates: Optional[List[Dict[str, Any]]] = None,
+        added_edges: Optional[List[Dict[str, Any]]] = None,
+        removed_edge_ids: Optional[List[str]] = None,
+    ) -> Tuple[Dict[str, Dict[str, Any]], GraphIndex]:
+        """저장되지 않은 편집 내용을 반영한 (노드, 인접 인덱스) 반환"""
+        nodes = self.nodes
+        if node_updates:
+            nodes = dict(self.nodes)
+            for update in node_updates:
+                merged = dict(nodes.get(update["id"], {}))
+                merged.update({field: update[field] for field in CONTEXT_NODE_FIELDS if update.get(field) is not None})
+                nodes[update["id"]] = merged
+
+        graph = self.graph
+        node_added = len(nodes) != len(self.nodes)
+        if added_edges or removed_edge_ids or node_added:
+            removed = set(removed_edge_ids or [])
+            edges = [edge for edge in self.edges if edge.get("id") not in removed]
+            edges.extend(added_edges or [])
+            graph = GraphIndex(nodes.keys(), edges)
+
+        return nodes, graph
+
+
+class GameContextCache:
+    """게임 ID별 GameContext LRU 캐시 (버전이 바뀌면 다시 로드)"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Hashable, GameContext]]" = OrderedDict()
+        # 워커 스레드에서 호출되므로 조회(move_to_end)도 잠금, 로드는 잠금 밖에서
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, game_id: str, version: Hashable, loader: Callable[[], Dict[str, Any]]) -> GameContext:
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(game_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        context = GameContext(loader())
+        with self._lock:
+            self._entries[game_id] = (version, context)
+            self._entries.move_to_end(game_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return context
+
+    def invalidate(self, game_id: str):
+        with self._lock:
+            self._entries.pop(game_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,1035 @@
+"""
+게임 저장소
+
+- FileGameStore: 게임마다 압축한 본문 파일 하나 + 요약 인덱스(manifest)
+- SQLiteGameStore: WAL 모드 SQLite, id/createdAt 인덱스와 요약 컬럼
+
+게임은 공백 없는 JSON을 기본 형식(zstd, game_codec 참고)으로 압축해 저장하고, 응답용 압축 사본을 미리 만들어
+get_encoded()로 클라이언트가 받을 수 있는 인코딩의 바이트를 그대로 꺼낼 수 있습니다.
+저장(put)은 쓰기 스레드에서 빠른 수준으로 본문만 압축하고, 높은 수준으로 다시 압축한 본문과 응답용 사본은
+백그라운드 스레드가 만들어 그 사이 게임이 다시 저장되지 않았을 때만 바꿔 넣습니다.
+
+목록은 (createdAt, id) 내림차순 커서 페이지네이션으로 조회하므로
+한 페이지를 읽는 비용은 전체 게임 수나 크기가 아니라 페이지 크기에 비례합니다.
+
+쓰기는 저장소 전용 스레드 하나에서, 읽기는 스레드 풀에서 실행되므로
+비동기 핸들러는 a로 시작하는 메서드(aput, aget 등)를 await하면 이벤트 루프가 막히지 않습니다.
+"""
+import asyncio
+import base64
+import bisect
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Set, Tuple
+
+from game_codec import AVAILABLE_ENCODINGS, FILE_EXTENSIONS, STORAGE_ENCODING, compress, decompress, encode_game
+from http_cache import ETagIndex, compute_etag
+from metrics import REGISTRY, STORAGE_LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# 파일 저장소가 본문(기본 형식) 외에 미리 만들어 두는 응답용 사본 (최대 하나, 나머지 인코딩은 요청 시 생성)
+FILE_COPY_ENCODINGS = AVAILABLE_ENCODINGS[1:2]
+
+# 비동기 API 작업 시간 (스레드 대기 포함)
+STORAGE_OPERATION_SECONDS = REGISTRY.histogram(
+    "storage_operation_duration_seconds", "게임 저장소 작업 시간 (스레드 대기 포함)",
+    ("backend", "operation"), STORAGE_LATENCY_BUCKETS,
+)
+
+
+def summarize_game(game_dict: Dict[str, Any], size_bytes: int, etag: str) -> Dict[str, Any]:
+    """목록/통계용 요약 정보"""
+    return {
+        "id": game_dict.get("id"),
+        "title": game_dict.get("title"),
+        "description": game_dict.get("description"),
+        "createdAt": game_dict.get("createdAt"),
+        "updatedAt": game_dict.get("updatedAt"),
+        "nodeCount": len(game_dict.get("nodes", [])),
+        "edgeCount": len(game_dict.get("edges", [])),
+        "sizeBytes": size_bytes,
+        "etag": etag,
+    }
+
+
+def sort_key(summary: Dict[str, Any]) -> Tuple[str, str]:
+    """목록 정렬 키 (생성일시가 없는 게임은 가장 오래된 것으로 취급)"""
+    return summary.get("createdAt") or "", summary.get("id") or ""
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    """마지막으로 받은 게임의 정렬 키를 불투명한 커서 문자열로 변환"""
+    raw = json.dumps(list(key), ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """커서 문자열 해석 (형식이 올바르지 않으면 ValueError)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, game_id = json.loads(raw)
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(created_at, str) or not isinstance(game_id, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return created_at, game_id
+
+
+class BackgroundQueue:
+    """
+    저장 이후로 미룬 작업을 차례로 실행하는 백그라운드 스레드 하나
+
+    같은 키의 작업이 아직 시작 전이면 다시 예약하지 않습니다 (연속 저장은 마지막 상태로 한 번만 처리).
+    작업은 실행 시점의 최신 상태를 읽어야 하며, 실패는 로그만 남깁니다.
+    """
+
+    def __init__(self, name: str):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, key: str, fn: Callable, *args):
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._run, key, fn, *args)
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """합치지 않고 순서대로 실행 (예약된 작업과 순서를 맞춰야 하는 정리 작업용)"""
+        return self._executor.submit(fn, *args)
+
+    def _run(self, key: str, fn: Callable, *args):
+        with self._lock:
+            self._pending.discard(key)
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.warning(f"백그라운드 작업 실패: {key}, {str(e)}")
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """지금까지 예약된 작업이 모두 끝날 때까지 대기 (스크립트, 테스트용)"""
+        self._executor.submit(lambda: None).result()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+class GameStore:
+    """저장소 공통 인터페이스"""
+
+    backend = "base"
+
+    def __init__(self):
+        # 쓰기 전용 스레드 (쓰기 순서 보장, 이벤트 루프와 분리)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="game-store-writer")
+        # 높은 수준 압축 사본을 만드는 스레드 (저장 요청은 빠른 수준으로 본문만 쓰고 바로 끝남)
+        self._variants = BackgroundQueue("game-store-variants")
+        # 저장/삭제 알림을 받는 객체 (game_saved(summary), game_deleted(game_id))
+        self._observers: List[Any] = []
+
+    def add_observer(self, observer):
+        self._observers.append(observer)
+
+    def _notify_saved(self, summary: Dict[str, Any]):
+        for observer in self._observers:
+            observer.game_saved(summary)
+
+    def _notify_deleted(self, game_id: str):
+        for observer in self._observers:
+            observer.game_deleted(game_id)
+
+    def build_variants(self, game_id: str):
+        """저장된 본문을 높은 수준으로 다시 압축하고 응답용 사본 생성 (백그라운드 스레드에서 호출)"""
+
+    def flush_variants(self):
+        """예약된 압축 사본 생성이 모두 끝날 때까지 대기"""
+        self._variants.flush()
+
+    def refresh(self):
+        """다른 프로세스가 변경한 내용 반영 (필요한 백엔드만)"""
+
+    # 동기 API (스크립트, 백그라운드 스레드용)
+    def put(self, game_dict: Dict[str, Any]) -> str:
+        """게임 저장 후 ETag 반환"""
+        raise NotImplementedError
+
+    def get_bytes(self, game_id: str) -> Optional[bytes]:
+        """압축하지 않은 JSON 바이트"""
+        raise NotImplementedError
+
+    def get_encoded(self, game_id: str, encodings: List[str]) -> Optional[Tuple[bytes, str, str]]:
+        """
+        encodings(선호 순서) 중 저장된 첫 번째 사본 (반환값: 바이트, 인코딩, 같은 시점의 ETag)
+
+        맞는 사본이 없으면 압축을 풀어 ("identity") 반환합니다.
+        """
+        content = self.get_bytes(game_id)
+        return (content, "identity", compute_etag(content)) if content is not None else None
+
+    def open_encoded(self, game_id: str, encodings: List[str]) -> Optional[Tuple[BinaryIO, str, int, str]]:
+        """
+        get_encoded와 같은 사본을 연 파일로 반환 (반환값: 파일, 인코딩, 크기, 같은 시점의 ETag)
+
+        크기는 연 파일의 fstat이므로 그 뒤에 게임이 다시 저장되어도 본문, 크기, ETag가 서로 맞습니다.
+        파일을 닫는 것은 호출자의 몫입니다. 파일로 저장하지 않는 백엔드(또는 저장된 사본이 없는 인코딩)는
+        None을 반환하며, 이때는 get_encoded의 바이트를 사용합니다.
+        """
+        return None
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        content = self.get_bytes(game_id)
+        return json.loads(content) if content is not None else None
+
+    def get_etag(self, game_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def exists(self, game_id: str) -> bool:
+        return self.get_etag(game_id) is not None
+
+    def delete(self, game_id: str) -> bool:
+        raise NotImplementedError
+
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        """생성일시 내림차순 요약 목록"""
+        raise NotImplementedError
+
+    def _page(self, limit: int, after: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """정렬 키가 after보다 작은 요약을 내림차순으로 최대 limit개"""
+        raise NotImplementedError
+
+    def list_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        생성일시 내림차순 요약 한 페이지 (반환값: 요약 목록, 다음 페이지 커서)
+
+        다음 페이지가 없으면 커서는 None이며, 잘못된 커서는 ValueError를 발생시킵니다.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        summaries = self._page(limit + 1, after)
+        if len(summaries) <= limit:
+            return summaries, None
+        summaries = summaries[:limit]
+        return summaries, encode_cursor(sort_key(summaries[-1]))
+
+    def created_before(self, cutoff: datetime, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """cutoff 이전에 생성된 게임 요약 목록 (오래된 것부터 최대 limit개)"""
+        raise NotImplementedError
+
+    def count_created_before(self, cutoff: datetime) -> int:
+        raise NotImplementedError
+
+    def size_stats(self) -> Dict[str, int]:
+        """게임 수, 전체/최대/최소 크기"""
+        raise NotImplementedError
+
+    def count_created_since(self, cutoff: datetime) -> int:
+        raise NotImplementedError
+
+    def location(self, game_id: str) -> str:
+        """사람이 확인할 수 있는 저장 위치"""
+        raise NotImplementedError
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        self._variants.shutdown()
+
+    # 비동기 API (핸들러용)
+    async def _write(self, fn: Callable, *args):
+        loop = asyncio.get_running_loop()
+        with STORAGE_OPERATION_SECONDS.labels(self.backend, fn.__name__).time():
+            return await loop.run_in_executor(self._writer, fn, *args)
+
+    async def _read(self, fn: Callable, *args):
+        with STORAGE_OPERATION_SECONDS.labels(self.backend, fn.__name__).time():
+            return await asyncio.to_thread(fn, *args)
+
+    async def awrite(self, fn: Callable, *args):
+        """쓰기 스레드에서 fn 실행 (저장소 쓰기와 함께 순서를 보장해야 하는 작업용)"""
+        return await self._write(fn, *args)
+
+    async def aput(self, game_dict: Dict[str, Any]) -> str:
+        return await self._write(self.put, game_dict)
+
+    async def adelete(self, game_id: str) -> bool:
+        return await self._write(self.delete, game_id)
+
+    async def aget_bytes(self, game_id: str) -> Optional[bytes]:
+        return await self._read(self.get_bytes, game_id)
+
+    async def aget_encoded(self, game_id: str, encodings: List[str]) -> Optional[Tuple[bytes, str, str]]:
+        return await self._read(self.get_encoded, game_id, encodings)
+
+    async def aopen_encoded(self, game_id: str, encodings: List[str]) -> Optional[Tuple[BinaryIO, str, int, str]]:
+        return await self._read(self.open_encoded, game_id, encodings)
+
+    async def aget(self, game_id: str) -> Optional[Dict[str, Any]]:
+        return await self._read(self.get, game_id)
+
+    async def aget_etag(self, game_id: str) -> Optional[str]:
+        return await self._read(self.get_etag, game_id)
+
+    async def alist_summaries(self) -> List[Dict[str, Any]]:
+        return await self._read(self.list_summaries)
+
+    async def alist_page(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self._read(self.list_page, limit, cursor)
+
+    async def acreated_before(self, cutoff: datetime, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return await self._read(self.created_before, cutoff, limit)
+
+
+def parse_created_at(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    created_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    # 기존 데이터와 같이 naive 로컬 시간으로 비교
+    return created_at.replace(tzinfo=None) if created_at.tzinfo else created_at
+
+
+class SummaryIndex:
+    """
+    파일 저장소용 요약 인덱스 (manifest)
+
+    요약은 메모리에 (createdAt, id) 오름차순 키 목록과 함께 유지하고,
+    디스크에는 추가 전용 로그(_index.jsonl)로 기록합니다.
+    로그가 실제 항목 수보다 충분히 길어지면 현재 상태로 다시 씁니다(compaction).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._keys: List[Tuple[str, str]] = []
+        self._log_lines = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> bool:
+        """디스크의 로그를 재생해 인덱스 복원 (로그가 없거나 손상되었으면 False)"""
+        entries: Dict[str, Dict[str, Any]] = {}
+        lines = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get("op") == "delete":
+                        entries.pop(record["id"], None)
+                    else:
+                        entries[record["summary"]["id"]] = record["summary"]
+                    lines += 1
+        except FileNotFoundError:
+            return False
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"게임 요약 인덱스 손상, 다시 생성합니다: {str(e)}")
+            return False
+
+        with self._lock:
+            self._entries = entries
+            self._keys = sorted(sort_key(summary) for summary in entries.values())
+            self._log_lines = lines
+        return True
+
+    def get(self, game_id: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(game_id)
+
+    def values(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def _insert(self, summary: Dict[str, Any]):
+        previous = self._entries.get(summary["id"])
+        if previous is not None:
+            self._remove_key(sort_key(previous))
+        self._entries[summary["id"]] = summary
+        bisect.insort(self._keys, sort_key(summary))
+
+    def _remove_key(self, key: Tuple[str, str]):
+        position = bisect.bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+
+    def _append(self, record: Dict[str, Any]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._log_lines += 1
+        if self._log_lines > 2 * len(self._entries) + 100:
+            self._compact()
+
+    def _compact(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".index-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for summary in self._entries.values():
+                    f.write(json.dumps({"op": "put", "summary": summary}, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._log_lines = len(self._entries)
+
+    def put(self, summary: Dict[str, Any]):
+        with self._lock:
+            self._insert(summary)
+            self._append({"op": "put", "summary": summary})
+
+    def remove(self, game_id: str):
+        with self._lock:
+            previous = self._entries.pop(game_id, None)
+            if previous is None:
+                return
+            self._remove_key(sort_key(previous))
+            self._append({"op": "delete", "id": game_id})
+
+    def replace_all(self, summaries: List[Dict[str, Any]]):
+        """인덱스 전체 교체 후 로그 다시 쓰기"""
+        with self._lock:
+            self._entries = {summary["id"]: summary for summary in summaries}
+            self._keys = sorted(sort_key(summary) for summary in summaries)
+            self._compact()
+
+    def oldest_before(self, created_at: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """생성일시가 created_at보다 이른 요약을 오래된 것부터 (생성일시 없는 게임 제외)"""
+        with self._lock:
+            start = bisect.bisect_left(self._keys, ("\x00",))
+            end = bisect.bisect_left(self._keys, (created_at,))
+            if limit is not None:
+                end = min(end, start + limit)
+            return [self._entries[game_id] for _, game_id in self._keys[start:end]]
+
+    def count_before(self, created_at: str) -> int:
+        with self._lock:
+            return bisect.bisect_left(self._keys, (created_at,)) - bisect.bisect_left(self._keys, ("\x00",))
+
+    def page(self, limit: int, after: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            end = bisect.bisect_left(self._keys, after) if after is not None else len(self._keys)
+            keys = self._keys[max(0, end - limit):end]
+            return [self._entries[game_id] for _, game_id in reversed(keys)]
+
+
+class FileGameStore(GameStore):
+    """
+    게임마다 기본 형식(zstd)으로 압축한 본문 파일 <id>.json.zst + <id>.etag 사이드카 + 요약 인덱스(_index.jsonl)
+
+    응답용 사본은 FILE_COPY_ENCODINGS(최대 하나, 보통 br)만 저장 후 백그라운드에서 <id>.json.br로 만들고,
+    나머지 인코딩(또는 아직 만들기 전인 사본)은 요청 시 본문에서 만듭니다.
+    파일 교체와 ETag 갱신, 조회 시 파일 열기와 ETag 읽기는 같은 잠금 안에서 하므로
+    조회 결과의 본문과 ETag는 항상 같은 저장 시점의 것입니다.
+    keep_json이면 외부 도구용으로 압축하지 않은 <id>.json도 씁니다.
+    이전 버전의 <id>.json만 있는 게임도 그대로 읽으며, 다시 저장하면 새 형식으로 바뀝니다.
+    """
+
+    backend = "file"
+
+    def __init__(self, directory: Path, keep_json: bool = False):
+        super().__init__()
+        self.directory = directory
+        self.directory.mkdir(exist_ok=True, parents=True)
+        self.keep_json = keep_json
+        # 읽기 중 ETag가 없으면 본문을 다시 읽으므로 재진입 가능한 잠금
+        self._lock = threading.RLock()
+        self.etags = ETagIndex(directory)
+        self.index = SummaryIndex(directory / "_index.jsonl")
+        self._load_index()
+
+    def _path(self, game_id: str) -> Path:
+        """압축하지 않은 JSON 파일 (이전 버전 형식, keep_json일 때 외부 도구용 사본)"""
+        return self.directory / f"{game_id}.json"
+
+    def _variant_path(self, game_id: str, encoding: str) -> Path:
+        return self.directory / f"{game_id}.json.{FILE_EXTENSIONS[encoding]}"
+
+    def _body(self, game_id: str) -> Optional[Tuple[Path, str, os.stat_result]]:
+        """
+        본문 파일 (반환값: 경로, 인코딩, stat)
+
+        기본 형식 파일을 쓰되, 없거나 외부 도구가 <id>.json을 더 나중에 고쳤으면 <id>.json을 씁니다.
+        """
+        primary_path = self._variant_path(game_id, STORAGE_ENCODING)
+        try:
+            primary_stat = primary_path.stat()
+        except FileNotFoundError:
+            primary_stat = None
+        try:
+            json_stat = self._path(game_id).stat()
+        except FileNotFoundError:
+            json_stat = None
+        if json_stat is not None and (primary_stat is None or json_stat.st_mtime_ns > primary_stat.st_mtime_ns):
+            return self._path(game_id), "identity", json_stat
+        if primary_stat is not None:
+            return primary_path, STORAGE_ENCODING, primary_stat
+        return None
+
+    def _read_body(self, game_id: str) -> Optional[Tuple[bytes, str, os.stat_result]]:
+        with self._lock:
+            body = self._body(game_id)
+            if body is None:
+                return None
+            path, encoding, body_stat = body
+            try:
+                with open(path, 'rb') as f:
+                    return f.read(), encoding, body_stat
+            except FileNotFoundError:
+                return None
+
+    def _game_ids(self) -> List[str]:
+        """디렉토리에 본문 파일이 있는 게임 ID"""
+        suffix = f".json.{FILE_EXTENSIONS[STORAGE_ENCODING]}"
+        game_ids = {path.name[:-len(suffix)] for path in self.directory.glob(f"*{suffix}")}
+        game_ids.update(path.stem for path in self.directory.glob("*.json"))
+        return list(game_ids)
+
+    def _write_atomic(self, game_id: str, path: Path, content: bytes):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{game_id}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def _summarize_file(self, game_id: str) -> Optional[Dict[str, Any]]:
+        body = self._read_body(game_id)
+        if body is None:
+            return None
+        data, encoding, body_stat = body
+        try:
+            content = decompress(data, encoding)
+            game_data = json.loads(content)
+        except Exception as e:
+            logger.error(f"게임 파일 읽기 오류: {game_id}, {str(e)}")
+            return None
+        game_data["id"] = game_data.get("id") or game_id
+        return summarize_game(game_data, body_stat.st_size, self.etags.get(game_id, lambda: content))
+
+    def _load_index(self):
+        """
+        인덱스를 불러온 뒤 디렉토리와 대조 (stat만 사용)
+
+        인덱스에 없거나 크기가 달라진 파일(외부 스크립트로 수정된 경우 등)만 다시 읽고,
+        사라진 파일은 인덱스에서 제거합니다.
+        """
+        if not self.index.load():
+            self.rebuild_index()
+            return
+
+        on_disk = {}
+        for game_id in self._game_ids():
+            body = self._body(game_id)
+            if body is not None:
+                on_disk[game_id] = body[2].st_size
+
+        for summary in self.index.values():
+            if summary["id"] not in on_disk:
+                self.index.remove(summary["id"])
+
+        for game_id, size in on_disk.items():
+            summary = self.index.get(game_id)
+            if summary is not None and summary["sizeBytes"] == size:
+                continue
+            if summary is not None:
+                self.etags.discard(game_id)
+            summary = self._summarize_file(game_id)
+            if summary is not None:
+                self.index.put(summary)
+
+    def refresh(self):
+        self._load_index()
+
+    def rebuild_index(self) -> int:
+        """모든 게임 파일을 읽어 요약 인덱스를 처음부터 다시 생성"""
+        summaries = []
+        for game_id in self._game_ids():
+            summary = self._summarize_file(game_id)
+            if summary is not None:
+                summaries.append(summary)
+        self.index.replace_all(summaries)
+        return len(summaries)
+
+    def put(self, game_dict: Dict[str, Any]) -> str:
+        game_id = game_dict["id"]
+        content = encode_game(game_dict)
+        etag = compute_etag(content)
+        stored = compress(content, STORAGE_ENCODING, fast=True)
+        with self._lock:
+            # 외부 도구용 JSON, 본문 순서로 씀 (본문보다 오래된 파일은 조회에 사용하지 않음)
+            if self.keep_json:
+                self._write_atomic(game_id, self._path(game_id), content)
+            self._write_atomic(game_id, self._variant_path(game_id, STORAGE_ENCODING), stored)
+            if not self.keep_json:
+                self._path(game_id).unlink(missing_ok=True)
+            # 이전 본문의 응답용 사본 정리 (새 사본은 build_variants가 만듦)
+            for encoding in FILE_EXTENSIONS:
+                if encoding != STORAGE_ENCODING:
+                    self._variant_path(game_id, encoding).unlink(missing_ok=True)
+            self.etags.put(game_id, etag)
+        summary = summarize_game(game_dict, len(stored), etag)
+        self.index.put(summary)
+        self._notify_saved(summary)
+        self._variants.schedule(game_id, self.build_variants, game_id)
+        return etag
+
+    def build_variants(self, game_id: str):
+        with self._lock:
+            body = self._body(game_id)
+            if body is None or body[1] != STORAGE_ENCODING:
+                return
+            path, _, body_stat = body
+            with open(path, 'rb') as f:
+                data = f.read()
+            etag = self.etags.get(game_id, lambda: decompress(data, STORAGE_ENCODING))
+        content = decompress(data, STORAGE_ENCODING)
+        stored = compress(content, STORAGE_ENCODING)
+        copies = {encoding: compress(content, encoding) for encoding in FILE_COPY_ENCODINGS}
+        with self._lock:
+            body = self._body(game_id)
+            if (
+                body is None or body[0] != path or body[2].st_mtime_ns != body_stat.st_mtime_ns
+                or self.etags.get(game_id, lambda: self.get_bytes(game_id)) != etag
+            ):
+                # 그 사이 다시 저장되었거나 삭제됨 (다시 저장했으면 그 저장이 새로 예약함)
+                return
+            self._write_atomic(game_id, path, stored)
+            for encoding, copy in copies.items():
+                self._write_atomic(game_id, self._variant_path(game_id, encoding), copy)
+            summary = self.index.get(game_id)
+            if summary is not None:
+                self.index.put({**summary, "sizeBytes": len(stored)})
+
+    def get_bytes(self, game_id: str) -> Optional[bytes]:
+        body = self._read_body(game_id)
+        if body is None:
+            return None
+        data, encoding, _ = body
+        return decompress(data, encoding)
+
+    def open_encoded(self, game_id: str, encodings: List[str]) -> Optional[Tuple[BinaryIO, str, int, str]]:
+        """
+        저장된 파일 중 encodings의 첫 번째 사본 (없으면 None, get_encoded가 본문에서 만듦)
+
+        본문이 압축하지 않은 JSON이면 압축을 받지 않는 클라이언트에게 그 파일을 그대로 보냅니다.
+        """
+        with self._lock:
+            body = self._body(game_id)
+            if body is None:
+                return None
+            body_path, body_encoding, body_stat = body
+            for encoding in [*encodings, "identity"]:
+                if encoding == body_encoding:
+                    path = body_path
+                elif encoding in FILE_EXTENSIONS:
+                    path = self._variant_path(game_id, encoding)
+                    try:
+                        # 외부 도구가 <id>.json만 고친 경우 오래된 사본은 사용하지 않음
+                        if path.stat().st_mtime_ns < body_stat.st_mtime_ns:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                else:
+                    continue
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    continue
+                try:
+                    etag = self.etags.get(game_id, lambda: self.get_bytes(game_id))
+                    return f, encoding, os.fstat(f.fileno()).st_size, etag
+                except BaseException:
+                    f.close()
+                    raise
+            return None
+
+    def get_encoded(self, game_id: str, encodings: List[str]) -> Optional[Tuple[bytes, str, str]]:
+        opened = self.open_encoded(game_id, encodings)
+        if opened is not None:
+            f, encoding, _, etag = opened
+            with f:
+                return f.read(), encoding, etag
+        with self._lock:
+            content = self.get_bytes(game_id)
+            if content is None:
+                return None
+            etag = self.etags.get(game_id, lambda: content)
+        # 저장해 두지 않은 인코딩(또는 아직 만들기 전인 사본)은 본문에서 빠른 수준으로 만듦
+        for encoding in encodings:
+            if encoding in FILE_EXTENSIONS:
+                return compress(content, encoding, fast=True), encoding, etag
+        return content, "identity", etag
+
+    def get_etag(self, game_id: str) -> Optional[str]:
+        with self._lock:
+            if self._body(game_id) is None:
+                return None
+            return self.etags.get(game_id, lambda: self.get_bytes(game_id))
+
+    def delete(self, game_id: str) -> bool:
+        with self._lock:
+            if self._body(game_id) is None:
+                return False
+            self._path(game_id).unlink(missing_ok=True)
+            for encoding in FILE_EXTENSIONS:
+                self._variant_path(game_id, encoding).unlink(missing_ok=True)
+            self.etags.discard(game_id)
+        self.index.remove(game_id)
+        self._notify_deleted(game_id)
+        return True
+
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        return self.index.page(len(self.index), None)
+
+    def _page(self, limit: int, after: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        return self.index.page(limit, after)
+
+    def created_before(self, cutoff: datetime, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        # 인덱스의 (createdAt, id) 정렬 키를 그대로 만료 순서로 사용 (SQLite와 같은 문자열 비교)
+        return self.index.oldest_before(cutoff.isoformat(), limit)
+
+    def count_created_before(self, cutoff: datetime) -> int:
+        return self.index.count_before(cutoff.isoformat())
+
+    def size_stats(self) -> Dict[str, int]:
+        sizes = [summary["sizeBytes"] for summary in self.index.values()]
+        return {
+            "count": len(sizes),
+            "totalBytes": sum(sizes),
+            "largestBytes": max(sizes) if sizes else 0,
+            "smallestBytes": min(sizes) if sizes else 0,
+        }
+
+    def count_created_since(self, cutoff: datetime) -> int:
+        count = 0
+        for summary in self.index.values():
+            try:
+                created_at = parse_created_at(summary.get('createdAt'))
+            except ValueError:
+                continue
+            if created_at is not None and created_at >= cutoff:
+                count += 1
+        return count
+
+    def location(self, game_id: str) -> str:
+        body = self._body(game_id)
+        return (body[0] if body is not None else self._variant_path(game_id, STORAGE_ENCODING)).name
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "path": str(self.directory), "indexedGames": len(self.index)}
+
+
+class SQLiteGameStore(GameStore):
+    """
+    WAL 모드 SQLite 게임 저장소
+
+    games.data에는 기본 형식(zstd, 없으면 gzip)으로 압축한 본문을, game_variants에는 응답용 다른 압축 사본을 저장합니다.
+    사본을 만들기 전에는 본문(또는 압축을 푼 JSON)으로 응답합니다.
+    이전 버전에서 저장된 행은 encoding이 'identity'(압축 없음)입니다.
+    """
+
+    backend = "sqlite"
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS games (
+        id TEXT PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        created_at TEXT NOT NULL DEFAULT '',
+        updated_at TEXT,
+        node_count INTEGER NOT NULL DEFAULT 0,
+        edge_count INTEGER NOT NULL DEFAULT 0,
+        size_bytes INTEGER NOT NULL DEFAULT 0,
+        etag TEXT NOT NULL,
+        data BLOB NOT NULL
+    );
+    DROP INDEX IF EXISTS idx_games_created_at;
+    CREATE INDEX IF NOT EXISTS idx_games_created_at_id ON games(created_at, id);
+    CREATE TABLE IF NOT EXISTS game_variants (
+        id TEXT NOT NULL,
+        encoding TEXT NOT NULL,
+        data BLOB NOT NULL,
+        PRIMARY KEY (id, encoding)
+    );
+    """
+
+    SUMMARY_COLUMNS = "id, title, description, created_at, updated_at, node_count, edge_count, size_bytes, etag"
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = path
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self.SCHEMA)
+        columns = {row["name"] for row in connection.execute("PRAGMA table_info(games)")}
+        if "encoding" not in columns:
+            connection.execute("ALTER TABLE games ADD COLUMN encoding TEXT NOT NULL DEFAULT 'identity'")
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # 스레드마다 커넥션 하나 (WAL 모드에서 읽기는 쓰기와 동시에 진행 가능)
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _summary(row: sqlite3.Row) -> Dict[str, Any]:
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "description": row["description"],
+            "createdAt": row["created_at"] or None,
+            "updatedAt": row["updated_at"],
+            "nodeCount": row["node_count"],
+            "edgeCount": row["edge_count"],
+            "sizeBytes": row["size_bytes"],
+            "etag": row["etag"],
+        }
+
+    def put(self, game_dict: Dict[str, Any]) -> str:
+        content = encode_game(game_dict)
+        etag = compute_etag(content)
+        stored = compress(content, STORAGE_ENCODING, fast=True)
+        summary = summarize_game(game_dict, len(stored), etag)
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO games ({self.SUMMARY_COLUMNS}, encoding, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    summary["id"], summary["title"], summary["description"],
+                    summary["createdAt"] or "", summary["updatedAt"],
+                    summary["nodeCount"], summary["edgeCount"], summary["sizeBytes"],
+                    etag, STORAGE_ENCODING, stored,
+                ),
+            )
+            # 이전 본문의 응답용 사본 정리 (새 사본은 build_variants가 만듦)
+            connection.execute("DELETE FROM game_variants WHERE id = ?", (summary["id"],))
+        self._notify_saved(summary)
+        self._variants.schedule(summary["id"], self.build_variants, summary["id"])
+        return etag
+
+    def build_variants(self, game_id: str):
+        row = self._connection().execute(
+            "SELECT etag, encoding, data FROM games WHERE id = ?", (game_id,)
+        ).fetchone()
+        if row is None:
+            return
+        content = decompress(bytes(row["data"]), row["encoding"])
+        stored = compress(content, STORAGE_ENCODING)
+        variants = {encoding: compress(content, encoding) for encoding in AVAILABLE_ENCODINGS[1:]}
+        connection = self._connection()
+        with connection:
+            # 그 사이 다시 저장되었거나 삭제되었으면 바꾸지 않음 (다시 저장했으면 그 저장이 새로 예약함)
+            cursor = connection.execute(
+                "UPDATE games SET encoding = ?, data = ?, size_bytes = ? WHERE id = ? AND etag = ?",
+                # 디스크에 실제로 차지하는 크기 (기본 형식 + 응답용 사본)
+                (STORAGE_ENCODING, stored, len(stored) + sum(len(v) for v in variants.values()), game_id, row["etag"]),
+            )
+            if cursor.rowcount == 0:
+                return
+            connection.execute("DELETE FROM game_variants WHERE id = ?", (game_id,))
+            connection.executemany(
+                "INSERT INTO game_variants (id, encoding, data) VALUES (?, ?, ?)",
+                [(game_id, encoding, variant) for encoding, variant in variants.items()],
+            )
+
+    def get_bytes(self, game_id: str) -> Optional[bytes]:
+        row = self._connection().execute("SELECT encoding, data FROM games WHERE id = ?", (game_id,)).fetchone()
+        return decompress(bytes(row["data"]), row["encoding"]) if row is not None else None
+
+    def get_encoded(self, game_id: str, encodings: List[str]) -> Optional[Tuple[bytes, str, str]]:
+        # 본문, ETag, 받을 수 있는 사본을 쿼리 하나로 읽어 같은 저장 시점의 값만 사용
+        placeholders = ", ".join("?" * len(encodings))
+        rows = self._connection().execute(
+            "SELECT g.etag, g.encoding, g.data, v.encoding AS variant_encoding, v.data AS variant_data "
+            "FROM games g LEFT JOIN game_variants v "
+            f"ON v.id = g.id AND v.encoding IN ({placeholders}) WHERE g.id = ?",
+            (*encodings, game_id),
+        ).fetchall()
+        if not rows:
+            return None
+        row = rows[0]
+        variants = {variant["variant_encoding"]: variant["variant_data"] for variant in rows}
+        for encoding in encodings:
+            if encoding == row["encoding"]:
+                return bytes(row["data"]), encoding, row["etag"]
+            if encoding in variants:
+                return bytes(variants[encoding]), encoding, row["etag"]
+        return decompress(bytes(row["data"]), row["encoding"]), "identity", row["etag"]
+
+    def get_etag(self, game_id: str) -> Optional[str]:
+        row = self._connection().execute("SELECT etag FROM games WHERE id = ?", (game_id,)).fetchone()
+        return row["etag"] if row is not None else None
+
+    def delete(self, game_id: str) -> bool:
+        connection = self._connection()
+        with connection:
+            cursor = connection.execute("DELETE FROM games WHERE id = ?", (game_id,))
+            connection.execute("DELETE FROM game_variants WHERE id = ?", (game_id,))
+        if cursor.rowcount == 0:
+            return False
+        self._notify_deleted(game_id)
+        return True
+
+    def list_summaries(self) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            f"SELECT {self.SUMMARY_COLUMNS} FROM games ORDER BY created_at DESC, id DESC"
+        ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def _page(self, limit: int, after: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        # (created_at, id) 인덱스를 따라 커서 위치부터 limit개만 읽음 (OFFSET 없음)
+        if after is None:
+            rows = self._connection().execute(
+                f"SELECT {self.SUMMARY_COLUMNS} FROM games ORDER BY created_at DESC, id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                f"SELECT {self.SUMMARY_COLUMNS} FROM games WHERE (created_at, id) < (?, ?) "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (after[0], after[1], limit),
+            ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def created_before(self, cutoff: datetime, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            f"SELECT {self.SUMMARY_COLUMNS} FROM games WHERE created_at != '' AND created_at < ? "
+            "ORDER BY created_at, id LIMIT ?",
+            (cutoff.isoformat(), -1 if limit is None else limit),
+        ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def count_created_before(self, cutoff: datetime) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) AS count FROM games WHERE created_at != '' AND created_at < ?", (cutoff.isoformat(),)
+        ).fetchone()
+        return row["count"]
+
+    def size_stats(self) -> Dict[str, int]:
+        row = self._connection().execute(
+            "SELECT COUNT(*) AS count, COALESCE(SUM(size_bytes), 0) AS total, "
+            "COALESCE(MAX(size_bytes), 0) AS largest, COALESCE(MIN(size_bytes), 0) AS smallest FROM games"
+        ).fetchone()
+        return {
+            "count": row["count"],
+            "totalBytes": row["total"],
+            "largestBytes": row["largest"],
+            "smallestBytes": row["smallest"],
+        }
+
+    def count_created_since(self, cutoff: datetime) -> int:
+        row = self._connection().execute(
+            "SELECT COUNT(*) AS count FROM games WHERE created_at >= ?", (cutoff.isoformat(),)
+        ).fetchone()
+        return row["count"]
+
+    def location(self, game_id: str) -> str:
+        return f"{self.path.name}#{game_id}"
+
+    def describe(self) -> Dict[str, Any]:
+        return {"backend": self.backend, "path": str(self.path), "journalMode": "wal"}
+
+
+def iter_game_files(directory: Path) -> List[Tuple[Path, str]]:
+    """파일 저장소 형식의 게임 본문 파일 (반환값: 경로, 인코딩), 이전 버전의 <id>.json 포함"""
+    suffix = f".json.{FILE_EXTENSIONS[STORAGE_ENCODING]}"
+    primaries = {path.name[:-len(suffix)]: path for path in directory.glob(f"*{suffix}")}
+    files = [(path, "identity") for path in directory.glob("*.json") if path.stem not in primaries]
+    files.extend((path, STORAGE_ENCODING) for path in primaries.values())
+    return sorted(files)
+
+
+def import_game_files(
+    store: GameStore,
+    directory: Path,
+    overwrite: bool = False,
+    dry_run: bool = False,
+    report: Callable[[str], None] = logger.info,
+    prepare: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Dict[str, int]:
+    """
+    directory의 게임 파일을 store로 가져오기 (overwrite가 아니면 이미 있는 게임은 건너뜀)
+
+    prepare(game_dict)는 저장 직전에 게임을 고칩니다 (인라인 base64 이미지를 uploads/로 옮기는 등).
+    """
+    totals = {"files": 0, "imported": 0, "skipped": 0, "failed": 0}
+    for game_file, encoding in iter_game_files(directory):
+        totals["files"] += 1
+        try:
+            with open(game_file, 'rb') as f:
+                game_data = json.loads(decompress(f.read(), encoding))
+            game_data["id"] = game_data.get("id") or game_file.name.split(".", 1)[0]
+        except Exception as e:
+            report(f"게임 파일 읽기 오류: {game_file.name}, {str(e)}")
+            totals["failed"] += 1
+            continue
+
+        if not overwrite and store.exists(game_data["id"]):
+            totals["skipped"] += 1
+            continue
+
+        if dry_run:
+            report(f"[dry-run] {game_file.name} → {store.location(game_data['id'])}")
+        else:
+            try:
+                if prepare is not None:
+                    prepare(game_data)
+                store.put(game_data)
+            except ValueError as e:
+                # JSON으로 표현할 수 없는 값 (NaN 등)
+                report(f"게임 가져오기 실패: {game_file.name}, {str(e)}")
+                totals["failed"] += 1
+                continue
+            report(f"{game_file.name} → {store.location(game_data['id'])}")
+        totals["imported"] += 1
+    return totals
+
+
+def create_game_store(
+    games_dir: Path,
+    prepare_import: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> GameStore:
+    """
+    GAME_STORE_BACKEND 환경변수(sqlite 기본, file 선택 가능)에 따라 저장소 생성
+
+    SQLite 저장소가 비어 있으면 games_dir의 게임 파일(기존 saved_games/*.json 등)을 먼저 가져옵니다
+    (prepare_import는 import_game_files의 prepare).
+    """
+    backend = os.getenv("GAME_STORE_BACKEND", "sqlite").lower()
+    if backend == "file":
+        return FileGameStore(games_dir, keep_json=os.getenv("GAME_FILE_KEEP_JSON", "False").lower() == "true")
+    if backend == "sqlite":
+        store = SQLiteGameStore(Path(os.getenv("GAME_STORE_SQLITE_PATH", str(games_dir / "games.sqlite3"))))
+        if store.size_stats()["count"] == 0:
+            totals = import_game_files(store, games_dir, report=logger.debug, prepare=prepare_import)
+            if totals["files"]:
+                logger.info(
+                    f"게임 파일을 SQLite 저장소로 가져왔습니다: {totals['imported']}개 "
+                    f"(실패 {totals['failed']}개, {games_dir})"
+                )
+        return store
+    raise ValueError(f"Unsupported GAME_STORE_BACKEND: {backend}")
@@ -0,0 +1,500 @@
+"""
+게임 버전 저장소
+
+노드는 내용 해시(sha256)로 한 번만 저장하고(node_objects), 버전은 노드 ID → 해시 목록(manifest)으로 기록합니다.
+바뀌지 않은 노드는 버전 사이, 그리고 포크하거나 다시 저장한 게임 사이에서 같은 객체를 공유합니다.
+
+- 스냅샷 버전: 전체 노드 해시 목록, 엣지, 게임 필드
+- 델타 버전: 직전 버전 대비 바뀐 노드 해시, 삭제된 노드, 추가/삭제된 엣지, 바뀐 필드만
+  (snapshot_interval 버전마다 스냅샷을 남겨 복원할 때 적용할 델타 수를 제한)
+
+PATCH 한 번에 쓰는 버전 데이터는 게임 크기가 아니라 편집한 내용에 비례합니다.
+조회용 본문(GameStore)은 버전마다 새로 저장되며 GET /api/games/{id}는 계속 그 본문을 그대로 보냅니다.
+
+쓰기는 모두 GameStore의 쓰기 스레드에서 실행되므로 버전 번호와 본문 저장 순서가 어긋나지 않습니다.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from game_store import GameStore
+
+logger = logging.getLogger(__name__)
+
+# 스냅샷에 저장하는 게임 필드 (노드/엣지 제외)
+GAME_FIELDS = ("title", "description", "gameConfig", "createdAt", "updatedAt", "forkedFrom")
+
+
+class VersionConflict(Exception):
+    """baseVersion이 현재 버전과 다름"""
+
+    def __init__(self, current_version: int):
+        super().__init__(f"Current version is {current_version}")
+        self.current_version = current_version
+
+
+def node_hash(node: Dict[str, Any]) -> Tuple[str, bytes]:
+    """키를 정렬한 JSON의 sha256 (반환값: 해시, 저장할 바이트)"""
+    data = json.dumps(node, ensure_ascii=False, sort_keys=True, separators=(",", ":"), allow_nan=False).encode('utf-8')
+    return hashlib.sha256(data).hexdigest(), data
+
+
+def empty_delta() -> Dict[str, Any]:
+    return {"fields": {}, "setNodes": [], "removeNodes": [], "addEdges": [], "removeEdges": []}
+
+
+def apply_delta(state: Dict[str, Any], delta: Dict[str, Any]):
+    """
+    버전 상태(fields, nodes: 노드 ID → 해시, edges)에 델타 적용
+
+    삭제한 노드에 연결된 엣지도 함께 지웁니다 (에디터와 동일).
+    """
+    state["fields"].update(delta["fields"])
+    removed_nodes = set(delta["removeNodes"])
+    for node_id in removed_nodes:
+        state["nodes"].pop(node_id, None)
+    removed_edges = set(delta["removeEdges"])
+    state["edges"] = [
+        edge for edge in state["edges"]
+        if edge.get("id") not in removed_edges
+        and edge.get("source") not in removed_nodes
+        and edge.get("target") not in removed_nodes
+    ]
+    for node_id, digest in delta["setNodes"]:
+        state["nodes"][node_id] = digest
+    state["edges"].extend(delta["addEdges"])
+
+
+def _encode_manifest(manifest: Dict[str, Any]) -> bytes:
+    return json.dumps(manifest, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode('utf-8')
+
+
+class GameVersionStore:
+    """
+    WAL 모드 SQLite에 저장하는 게임 버전 기록
+
+    normalize_node(node)는 저장 전에 노드를 정규화하고(예: pydantic 모델 통과),
+    validate(game_dict)는 새 버전의 전체 게임을 검사합니다 (거부하려면 예외를 던짐).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS node_objects (
+        hash TEXT PRIMARY KEY,
+        data BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS game_versions (
+        game_id TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        etag TEXT NOT NULL,
+        node_count INTEGER NOT NULL DEFAULT 0,
+        bytes_written INTEGER NOT NULL DEFAULT 0,
+        manifest BLOB NOT NULL,
+        PRIMARY KEY (game_id, version)
+    );
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        game_store: GameStore,
+        snapshot_interval: int = 20,
+        normalize_node: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+        validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.path = path
+        self.game_store = game_store
+        self.snapshot_interval = max(1, snapshot_interval)
+        self.normalize_node = normalize_node or (lambda node: node)
+        self.validate = validate or (lambda game_dict: None)
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(self.SCHEMA)
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        # 스레드마다 커넥션 하나 (WAL 모드에서 읽기는 쓰기와 동시에 진행 가능)
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=30000")
+            self._local.connection = connection
+        return connection
+
+    # 읽기
+    def head(self, game_id: str) -> Optional[int]:
+        row = self._connection().execute(
+            "SELECT MAX(version) AS version FROM game_versions WHERE game_id = ?", (game_id,)
+        ).fetchone()
+        return row["version"]
+
+    def _state(self, game_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """가장 가까운 이전 스냅샷부터 델타를 적용해 version의 상태 복원"""
+        connection = self._connection()
+        snapshot = connection.execute(
+            "SELECT version, manifest FROM game_versions "
+            "WHERE game_id = ? AND version <= ? AND kind = 'snapshot' ORDER BY version DESC LIMIT 1",
+            (game_id, version),
+        ).fetchone()
+        if snapshot is None:
+            return None
+        manifest = json.loads(snapshot["manifest"])
+        state = {
+            "fields": manifest["fields"],
+            "nodes": dict(manifest["nodes"]),
+            "edges": manifest["edges"],
+        }
+        rows = connection.execute(
+            "SELECT manifest FROM game_versions WHERE game_id = ? AND version > ? AND version <= ? ORDER BY version",
+            (game_id, snapshot["version"], version),
+        )
+        for row in rows:
+            apply_delta(state, json.loads(row["manifest"]))
+        return state
+
+    def _load_nodes(self, digests: List[str]) -> Dict[str, Dict[str, Any]]:
+        connection = self._connection()
+        nodes = {}
+        unique = list(dict.fromkeys(digests))
+        # SQLite 변수 개수 제한을 넘지 않도록 나눠서 조회
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            rows = connection.execute(
+                f"SELECT hash, data FROM node_objects WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for row in rows:
+                nodes[row["hash"]] = json.loads(row["data"])
+        return nodes
+
+    def _referenced_digests(self, game_id: Optional[str] = None) -> Set[str]:
+        """어떤 버전이라도 참조하는 노드 객체 해시 (game_id를 주면 그 게임의 버전만)"""
+        if game_id is None:
+            rows = self._connection().execute("SELECT kind, manifest FROM game_versions")
+        else:
+            rows = self._connection().execute(
+                "SELECT kind, manifest FROM game_versions WHERE game_id = ?", (game_id,)
+            )
+        referenced = set()
+        for row in rows:
+            manifest = json.loads(row["manifest"])
+            pairs = manifest["nodes"] if row["kind"] == "snapshot" else manifest["setNodes"]
+            referenced.update(digest for _, digest in pairs)
+        return referenced
+
+    def iter_node_data(self, batch_size: int = 500, game_id: Optional[str] = None) -> Iterator[bytes]:
+        """
+        버전 기록이 참조하는 노드 객체의 JSON 바이트 (game_id를 주면 그 게임의 버전만)
+
+        이전 버전만 참조하는 노드도 포함합니다 (고아 이미지 GC의 mark 단계, 이미지 참조 색인용).
+        """
+        connection = self._connection()
+        digests = list(self._referenced_digests(game_id))
+        for start in range(0, len(digests), batch_size):
+            chunk = digests[start:start + batch_size]
+            rows = connection.execute(
+                f"SELECT data FROM node_objects WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for row in rows:
+                yield bytes(row["data"])
+
+    def _build_game(
+        self, game_id: str, version: int, state: Dict[str, Any], objects: Optional[Dict[str, bytes]] = None
+    ) -> Dict[str, Any]:
+        """버전 상태로 게임 전체 구성 (objects: 아직 저장하지 않은 노드 객체)"""
+        objects = objects or {}
+        missing = [digest for digest in state["nodes"].values() if digest not in objects]
+        loaded = self._load_nodes(missing)
+        loaded.update({digest: json.loads(data) for digest, data in objects.items()})
+        fields = state["fields"]
+        game_dict = {
+            "id": game_id,
+            "title": fields.get("title"),
+            "description": fields.get("description"),
+            "nodes": [loaded[digest] for digest in state["nodes"].values()],
+            "edges": state["edges"],
+            "gameConfig": fields.get("gameConfig"),
+            "createdAt": fields.get("createdAt"),
+            "updatedAt": fields.get("updatedAt"),
+            "version": version,
+        }
+        if fields.get("forkedFrom"):
+            game_dict["forkedFrom"] = fields["forkedFrom"]
+        return game_dict
+
+    def get_version(self, game_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """version(없으면 최신)의 게임 전체"""
+        if version is None:
+            version = self.head(game_id)
+            if version is None:
+                return None
+        state = self._state(game_id, version)
+        if state is None:
+            return None
+        return self._build_game(game_id, version, state)
+
+    def list_versions(self, game_id: str) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT version, kind, created_at, etag, node_count, bytes_written FROM game_versions "
+            "WHERE game_id = ? ORDER BY version DESC",
+            (game_id,),
+        )
+        return [
+            {
+                "version": row["version"],
+                "kind": row["kind"],
+                "createdAt": row["created_at"],
+                "etag": row["etag"],
+                "nodeCount": row["node_count"],
+                "bytesWritten": row["bytes_written"],
+            }
+            for row in rows
+        ]
+
+    # 쓰기 (GameStore 쓰기 스레드에서 호출)
+    def _insert_nodes(self, connection: sqlite3.Connection, objects: Dict[str, bytes]) -> Tuple[int, int]:
+        """아직 없는 노드 객체만 저장 (반환값: 새로 쓴 노드 수, 바이트)"""
+        written = written_bytes = 0
+        for digest, data in objects.items():
+            cursor = connection.execute("INSERT OR IGNORE INTO node_objects (hash, data) VALUES (?, ?)", (digest, data))
+            if cursor.rowcount:
+                written += 1
+                written_bytes += len(data)
+        return written, written_bytes
+
+    def _commit(
+        self,
+        game_dict: Dict[str, Any],
+        kind: str,
+        manifest: Dict[str, Any],
+        objects: Dict[str, bytes],
+    ) -> Dict[str, Any]:
+        """본문을 저장한 뒤 노드 객체와 버전 기록을 한 트랜잭션으로 추가"""
+        self.validate(game_dict)
+        etag = self.game_store.put(game_dict)
+        encoded_manifest = _encode_manifest(manifest)
+        connection = self._connection()
+        with connection:
+            nodes_written, node_bytes = self._insert_nodes(connection, objects)
+            bytes_written = node_bytes + len(encoded_manifest)
+            connection.execute(
+                "INSERT INTO game_versions "
+                "(game_id, version, kind, created_at, etag, node_count, bytes_written, manifest) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    game_dict["id"], game_dict["version"], kind, datetime.now().isoformat(), etag,
+                    len(game_dict["nodes"]), bytes_written, encoded_manifest,
+                ),
+            )
+        return {
+            "gameId": game_dict["id"],
+            "version": game_dict["version"],
+            "etag": etag,
+            "nodesWritten": nodes_written,
+            "bytesWritten": bytes_written,
+        }
+
+    def _snapshot(self, game_dict: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        objects: Dict[str, bytes] = {}
+        node_hashes = []
+        for node in game_dict["nodes"]:
+            digest, data = node_hash(node)
+            objects[digest] = data
+            node_hashes.append([node["id"], digest])
+        manifest = {
+            "fields": {field: game_dict[field] for field in GAME_FIELDS if game_dict.get(field) is not None},
+            "nodes": node_hashes,
+            "edges": game_dict["edges"],
+        }
+        return manifest, objects
+
+    def create(self, game_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """새 게임을 버전 1로 저장 (이미 있는 노드 객체는 다시 쓰지 않음)"""
+        game_dict = {**game_dict, "version": 1}
+        manifest, objects = self._snapshot(game_dict)
+        return self._commit(game_dict, "snapshot", manifest, objects)
+
+    def _ensure_versioned(self, game_id: str) -> Optional[int]:
+        """버전 기록이 없는 기존 게임은 현재 본문을 버전 1 스냅샷으로 등록"""
+        head = self.head(game_id)
+        if head is not None:
+            return head
+        game_dict = self.game_store.get(game_id)
+        if game_dict is None:
+            return None
+        game_dict["version"] = 1
+        manifest, objects = self._snapshot(game_dict)
+        encoded_manifest = _encode_manifest(manifest)
+        connection = self._connection()
+        with connection:
+            _, node_bytes = self._insert_nodes(connection, objects)
+            connection.execute(
+                "INSERT INTO game_versions "
+                "(game_id, version, kind, created_at, etag, node_count, bytes_written, manifest) "
+                "VALUES (?, 1, 'snapshot', ?, ?, ?, ?, ?)",
+                (
+                    game_id, datetime.now().isoformat(), self.game_store.get_etag(game_id) or "",
+                    len(game_dict["nodes"]), node_bytes + len(encoded_manifest), encoded_manifest,
+                ),
+            )
+        logger.info(f"기존 게임 버전 등록: {game_id}")
+        return 1
+
+    def patch(
+        self,
+        game_id: str,
+        fields: Dict[str, Any],
+        node_updates: List[Dict[str, Any]],
+        removed_node_ids: List[str],
+        added_edges: List[Dict[str, Any]],
+        removed_edge_ids: List[str],
+        base_version: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        최신 버전에 변경 내용을 적용해 새 버전 저장 (게임이 없으면 None)
+
+        node_updates는 노드 ID별로 보낸 필드만 기존 노드에 덮어쓰며, 없는 ID면 새 노드로 추가합니다.
+        base_version이 현재 버전과 다르면 VersionConflict.
+        """
+        head = self._ensure_versioned(game_id)
+        if head is None:
+            return None
+        if base_version is not None and base_version != head:
+            raise VersionConflict(head)
+        if set(removed_node_ids) & {update["id"] for update in node_updates}:
+            raise ValueError("같은 노드를 수정하면서 삭제할 수 없습니다.")
+
+        state = self._state(game_id, head)
+        delta = empty_delta()
+        delta["fields"] = {field: value for field, value in fields.items() if state["fields"].get(field) != value}
+
+        # 수정할 노드의 현재 내용만 읽음
+        current = self._load_nodes([state["nodes"][update["id"]] for update in node_updates if update["id"] in state["nodes"]])
+        objects: Dict[str, bytes] = {}
+        for update in node_updates:
+            previous = state["nodes"].get(update["id"])
+            merged = self.normalize_node({**current.get(previous, {}), **update})
+            digest, data = node_hash(merged)
+            if digest != previous:
+                delta["setNodes"].append([update["id"], digest])
+                objects[digest] = data
+
+        delta["removeNodes"] = [node_id for node_id in removed_node_ids if node_id in state["nodes"]]
+        existing_edge_ids = {edge.get("id") for edge in state["edges"]}
+        delta["removeEdges"] = [edge_id for edge_id in removed_edge_ids if edge_id in existing_edge_ids]
+        delta["addEdges"] = added_edges
+
+        if not any(delta.values()):
+            return {
+                "gameId": game_id,
+                "version": head,
+                "etag": self.game_store.get_etag(game_id),
+                "nodesWritten": 0,
+                "bytesWritten": 0,
+                "unchanged": True,
+            }
+
+        version = head + 1
+        apply_delta(state, delta)
+        state["fields"]["updatedAt"] = datetime.now().isoformat()
+        if (version - 1) % self.snapshot_interval == 0:
+            kind = "snapshot"
+            manifest = {"fields": state["fields"], "nodes": list(state["nodes"].items()), "edges": state["edges"]}
+        else:
+            kind = "delta"
+            delta["fields"]["updatedAt"] = state["fields"]["updatedAt"]
+            manifest = delta
+        result = self._commit(self._build_game(game_id, version, state, objects), kind, manifest, objects)
+        result["unchanged"] = False
+        return result
+
+    def fork(self, game_id: str, new_game_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """game_id의 version(없으면 최신)을 새 게임으로 복제 (노드 객체는 공유하고 manifest만 씀)"""
+        head = self._ensure_versioned(game_id)
+        if head is None:
+            return None
+        version = head if version is None else version
+        state = self._state(game_id, version) if 1 <= version <= head else None
+        if state is None:
+            return None
+        now = datetime.now().isoformat()
+        state["fields"].update({
+            "createdAt": now,
+            "updatedAt": now,
+            "forkedFrom": {"gameId": game_id, "version": version},
+        })
+        manifest = {"fields": state["fields"], "nodes": list(state["nodes"].items()), "edges": state["edges"]}
+        result = self._commit(self._build_game(new_game_id, 1, state), "snapshot", manifest, {})
+        result["forkedFrom"] = state["fields"]["forkedFrom"]
+        return result
+
+    def prune(self) -> Dict[str, int]:
+        """
+        삭제된 게임의 버전 기록과 어떤 버전도 참조하지 않는 노드 객체 정리 (mark & sweep)
+
+        PATCH와 같은 쓰기 스레드에서 실행해야 저장 중인 노드를 지우지 않습니다.
+        """
+        connection = self._connection()
+        removed_versions = 0
+        for row in connection.execute("SELECT DISTINCT game_id FROM game_versions").fetchall():
+            if not self.game_store.exists(row["game_id"]):
+                with connection:
+                    removed_versions += connection.execute(
+                        "DELETE FROM game_versions WHERE game_id = ?", (row["game_id"],)
+                    ).rowcount
+
+        referenced = self._referenced_digests()
+        unreferenced = [
+            (row["hash"], row["size"])
+            for row in connection.execute("SELECT hash, length(data) AS size FROM node_objects")
+            if row["hash"] not in referenced
+        ]
+        with connection:
+            connection.executemany("DELETE FROM node_objects WHERE hash = ?", [(digest,) for digest, _ in unreferenced])
+        return {
+            "versionsRemoved": removed_versions,
+            "nodeObjectsRemoved": len(unreferenced),
+            "bytesFreed": sum(size for _, size in unreferenced),
+        }
+
+    # GameStore 알림
+    def game_saved(self, summary: Dict[str, Any]):
+        pass
+
+    def game_deleted(self, game_id: str):
+        """버전 기록 삭제 (노드 객체는 다른 게임과 공유될 수 있으므로 prune에서 정리)"""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM game_versions WHERE game_id = ?", (game_id,))
+
+    def describe(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "snapshotInterval": self.snapshot_interval}
+
+    # 비동기 API (쓰기는 GameStore 쓰기 스레드, 읽기는 스레드 풀)
+    async def acreate(self, game_dict: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.game_store.awrite(self.create, game_dict)
+
+    async def apatch(self, game_id: str, **changes) -> Optional[Dict[str, Any]]:
+        return await self.game_store.awrite(lambda: self.patch(game_id, **changes))
+
+    async def afork(self, game_id: str, new_game_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        return await self.game_store.awrite(self.fork, game_id, new_game_id, version)
+
+    async def aprune(self) -> Dict[str, int]:
+        return await self.game_store.awrite(self.prune)
+
+    async def aget_version(self, game_id: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_version, game_id, version)
+
+    async def alist_versions(self, game_id: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.list_versions, game_id)
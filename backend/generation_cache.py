@@ -0,0 +1,162 @@
+"""
+스토리 생성 결과 캐시
+
+같은 노드에서 컨텍스트 변경 없이 "생성"을 반복하면 build_story_prompt 결과가
+완전히 같으므로, (제공자, 모델, 프롬프트, 생성 파라미터)의 해시를 키로
+결과를 재사용합니다. 메모리 LRU(바이트 기준 제한) + TTL 만료 + 선택적 디스크 계층.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(provider: str, model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """생성 요청을 식별하는 SHA-256 키"""
+    material = json.dumps(
+        {"provider": provider, "model": model, "prompt": prompt, "params": params},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """바이트 제한 LRU 메모리 캐시 + 선택적 디스크 캐시"""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, disk_dir: Optional[Path] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(exist_ok=True, parents=True)
+
+        # key -> (value, size_bytes, created_at)
+        self._entries: "OrderedDict[str, Tuple[str, int, float]]" = OrderedDict()
+        self._current_bytes = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    # 메모리 계층
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, size, created_at = entry
+        if self._expired(created_at):
+            self._memory_remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: str, created_at: float):
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._memory_remove(key)
+        self._entries[key] = (value, size, created_at)
+        self._current_bytes += size
+        while self._current_bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._current_bytes -= evicted_size
+            self.evictions += 1
+
+    def _memory_remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._current_bytes -= entry[1]
+
+    # 디스크 계층 (재시작 후에도 유지)
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry.get("createdAt", 0)):
+            path.unlink(missing_ok=True)
+            return None
+        return entry["value"], entry["createdAt"]
+
+    def _disk_set(self, key: str, value: str, created_at: float):
+        path = self._disk_path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"value": value, "createdAt": created_at}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    async def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        value = self._memory_get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.disk_dir is not None:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                value, created_at = entry
+                self._memory_set(key, value, created_at)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: str):
+        if not self.enabled:
+            return
+
+        created_at = time.time()
+        self._memory_set(key, value, created_at)
+        if self.disk_dir is not None:
+            try:
+                await asyncio.to_thread(self._disk_set, key, value, created_at)
+            except OSError as e:
+                logger.error(f"생성 캐시 디스크 저장 오류: {key}, {str(e)}")
+
+    def record_bypass(self):
+        self.bypasses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._current_bytes,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_seconds,
+            "diskEnabled": self.disk_dir is not None,
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
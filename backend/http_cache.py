@@ -0,0 +1,297 @@
+"""
+HTTP 캐싱 유틸리티
+
+- ETag / If-None-Match 비교
+- 콘텐츠 주소 업로드 파일의 immutable 캐싱과 Range 요청 지원 (StaticFiles 확장)
+- 게임 데이터의 ETag를 저장 시점에 계산해 보관하는 ETagIndex
+- Accept-Encoding 협상 (미리 압축해 둔 사본 선택)
+"""
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+from image_store import is_content_addressed
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# UUID 이름으로 업로드된 기존 파일은 바뀌지 않지만 삭제될 수 있으므로 하루만 캐시
+UPLOAD_CACHE_CONTROL = "public, max-age=86400"
+# 게임 데이터는 매번 재검증 (변경이 없으면 304)
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def compute_etag(data: bytes) -> str:
+    """본문 바이트의 강한 ETag"""
+    return f'"{hashlib.sha256(data).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """If-None-Match 헤더가 ETag와 일치하는지 (약한 비교)"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def representation_etag(etag: str, encoding: str) -> str:
+    """Content-Encoding별 표현의 ETag (압축하지 않은 표현은 원래 ETag)"""
+    if encoding == "identity":
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding 헤더를 {인코딩: q값}으로 변환"""
+    accepted: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def acceptable_encodings(header: Optional[str], available: List[str]) -> List[str]:
+    """available(서버 선호 순서) 중 클라이언트가 받을 수 있는 인코딩을 q값이 높은 순으로"""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = [
+        (accepted.get(encoding, wildcard), -index, encoding)
+        for index, encoding in enumerate(available)
+    ]
+    return [encoding for q, _, encoding in sorted(candidates, reverse=True) if q > 0]
+
+
+class RangeNotSatisfiable(ValueError):
+    pass
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    단일 바이트 범위 헤더 파싱 (반환값: 시작, 끝(포함))
+
+    여러 범위 등 지원하지 않는 형식은 None(전체 응답)을 반환하고,
+    파일 범위를 벗어나면 RangeNotSatisfiable을 발생시킵니다.
+    """
+    match = RANGE_PATTERN.match(range_header.strip())
+    if not match:
+        return None
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+
+    if not start_text:
+        # bytes=-N : 마지막 N바이트
+        length = int(end_text)
+        if length == 0:
+            raise RangeNotSatisfiable(range_header)
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(range_header)
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(FileResponse):
+    """파일의 일부 구간만 보내는 206 응답"""
+
+    def __init__(self, path, start: int, end: int, stat_result: os.stat_result, headers: Dict[str, str], method: str = None):
+        super().__init__(path, status_code=206, headers=headers, stat_result=stat_result, method=method)
+        self.start = start
+        self.end = end
+        self.headers["content-length"] = str(end - start + 1)
+        self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+
+    async def __call__(self, scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        remaining = self.end - self.start + 1
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            await file.seek(self.start)
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class OpenFileResponse(Response):
+    """
+    이미 연 파일을 끝까지 보내는 응답
+
+    경로를 다시 열지 않으므로 그 사이 파일이 교체되어도 본문과 Content-Length(연 파일의 크기)가 어긋나지 않습니다.
+    보내고 나면(또는 보내다 실패하면) 파일을 닫습니다.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, file: BinaryIO, size: int, headers: Dict[str, str], media_type: str, status_code: int = 200):
+        self.file = file
+        self.size = size
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(size)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            remaining = self.size
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(self.file.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0 or self.size == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            self.file.close()
+
+
+class CachedStaticFiles(StaticFiles):
+    """업로드 이미지용 StaticFiles (해시 이름은 immutable 캐싱, Range 요청 지원)"""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        filename = os.path.basename(str(full_path))
+        headers = {"accept-ranges": "bytes"}
+        if is_content_addressed(filename):
+            # 파일 이름이 곧 내용의 해시이므로 강한 ETag로 사용
+            headers["etag"] = f'"{filename.split(".", 1)[0]}"'
+            headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            headers["cache-control"] = UPLOAD_CACHE_CONTROL
+
+        request_headers = Headers(scope=scope)
+        response = FileResponse(
+            full_path, status_code=status_code, stat_result=stat_result, method=scope["method"], headers=headers
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return Response(status_code=304, headers={
+                key: value for key, value in response.headers.items()
+                if key in ("etag", "cache-control", "last-modified", "accept-ranges")
+            })
+
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and status_code == 200 and (if_range is None or if_range == response.headers.get("etag")):
+            try:
+                byte_range = parse_range(range_header, stat_result.st_size)
+            except RangeNotSatisfiable:
+                return Response(status_code=416, headers={"content-range": f"bytes */{stat_result.st_size}"})
+            if byte_range is not None:
+                return RangeFileResponse(
+                    full_path, byte_range[0], byte_range[1], stat_result, headers, method=scope["method"]
+                )
+
+        return response
+
+    def is_not_modified(self, response_headers, request_headers) -> bool:
+        if etag_matches(request_headers.get("if-none-match"), response_headers.get("etag")):
+            return True
+        return super().is_not_modified(response_headers, request_headers)
+
+
+class ETagIndex:
+    """
+    저장 시점에 계산한 ETag 보관소
+
+    메모리와 데이터 옆의 사이드카 파일(<key>.etag)에 함께 저장하므로
+    If-None-Match 확인에 본문 파일을 읽거나 파싱할 필요가 없습니다.
+    """
+
+    def __init__(self, directory: Path, suffix: str = ".etag"):
+        self.directory = directory
+        self.suffix = suffix
+        self._etags: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _sidecar(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def put(self, key: str, etag: str):
+        with open(self._sidecar(key), 'w', encoding='utf-8') as f:
+            f.write(etag)
+        with self._lock:
+            self._etags[key] = etag
+
+    def get(self, key: str, load: Callable[[], Optional[bytes]]) -> Optional[str]:
+        """
+        ETag 조회 (이전 버전에서 저장된 데이터는 처음 한 번 계산 후 보관)
+
+        load는 사이드카가 없을 때만 호출되며 압축하지 않은 본문 바이트(없으면 None)를 반환해야 합니다.
+        """
+        etag = self._etags.get(key)
+        if etag is not None:
+            return etag
+
+        try:
+            with open(self._sidecar(key), 'r', encoding='utf-8') as f:
+                etag = f.read().strip()
+        except FileNotFoundError:
+            content = load()
+            if content is None:
+                return None
+            etag = compute_etag(content)
+            self.put(key, etag)
+            return etag
+
+        with self._lock:
+            self._etags[key] = etag
+        return etag
+
+    def discard(self, key: str):
+        with self._lock:
+            self._etags.pop(key, None)
+        self._sidecar(key).unlink(missing_ok=True)
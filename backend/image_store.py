@@ -0,0 +1,296 @@
+"""
+콘텐츠 주소 기반(SHA-256) 이미지 저장소
+
+노드 imageUrl에 들어 있는 data:image/...;base64 URI를 디코딩해
+uploads/<sha256>.<확장자> 파일로 한 번만 저장하고, 노드에는 짧은 URL만 남깁니다.
+같은 이미지는 여러 게임에서 하나의 파일을 공유하므로, 어떤 게임이 어떤 파일을 참조하는지는
+ImageReferences 역색인으로 추적합니다 (공유 이미지를 삭제하지 않도록).
+"""
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+DATA_URI_PATTERN = re.compile(r"^data:(image/[\w.+-]+);base64,(.*)$", re.DOTALL)
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+# 게임 본문(JSON 바이트)에 들어 있는 업로드 파일 참조 (상대/절대 URL 모두)
+UPLOAD_REFERENCE_PATTERN = re.compile(rb"/uploads/([A-Za-z0-9._-]+)")
+
+# 파일을 읽고 쓸 때 사용하는 청크 크기 (메모리 사용량을 일정하게 유지)
+CHUNK_SIZE = 64 * 1024
+
+MIME_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/jpg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/svg+xml": "svg",
+    "image/bmp": "bmp",
+    "image/avif": "avif",
+}
+
+
+class ImageTooLarge(ValueError):
+    """이미지가 허용 크기를 넘음"""
+
+
+def is_content_addressed(filename: str) -> bool:
+    """uploads/ 안의 파일이 해시 이름(불변)인지 여부"""
+    return bool(CONTENT_ADDRESSED_NAME.match(filename))
+
+
+def upload_references(content: bytes) -> Set[str]:
+    """게임 본문(JSON 바이트)이 참조하는 업로드 파일 이름"""
+    return {name.decode("ascii") for name in UPLOAD_REFERENCE_PATTERN.findall(content)}
+
+
+class ImageInUse(Exception):
+    """해시 이름 업로드 파일을 아직 어떤 게임이나 버전이 참조함"""
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self.filename = filename
+
+
+class ImageStore:
+    def __init__(self, directory: Path, url_prefix: str = "/uploads"):
+        self.directory = directory
+        self.url_prefix = url_prefix.rstrip("/")
+        self.directory.mkdir(exist_ok=True, parents=True)
+        # 파일 추가/삭제 알림을 받는 객체 (image_added(filename, size), image_removed(filename))
+        self._observers: List[Any] = []
+
+    def add_observer(self, observer):
+        self._observers.append(observer)
+
+    def filename_for(self, digest: str, extension: str) -> str:
+        return f"{digest}.{extension}"
+
+    def url_for(self, filename: str) -> str:
+        return f"{self.url_prefix}/{filename}"
+
+    def put_bytes(self, data: bytes, extension: str) -> Tuple[str, bool]:
+        """이미지 바이트 저장 (반환값: 파일명, 새로 저장했는지 여부)"""
+        filename = self.filename_for(hashlib.sha256(data).hexdigest(), extension)
+        path = self.directory / filename
+        if path.exists():
+            return filename, False
+
+        # 임시 파일에 쓴 뒤 rename하여 중간 상태의 파일이 노출되지 않도록 함
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".upload-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        for observer in self._observers:
+            observer.image_added(filename, len(data))
+        return filename, True
+
+    def put_file(self, source: BinaryIO, extension: str, max_bytes: Optional[int] = None) -> Tuple[str, bool, int]:
+        """
+        파일 객체를 청크 단위로 임시 파일에 쓰면서 해시를 계산한 뒤 원자적으로 저장
+
+        max_bytes를 넘는 순간 ImageTooLarge를 발생시키고 임시 파일을 지웁니다.
+        반환값: (파일명, 새로 저장했는지 여부, 바이트 수)
+        """
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".upload-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise ImageTooLarge(size)
+                    hasher.update(chunk)
+                    f.write(chunk)
+            filename, created = self.adopt_file(Path(tmp_path), hasher.hexdigest(), extension)
+            return filename, created, size
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def adopt_file(self, tmp_path: Path, digest: str, extension: str) -> Tuple[str, bool]:
+        """해시를 이미 계산한 임시 파일을 저장소로 이동 (같은 이미지가 있으면 임시 파일 삭제)"""
+        filename = self.filename_for(digest, extension)
+        path = self.directory / filename
+        if path.exists():
+            tmp_path.unlink(missing_ok=True)
+            return filename, False
+        os.replace(tmp_path, path)
+        size = path.stat().st_size
+        for observer in self._observers:
+            observer.image_added(filename, size)
+        return filename, True
+
+    def delete(self, filename: str) -> bool:
+        """저장소의 파일 삭제 (없으면 False)"""
+        path = self.directory / filename
+        if path.parent != self.directory or not path.is_file():
+            return False
+        path.unlink()
+        for observer in self._observers:
+            observer.image_removed(filename)
+        return True
+
+    def store_data_uri(self, value: str) -> Optional[Tuple[str, bool, int]]:
+        """data URI를 저장 (반환값: URL, 새로 저장했는지 여부, 바이트 수 / data URI가 아니면 None)"""
+        match = DATA_URI_PATTERN.match(value)
+        if not match:
+            return None
+
+        mime_type, encoded = match.groups()
+        try:
+            data = base64.b64decode(encoded, validate=False)
+        except (binascii.Error, ValueError):
+            return None
+
+        extension = MIME_EXTENSIONS.get(mime_type.lower(), "bin")
+        filename, created = self.put_bytes(data, extension)
+        return self.url_for(filename), created, len(data)
+
+    def externalize_game(self, game_dict: Dict[str, Any]) -> Dict[str, int]:
+        """게임의 모든 노드에 externalize_nodes 적용 (가져오기, 마이그레이션용)"""
+        return self.externalize_nodes(game_dict.get("nodes") or [])
+
+    def externalize_nodes(self, nodes: List[Dict[str, Any]]) -> Dict[str, int]:
+        """노드의 인라인 이미지를 저장소로 옮기고 imageUrl을 참조 URL로 교체"""
+        stats = {"extracted": 0, "written": 0, "deduplicated": 0, "bytes": 0}
+        for node in nodes:
+            image_url = node.get("imageUrl")
+            if not image_url or not image_url.startswith("data:"):
+                continue
+
+            stored = self.store_data_uri(image_url)
+            if stored is None:
+                continue
+
+            url, created, size = stored
+            node["imageUrl"] = url
+            stats["extracted"] += 1
+            stats["bytes"] += size
+            if created:
+                stats["written"] += 1
+            else:
+                stats["deduplicated"] += 1
+        return stats
+
+
+class ImageReferences:
+    """
+    업로드 파일 → 참조하는 게임 ID 역색인
+
+    GameStore 관찰자로 등록하면 저장할 때 load(game_id)가 돌려주는 본문의 참조를 더하고, 삭제할 때 그 게임의 참조를 뺍니다.
+    다시 저장해도 이전 참조는 빼지 않습니다 (버전 기록으로 되돌릴 수 있으므로 게임이 삭제될 때까지 유지).
+    처음 조회할 때 scan()이 돌려주는 (게임 ID, 참조 파일들)로 한 번 만들며, 그 도중의 저장/삭제도 반영합니다.
+    """
+
+    def __init__(
+        self,
+        scan: Callable[[], Iterable[Tuple[str, Set[str]]]],
+        load: Optional[Callable[[str], Set[str]]] = None,
+    ):
+        self._scan = scan
+        self._load = load
+        self._files: Dict[str, Set[str]] = {}
+        self._owners: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._ready = False
+        # 색인을 만드는 도중 삭제된 게임 (scan 결과에서 제외)
+        self._deleted_during_build: Optional[Set[str]] = None
+
+    def _add(self, owner: str, filenames: Iterable[str]):
+        for filename in filenames:
+            self._files.setdefault(owner, set()).add(filename)
+            self._owners.setdefault(filename, set()).add(owner)
+
+    def add(self, owner: str, filenames: Iterable[str]):
+        with self._lock:
+            self._add(owner, filenames)
+
+    def remove(self, owner: str):
+        with self._lock:
+            if self._deleted_during_build is not None:
+                self._deleted_during_build.add(owner)
+            for filename in self._files.pop(owner, ()):
+                owners = self._owners.get(filename)
+                if owners is not None:
+                    owners.discard(owner)
+                    if not owners:
+                        del self._owners[filename]
+
+    def track(self, owner: str, store: Callable[[str], Optional[str]]) -> Callable[[str], Optional[str]]:
+        """store(value)가 저장한 파일의 참조를 저장과 같은 잠금 안에서 기록하는 함수 (그 사이 삭제되지 않도록)"""
+        def tracked(value: str) -> Optional[str]:
+            with self._lock:
+                url = store(value)
+                if url:
+                    self._add(owner, upload_references(url.encode("utf-8")))
+            return url
+        return tracked
+
+    def ensure_built(self):
+        """아직 만들지 않았으면 scan()으로 색인 생성 (요청 경로에서 기다리지 않도록 시작 시 백그라운드에서 호출)"""
+        if self._ready:
+            return
+        with self._build_lock:
+            if self._ready:
+                return
+            with self._lock:
+                self._deleted_during_build = set()
+            try:
+                scanned = list(self._scan())
+            except BaseException:
+                with self._lock:
+                    self._deleted_during_build = None
+                raise
+            with self._lock:
+                for owner, filenames in scanned:
+                    if owner not in self._deleted_during_build:
+                        self._add(owner, filenames)
+                self._deleted_during_build = None
+                self._ready = True
+
+    def owners(self, filename: str) -> Set[str]:
+        """filename을 참조하는 게임 ID"""
+        self.ensure_built()
+        with self._lock:
+            return set(self._owners.get(filename, ()))
+
+    def delete_unreferenced(self, filename: str, delete: Callable[[str], bool]) -> bool:
+        """
+        아무 게임도 참조하지 않으면 delete(filename)의 결과를, 참조하면 ImageInUse를 발생
+
+        확인과 삭제를 같은 잠금 안에서 하므로 그 사이 track()으로 같은 파일을 참조하게 되지 않습니다.
+        게임 저장과의 순서는 호출자가 맞춥니다 (GameStore.awrite로 쓰기 스레드에서 실행).
+        """
+        self.ensure_built()
+        with self._lock:
+            if self._owners.get(filename):
+                raise ImageInUse(filename)
+            return delete(filename)
+
+    # GameStore 알림
+    def game_saved(self, summary: Dict[str, Any]):
+        if self._load is not None:
+            self.add(summary["id"], self._load(summary["id"]))
+
+    def game_deleted(self, game_id: str):
+        self.remove(game_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"ready": self._ready, "images": len(self._owners), "games": len(self._files)}
@@ -0,0 +1,186 @@
+"""
+LLM 제공자(Claude/Gemini) 공용 HTTP 클라이언트 풀
+
+요청마다 httpx.AsyncClient를 새로 만들면 매번 DNS + TCP + TLS 핸드셰이크를
+다시 하게 되므로, 앱 lifespan 동안 제공자별로 하나의 클라이언트를 유지하고
+keep-alive 커넥션을 재사용합니다.
+"""
+import os
+import json
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator, Tuple
+
+import httpx
+
+# HTTP/2는 h2 패키지(httpx[http2])가 설치된 경우에만 사용
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+PROVIDER_BASE_URLS = {
+    "claude": "https://api.anthropic.com",
+    "gemini": "https://generativelanguage.googleapis.com",
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class ProviderClientPool:
+    """제공자별로 오래 유지되는 httpx.AsyncClient 묶음"""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.max_connections = max_connections or _env_int("LLM_MAX_CONNECTIONS", 20)
+        self.max_keepalive_connections = max_keepalive_connections or _env_int("LLM_MAX_KEEPALIVE_CONNECTIONS", 10)
+        self.keepalive_expiry = keepalive_expiry or _env_float("LLM_KEEPALIVE_EXPIRY", 60.0)
+        self.connect_timeout = connect_timeout or _env_float("LLM_CONNECT_TIMEOUT", 5.0)
+        if http2 is None:
+            http2 = os.getenv("LLM_HTTP2", "True").lower() == "true"
+        self.http2 = http2 and HTTP2_AVAILABLE
+
+        # 제공자별 응답 대기 시간 (기존 30초 기본값 유지)
+        self.read_timeouts = {
+            "claude": _env_float("CLAUDE_TIMEOUT", 30.0),
+            "gemini": _env_float("GEMINI_TIMEOUT", 30.0),
+        }
+
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._in_flight: Dict[str, int] = {provider: 0 for provider in PROVIDER_BASE_URLS}
+        self._requests_total: Dict[str, int] = {provider: 0 for provider in PROVIDER_BASE_URLS}
+
+    def timeout_for(self, provider: str) -> httpx.Timeout:
+        read_timeout = self.read_timeouts.get(provider, 30.0)
+        return httpx.Timeout(read_timeout, connect=self.connect_timeout)
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return httpx.AsyncClient(
+            base_url=PROVIDER_BASE_URLS[provider],
+            http2=self.http2,
+            limits=limits,
+            timeout=self.timeout_for(provider),
+        )
+
+    async def start(self):
+        """앱 시작 시 모든 제공자 클라이언트 생성"""
+        for provider in PROVIDER_BASE_URLS:
+            self.client(provider)
+
+    async def aclose(self):
+        """앱 종료 시 커넥션 풀 정리"""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        # lifespan 없이 호출되는 경우(스크립트 등)를 위해 지연 생성
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create_client(provider)
+            self._clients[provider] = client
+        return client
+
+    @asynccontextmanager
+    async def _track(self, provider: str):
+        self._in_flight[provider] += 1
+        self._requests_total[provider] += 1
+        try:
+            yield
+        finally:
+            self._in_flight[provider] -= 1
+
+    async def post(self, provider: str, url: str, **kwargs) -> httpx.Response:
+        """풀링된 클라이언트로 POST 요청"""
+        async with self._track(provider):
+            return await self.client(provider).post(url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, provider: str, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """풀링된 클라이언트로 스트리밍 요청 (본문은 호출자가 순차적으로 읽음)"""
+        async with self._track(provider):
+            async with self.client(provider).stream(method, url, **kwargs) as response:
+                yield response
+
+    def _connection_stats(self, client: httpx.AsyncClient) -> Dict[str, int]:
+        # httpcore 풀 내부 상태는 공개 API가 아니므로 가능한 경우에만 보고
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "open": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 사용률 보고 (/health 용)"""
+        providers = {}
+        for provider in PROVIDER_BASE_URLS:
+            client = self._clients.get(provider)
+            connections = (
+                self._connection_stats(client)
+                if client is not None and not client.is_closed
+                else {"open": 0, "idle": 0, "active": 0}
+            )
+            providers[provider] = {
+                "inFlight": self._in_flight[provider],
+                "requestsTotal": self._requests_total[provider],
+                "connections": connections,
+                "utilization": round(connections["active"] / self.max_connections, 3),
+                "readTimeout": self.read_timeouts.get(provider),
+            }
+
+        return {
+            "http2": self.http2,
+            "maxConnections": self.max_connections,
+            "maxKeepaliveConnections": self.max_keepalive_connections,
+            "keepaliveExpiry": self.keepalive_expiry,
+            "providers": providers,
+        }
+
+
+async def iter_sse_events(response: httpx.Response) -> AsyncIterator[Tuple[str, str]]:
+    """업스트림 Server-Sent Events 응답을 (event, data) 쌍으로 파싱"""
+    event, data_lines = "message", []
+    async for line in response.aiter_lines():
+        if not line:
+            if data_lines:
+                yield event, "\n".join(data_lines)
+            event, data_lines = "message", []
+        elif line.startswith(":"):
+            continue
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        yield event, "\n".join(data_lines)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """클라이언트로 보낼 Server-Sent Event 한 건을 직렬화"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
@@ -1,18 +1,110 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, Response, RedirectResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Tuple
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 import os
 import json
-import httpx
+import asyncio
+import logging
+import re
 import uuid
 import shutil
+import time
 from datetime import datetime
 from pathlib import Path
 
-app = FastAPI(title="Story Generator API", version="1.0.0")
+import httpx
+
+from llm_client import ProviderClientPool, iter_sse_events, format_sse
+from generation_cache import GenerationCache, make_cache_key
+from singleflight import SingleFlight
+from admission import ClientRateLimiter, ProviderAdmission, client_key, too_many_requests
+from provider_router import ProviderRouter, OPEN as CIRCUIT_OPEN
+from story_graph import GraphIndex
+from game_context import GameContextCache
+from story_analysis import AnalysisCache, analyze_story
+import playthrough_sim
+from stat_reachability import stat_ranges_json, JOINT_STATE_LIMIT
+from image_store import ImageInUse, ImageReferences, ImageStore, ImageTooLarge, is_content_addressed, upload_references
+from http_cache import (
+    CachedStaticFiles, OpenFileResponse, etag_matches, representation_etag, acceptable_encodings,
+    IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL
+)
+from game_codec import AVAILABLE_ENCODINGS
+from game_store import create_game_store
+from game_versions import GameVersionStore, VersionConflict
+from game_bundle import BundleStore
+from play_window import PlayIndexCache
+from storage_stats import StorageStats, run_storage_stats, format_bytes
+from storage_sweeper import StorageSweeper, run_storage_sweeper
+from upload_manager import UploadSizeLimitMiddleware, ResumableUploads, image_extension, upload_too_large
+from runtime_monitor import configure_logging, RequestTracker, RequestTrackingMiddleware, LoopLagMonitor
+from metrics import REGISTRY, CONTENT_TYPE as METRICS_CONTENT_TYPE, LLM_LATENCY_BUCKETS, MetricsMiddleware
+
+# 로그는 큐를 거쳐 별도 스레드에서 출력 (이벤트 루프에서 stdout에 직접 쓰지 않음)
+configure_logging(os.getenv("LOG_LEVEL", "INFO"))
+logger = logging.getLogger(__name__)
+
+# LLM 제공자 공용 커넥션 풀 (앱 lifespan 동안 유지)
+llm_clients = ProviderClientPool()
+
+# 파일시스템/SQLite 작업용 스레드 풀 (asyncio.to_thread의 기본 실행기로 사용, 크기 제한)
+IO_THREADS = int(os.getenv("IO_THREADS", "16"))
+io_executor = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="io")
+
+# 이벤트 루프 지연 모니터 (지연이 임계값을 넘으면 그 구간에 처리 중이던 핸들러를 로그로 남김)
+request_tracker = RequestTracker()
+loop_monitor = LoopLagMonitor(
+    request_tracker,
+    interval=float(os.getenv("LOOP_LAG_SAMPLE_INTERVAL", "0.1")),
+    threshold=float(os.getenv("LOOP_LAG_THRESHOLD", "0.1")),
+)
+
+def io_pool_stats() -> Dict[str, Any]:
+    return {
+        "maxWorkers": IO_THREADS,
+        "threads": len(io_executor._threads),
+        "queued": io_executor._work_queue.qsize(),
+    }
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    asyncio.get_running_loop().set_default_executor(io_executor)
+    monitor_task = asyncio.create_task(loop_monitor.run())
+    await llm_clients.start()
+    # 스토리지 통계 초기화 후 주기적 스냅샷/대조
+    await asyncio.to_thread(lambda: storage_stats.reconcile(game_store.list_summaries(), UPLOAD_DIR))
+    stats_task = asyncio.create_task(run_storage_stats(
+        storage_stats, game_store.list_summaries, UPLOAD_DIR,
+        reconcile_interval=STORAGE_STATS_RECONCILE_INTERVAL,
+        snapshot_interval=STORAGE_STATS_SNAPSHOT_INTERVAL,
+    ))
+    sweeper_task = asyncio.create_task(run_storage_sweeper(
+        storage_sweeper, STORAGE_SWEEP_INTERVAL, image_gc=IMAGE_GC_ENABLED
+    ))
+    references_task = asyncio.create_task(build_image_references())
+    yield
+    monitor_task.cancel()
+    sweeper_task.cancel()
+    references_task.cancel()
+    stats_task.cancel()
+    await llm_clients.aclose()
+    playthrough_sim.shutdown_process_pool()
+    game_store.close()
+    game_bundles.close()
+
+async def build_image_references():
+    """이미지 참조 색인을 미리 만들어 두기 (첫 이미지 삭제 요청이 저장소를 훑으며 기다리지 않도록)"""
+    try:
+        await asyncio.to_thread(image_references.ensure_built)
+    except Exception as e:
+        logger.error(f"이미지 참조 색인 생성 오류: {str(e)}")
+
+app = FastAPI(title="Story Generator API", version="1.0.0", lifespan=lifespan)
 
 # 이미지 업로드 디렉토리 생성
 UPLOAD_DIR = Path("uploads")
@@ -23,8 +115,94 @@ UPLOAD_DIR.mkdir(exist_ok=True)
 GAMES_DIR = Path(os.getenv("GAMES_STORAGE_PATH", "saved_games"))
 GAMES_DIR.mkdir(exist_ok=True, parents=True)
 
+# 콘텐츠 주소(SHA-256) 기반 이미지 저장소
+image_store = ImageStore(UPLOAD_DIR)
+
+# 업로드 크기 제한 (5MB)
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# 이어 올리기 업로드 임시 디렉토리 (원자적 rename을 위해 uploads와 같은 파일시스템)
+resumable_uploads = ResumableUploads(
+    image_store,
+    Path(os.getenv("UPLOAD_TMP_PATH", "uploads_partial")),
+    max_bytes=MAX_UPLOAD_BYTES
+)
+
+# 본문을 받는 도중 크기 제한을 넘으면 바로 413 응답 (multipart 경계 여유분 포함)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/upload-image": MAX_UPLOAD_BYTES + 64 * 1024,
+        "/api/uploads": MAX_UPLOAD_BYTES,
+    }
+)
+
+# 게임 저장소 (GAME_STORE_BACKEND=sqlite|file, 처음 가져오는 게임 파일의 인라인 이미지는 uploads/로 옮김)
+game_store = create_game_store(GAMES_DIR, prepare_import=image_store.externalize_game)
+
+# 게임 버전 기록 (노드 단위 내용 주소 저장, PATCH /api/games/{id})
+game_versions = GameVersionStore(
+    Path(os.getenv("GAME_VERSION_SQLITE_PATH", str(GAMES_DIR / "versions.sqlite3"))),
+    game_store,
+    snapshot_interval=int(os.getenv("GAME_VERSION_SNAPSHOT_INTERVAL", "20")),
+    normalize_node=lambda node: NodeData(**node).dict(),
+    validate=lambda game_dict: validate_game_graph(game_dict["nodes"], game_dict["edges"]),
+)
+game_store.add_observer(game_versions)
+
+# 업로드 파일 → 참조하는 게임 역색인 (공유 이미지 삭제 확인, 저장/삭제 알림으로 갱신)
+def scan_image_references():
+    """게임별 업로드 파일 참조 (현재 본문, 버전 기록의 노드, 번들 컴파일 때 옮긴 인라인 이미지)"""
+    for summary in game_store.list_summaries():
+        game_id = summary["id"]
+        references = upload_references(game_store.get_bytes(game_id) or b"")
+        for content in game_versions.iter_node_data(game_id=game_id):
+            references |= upload_references(content)
+        references |= game_bundles.upload_files(game_id)
+        yield game_id, references
+
+image_references = ImageReferences(
+    scan_image_references,
+    load=lambda game_id: upload_references(game_store.get_bytes(game_id) or b""),
+)
+game_store.add_observer(image_references)
+
+# 플레이용 번들 (저장할 때마다 백그라운드에서 컴파일, GET /api/games/{id}/bundle)
+game_bundles = BundleStore(
+    Path(os.getenv("GAME_BUNDLE_SQLITE_PATH", str(GAMES_DIR / "bundles.sqlite3"))),
+    game_store,
+    store_image=lambda value: (image_store.store_data_uri(value) or (None,))[0],
+    image_references=image_references,
+)
+game_store.add_observer(game_bundles)
+
+# 저장/삭제 시 갱신되는 스토리지 통계 (주기적으로 실제 저장소와 대조)
+STORAGE_STATS_RECONCILE_INTERVAL = float(os.getenv("STORAGE_STATS_RECONCILE_INTERVAL", "300"))
+STORAGE_STATS_SNAPSHOT_INTERVAL = float(os.getenv("STORAGE_STATS_SNAPSHOT_INTERVAL", "300"))
+storage_stats = StorageStats(history_size=int(os.getenv("STORAGE_STATS_HISTORY", "288")))
+game_store.add_observer(storage_stats)
+image_store.add_observer(storage_stats)
+
+# 만료 게임 / 고아 이미지 정리 (삭제는 기본 비활성화, 켜려면 GAME_TTL_DAYS / IMAGE_GC_ENABLED 설정)
+STORAGE_SWEEP_INTERVAL = float(os.getenv("STORAGE_SWEEP_INTERVAL", "3600"))
+IMAGE_GC_ENABLED = os.getenv("IMAGE_GC_ENABLED", "False").lower() == "true"
+storage_sweeper = StorageSweeper(
+    game_store,
+    image_store,
+    game_ttl_days=float(os.getenv("GAME_TTL_DAYS", "0")),
+    image_grace_seconds=float(os.getenv("IMAGE_GC_GRACE_HOURS", "24")) * 3600,
+    batch_size=int(os.getenv("STORAGE_SWEEP_BATCH_SIZE", "50")),
+    batch_pause=float(os.getenv("STORAGE_SWEEP_BATCH_PAUSE", "1.0")),
+    version_store=game_versions,
+    bundle_store=game_bundles,
+    image_references=image_references,
+)
+game_store.add_observer(storage_sweeper)
+
 # 정적 파일 서빙 설정
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# 해시 이름의 업로드 파일은 immutable 캐싱, 큰 이미지는 Range 요청 지원
+app.mount("/uploads", CachedStaticFiles(directory="uploads"), name="uploads")
 
 # CORS 설정
 app.add_middleware(
@@ -45,6 +223,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 경로/상태별 요청 수와 처리 시간 (/metrics)
+app.add_middleware(MetricsMiddleware)
+
+# 처리 중인 요청 추적 (루프 지연 원인 핸들러 확인용, 가장 바깥 미들웨어)
+app.add_middleware(RequestTrackingMiddleware, tracker=request_tracker)
+
 # 데이터 모델 정의
 class NodeData(BaseModel):
     id: str
@@ -67,7 +251,34 @@ class StoryGenerationRequest(BaseModel):
     gameConfig: GameConfig
     allNodes: List[NodeData]
     allEdges: List[Dict[str, Any]]
-    provider: str = "claude"  # "claude" 또는 "gemini"
+    provider: str = "claude"  # "claude", "gemini" 또는 상태가 좋은 쪽을 고르는 "auto"
+    bypassCache: bool = False  # True면 캐시를 무시하고 새로 생성
+
+class BatchStoryGenerationRequest(BaseModel):
+    rootNodeId: Optional[str] = None  # 이 노드와 모든 하위 노드 생성
+    nodeIds: Optional[List[str]] = None  # 또는 생성할 노드 목록
+    gameConfig: GameConfig
+    allNodes: List[NodeData]
+    allEdges: List[Dict[str, Any]]
+    provider: str = "claude"
+    bypassCache: bool = False
+    maxConcurrency: Optional[int] = None
+
+class GameStoryGenerationRequest(BaseModel):
+    gameId: str
+    nodeId: str
+    # 저장 이후 편집된 내용 (선택)
+    nodeUpdates: Optional[List[NodeData]] = None
+    addedEdges: Optional[List[Dict[str, Any]]] = None
+    removedEdgeIds: Optional[List[str]] = None
+    gameConfig: Optional[GameConfig] = None
+    provider: str = "claude"
+    bypassCache: bool = False
+
+class UploadSessionRequest(BaseModel):
+    filename: Optional[str] = None
+    contentType: str
+    size: int
 
 class StoryGenerationResponse(BaseModel):
     generatedStory: str
@@ -84,18 +295,102 @@ class GameData(BaseModel):
     createdAt: Optional[str] = None
     updatedAt: Optional[str] = None
 
+class GamePatchRequest(BaseModel):
+    # 현재 버전과 다르면 409 (생략하면 최신 버전에 적용)
+    baseVersion: Optional[int] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    gameConfig: Optional[GameConfig] = None
+    # 노드 ID별로 보낸 필드만 덮어씀 (없는 ID면 새 노드)
+    nodeUpdates: Optional[List[Dict[str, Any]]] = None
+    removedNodeIds: Optional[List[str]] = None
+    addedEdges: Optional[List[Dict[str, Any]]] = None
+    removedEdgeIds: Optional[List[str]] = None
+
+class SimulationRequest(BaseModel):
+    runs: int = 10000
+    # 노드 ID → 선택 가중치 (없으면 두 선택지를 같은 확률로 고름)
+    weights: Optional[Dict[str, float]] = None
+    seed: Optional[int] = None
+    maxSteps: int = 500
+    trajectorySteps: int = 50
+
 # API 키 설정 (환경변수에서 가져오기)
 CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-# Claude API 호출 함수
-async def generate_story_with_claude(context: StoryGenerationRequest) -> str:
+CLAUDE_MODEL = "claude-3-5-sonnet-20241022"
+GEMINI_MODEL = "gemini-pro"
+
+PROVIDER_MODELS = {
+    "claude": CLAUDE_MODEL,
+    "gemini": GEMINI_MODEL,
+}
+
+# 생성 파라미터 (캐시 키에도 포함)
+CLAUDE_GENERATION_PARAMS = {
+    "max_tokens": 1000,
+}
+
+GEMINI_GENERATION_PARAMS = {
+    "temperature": 0.7,
+    "topK": 40,
+    "topP": 0.95,
+    "maxOutputTokens": 1000,
+}
+
+PROVIDER_GENERATION_PARAMS = {
+    "claude": CLAUDE_GENERATION_PARAMS,
+    "gemini": GEMINI_GENERATION_PARAMS,
+}
+
+PROVIDER_API_KEYS = {
+    "claude": CLAUDE_API_KEY,
+    "gemini": GEMINI_API_KEY,
+}
+
+# 업스트림 LLM 호출 메트릭 (결과: ok, error, timeout, cancelled)
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "업스트림 LLM 호출 수", ("provider", "model", "outcome")
+)
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_duration_seconds", "업스트림 LLM 호출 시간 (스트리밍은 마지막 조각까지)",
+    ("provider", "model", "outcome"), LLM_LATENCY_BUCKETS,
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "제공자 응답에 기록된 토큰 수", ("provider", "model", "direction")
+)
+
+@asynccontextmanager
+async def observe_llm_call(provider: str):
+    model = PROVIDER_MODELS[provider]
+    outcome = "error"
+    started = time.perf_counter()
+    try:
+        yield
+        outcome = "ok"
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except httpx.TimeoutException:
+        outcome = "timeout"
+        raise
+    finally:
+        LLM_REQUEST_SECONDS.labels(provider, model, outcome).observe(time.perf_counter() - started)
+        LLM_REQUESTS.labels(provider, model, outcome).inc()
+
+def record_llm_tokens(provider: str, input_tokens: Any, output_tokens: Any):
+    model = PROVIDER_MODELS[provider]
+    if isinstance(input_tokens, int):
+        LLM_TOKENS.labels(provider, model, "input").inc(input_tokens)
+    if isinstance(output_tokens, int):
+        LLM_TOKENS.labels(provider, model, "output").inc(output_tokens)
+
+# Claude 요청 헤더/본문 구성
+def build_claude_request(prompt: str) -> Dict[str, Any]:
     if not CLAUDE_API_KEY:
         raise HTTPException(status_code=500, detail="Claude API key not configured")
     
-    # 컨텍스트 구성
-    prompt = build_story_prompt(context)
-    
     headers = {
         "Content-Type": "application/json",
         "x-api-key": CLAUDE_API_KEY,
@@ -103,8 +398,8 @@ async def generate_story_with_claude(context: StoryGenerationRequest) -> str:
     }
     
     payload = {
-        "model": "claude-3-5-sonnet-20241022",
-        "max_tokens": 1000,
+        "model": CLAUDE_MODEL,
+        **CLAUDE_GENERATION_PARAMS,
         "messages": [
             {
                 "role": "user",
@@ -113,32 +408,13 @@ async def generate_story_with_claude(context: StoryGenerationRequest) -> str:
         ]
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.anthropic.com/v1/messages",
-            headers=headers,
-            json=payload,
-            timeout=30.0
-        )
-        
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Claude API error: {response.text}"
-            )
-        
-        result = response.json()
-        return result["content"][0]["text"]
+    return {"headers": headers, "json": payload}
 
-# Gemini API 호출 함수
-async def generate_story_with_gemini(context: StoryGenerationRequest) -> str:
+# Gemini 요청 본문 구성
+def build_gemini_request(prompt: str) -> Dict[str, Any]:
     if not GEMINI_API_KEY:
         raise HTTPException(status_code=500, detail="Gemini API key not configured")
     
-    prompt = build_story_prompt(context)
-    
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={GEMINI_API_KEY}"
-    
     payload = {
         "contents": [
             {
@@ -149,29 +425,255 @@ async def generate_story_with_gemini(context: StoryGenerationRequest) -> str:
                 ]
             }
         ],
-        "generationConfig": {
-            "temperature": 0.7,
-            "topK": 40,
-            "topP": 0.95,
-            "maxOutputTokens": 1000,
-        }
+        "generationConfig": dict(GEMINI_GENERATION_PARAMS)
     }
     
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            url,
-            json=payload,
-            timeout=30.0
+    return {"json": payload}
+
+# Claude API 호출 함수
+async def generate_story_with_claude(prompt: str) -> str:
+    response = await llm_clients.post(
+        "claude",
+        "/v1/messages",
+        **build_claude_request(prompt)
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Claude API error: {response.text}"
         )
+    
+    result = response.json()
+    usage = result.get("usage") or {}
+    record_llm_tokens("claude", usage.get("input_tokens"), usage.get("output_tokens"))
+    return result["content"][0]["text"]
+
+# Gemini API 호출 함수
+async def generate_story_with_gemini(prompt: str) -> str:
+    url = f"/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+    
+    response = await llm_clients.post(
+        "gemini",
+        url,
+        **build_gemini_request(prompt)
+    )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Gemini API error: {response.text}"
+        )
+    
+    result = response.json()
+    usage = result.get("usageMetadata") or {}
+    record_llm_tokens("gemini", usage.get("promptTokenCount"), usage.get("candidatesTokenCount"))
+    return result["candidates"][0]["content"]["parts"][0]["text"]
+
+# Claude 스트리밍 호출 함수 (텍스트 조각 단위로 반환)
+async def stream_story_with_claude(prompt: str) -> AsyncIterator[str]:
+    request_kwargs = build_claude_request(prompt)
+    request_kwargs["json"]["stream"] = True
+    
+    async with llm_clients.stream("claude", "POST", "/v1/messages", **request_kwargs) as response:
+        if response.status_code != 200:
+            body = await response.aread()
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Claude API error: {body.decode('utf-8', errors='replace')}"
+            )
         
+        async for event, data in iter_sse_events(response):
+            if event == "content_block_delta":
+                text = json.loads(data).get("delta", {}).get("text")
+                if text:
+                    yield text
+            elif event == "message_start":
+                usage = json.loads(data).get("message", {}).get("usage") or {}
+                record_llm_tokens("claude", usage.get("input_tokens"), None)
+            elif event == "message_delta":
+                # 출력 토큰 수는 마지막 message_delta에 누적값으로 옴
+                usage = json.loads(data).get("usage") or {}
+                record_llm_tokens("claude", None, usage.get("output_tokens"))
+            elif event == "error":
+                raise HTTPException(status_code=502, detail=f"Claude API error: {data}")
+
+# Gemini 스트리밍 호출 함수 (텍스트 조각 단위로 반환)
+async def stream_story_with_gemini(prompt: str) -> AsyncIterator[str]:
+    url = f"/v1beta/models/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={GEMINI_API_KEY}"
+    request_kwargs = build_gemini_request(prompt)
+    
+    async with llm_clients.stream("gemini", "POST", url, **request_kwargs) as response:
         if response.status_code != 200:
+            body = await response.aread()
             raise HTTPException(
                 status_code=response.status_code,
-                detail=f"Gemini API error: {response.text}"
+                detail=f"Gemini API error: {body.decode('utf-8', errors='replace')}"
             )
         
-        result = response.json()
-        return result["candidates"][0]["content"]["parts"][0]["text"]
+        # 조각마다 그때까지의 누적 사용량이 오므로 마지막 값만 기록
+        usage = {}
+        async for _, data in iter_sse_events(response):
+            chunk = json.loads(data)
+            usage = chunk.get("usageMetadata") or usage
+            for candidate in chunk.get("candidates", []):
+                for part in candidate.get("content", {}).get("parts", []):
+                    if part.get("text"):
+                        yield part["text"]
+        record_llm_tokens("gemini", usage.get("promptTokenCount"), usage.get("candidatesTokenCount"))
+
+STORY_GENERATORS = {
+    "claude": generate_story_with_claude,
+    "gemini": generate_story_with_gemini,
+}
+
+STORY_STREAMERS = {
+    "claude": stream_story_with_claude,
+    "gemini": stream_story_with_gemini,
+}
+
+# 생성 결과 캐시 (GENERATION_CACHE_DIR 지정 시 디스크 계층 사용)
+generation_cache = GenerationCache(
+    max_bytes=int(os.getenv("GENERATION_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+    ttl_seconds=float(os.getenv("GENERATION_CACHE_TTL", 3600)),
+    disk_dir=Path(os.environ["GENERATION_CACHE_DIR"]) if os.getenv("GENERATION_CACHE_DIR") else None
+)
+
+# 동일한 프롬프트의 동시 생성 요청은 하나의 업스트림 호출로 합침
+story_flights = SingleFlight()
+
+def story_cache_key(provider: str, prompt: str) -> str:
+    return make_cache_key(
+        provider,
+        PROVIDER_MODELS[provider],
+        prompt,
+        PROVIDER_GENERATION_PARAMS[provider]
+    )
+
+# 클라이언트별 요청 한도 (토큰 버킷)와 제공자별 동시 호출 한도/대기열
+client_limiter = ClientRateLimiter(
+    rate=float(os.getenv("RATE_LIMIT_RPS", "1")),
+    burst=float(os.getenv("RATE_LIMIT_BURST", "10")),
+    max_clients=int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000")),
+)
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "False").lower() == "true"
+provider_admission = ProviderAdmission(
+    STORY_GENERATORS,
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    queue_size=int(os.getenv("LLM_QUEUE_SIZE", "32")),
+    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "10")),
+)
+
+def check_client_rate(http_request: Request):
+    forwarded_for = http_request.headers.get("x-forwarded-for") if RATE_LIMIT_TRUST_FORWARDED else None
+    host = http_request.client.host if http_request.client else None
+    client_limiter.check(client_key(host, forwarded_for))
+
+# 제공자별 지연/오류율 기록, "auto" 제공자 선택과 헤지 요청, 서킷 브레이커
+AUTO_PROVIDER = "auto"
+provider_router = ProviderRouter(
+    STORY_GENERATORS,
+    failure_threshold=int(os.getenv("PROVIDER_FAILURE_THRESHOLD", "5")),
+    error_threshold=float(os.getenv("PROVIDER_ERROR_THRESHOLD", "0.5")),
+    cooldown=float(os.getenv("PROVIDER_COOLDOWN", "30")),
+    hedge_delay=float(os.getenv("HEDGE_DEFAULT_DELAY", "5")),
+    min_hedge_delay=float(os.getenv("HEDGE_MIN_DELAY", "0.5")),
+    hedging=os.getenv("HEDGE_ENABLED", "True").lower() == "true",
+)
+
+def get_provider(request: StoryGenerationRequest) -> str:
+    provider = request.provider.lower()
+    if provider not in STORY_GENERATORS and provider != AUTO_PROVIDER:
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported provider. Use 'claude', 'gemini' or 'auto'"
+        )
+    return provider
+
+def configured_providers(provider: str) -> List[str]:
+    """API 키가 설정된 제공자 (auto면 전체 중에서)"""
+    candidates = list(STORY_GENERATORS) if provider == AUTO_PROVIDER else [provider]
+    configured = [candidate for candidate in candidates if PROVIDER_API_KEYS[candidate]]
+    if not configured:
+        name = "LLM" if provider == AUTO_PROVIDER else provider.capitalize()
+        raise HTTPException(status_code=500, detail=f"{name} API key not configured")
+    return configured
+
+def route_providers(provider: str) -> List[str]:
+    """시도할 제공자 순서 (auto면 차단되지 않은 제공자를 상태가 좋은 순서로)"""
+    configured = configured_providers(provider)
+    if provider != AUTO_PROVIDER:
+        return configured
+    candidates = provider_router.rank(configured)
+    if not candidates:
+        raise too_many_requests(
+            "모든 LLM 제공자가 일시적으로 응답하지 않습니다. 잠시 후 다시 시도해주세요.",
+            provider_router.retry_after(configured),
+            status_code=503,
+        )
+    return candidates
+
+# 캐시와 single-flight를 거쳐 스토리 텍스트 생성
+# (반환값: 생성 텍스트, 캐시 적중 여부, 진행 중인 요청과 합쳐졌는지 여부, 응답한 제공자)
+async def generate_story_text(request: StoryGenerationRequest) -> Tuple[str, bool, bool, str]:
+    provider = get_provider(request)
+    prompt = build_story_prompt(request)
+    candidates = route_providers(provider)
+    cache_keys = {candidate: story_cache_key(candidate, prompt) for candidate in candidates}
+    
+    if request.bypassCache:
+        generation_cache.record_bypass()
+    else:
+        # auto는 어느 제공자가 만든 결과든 재사용
+        for candidate, cache_key in cache_keys.items():
+            cached_story = await generation_cache.get(cache_key)
+            if cached_story is not None:
+                return cached_story, True, False, candidate
+    
+    async def call_provider(candidate: str) -> str:
+        # 캐시 적중과 합쳐진 요청은 제공자 동시 호출 한도를 쓰지 않음
+        async with provider_admission.slot(candidate):
+            async with provider_router.track(candidate), observe_llm_call(candidate):
+                return await STORY_GENERATORS[candidate](prompt)
+    
+    async def call_upstream() -> Tuple[str, str]:
+        generated, served_by, _ = await provider_router.run(
+            candidates, call_provider, hedge=provider == AUTO_PROVIDER
+        )
+        await generation_cache.set(cache_keys[served_by], generated)
+        return generated, served_by
+    
+    if provider == AUTO_PROVIDER:
+        flight_key = make_cache_key(AUTO_PROVIDER, "", prompt, {})
+    else:
+        flight_key = cache_keys[provider]
+    # 진행 중인 결과는 항상 새로 생성된 것이므로 bypassCache 요청도 함께 합침
+    (generated_story, served_by), coalesced = await story_flights.do(flight_key, call_upstream)
+    return generated_story, False, coalesced, served_by
+
+# 생성 결과를 StoryGenerationResponse로 구성
+def build_story_response(
+    request: StoryGenerationRequest,
+    generated_story: str,
+    cached: bool = False,
+    coalesced: bool = False,
+    served_by: Optional[str] = None
+) -> StoryGenerationResponse:
+    return StoryGenerationResponse(
+        generatedStory=generated_story.strip(),
+        suggestions={
+            "wordCount": len(generated_story.split()),
+            "provider": served_by or request.provider
+        },
+        metadata={
+            "nodeId": request.currentNode.id,
+            "timestamp": datetime.now().isoformat(),
+            "parentCount": len(request.parentNodes),
+            "childCount": len(request.childNodes),
+            "cached": cached,
+            "coalesced": coalesced
+        }
+    )
 
 # 스토리 프롬프트 구성 함수
 def build_story_prompt(context: StoryGenerationRequest) -> str:
@@ -244,7 +746,11 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "generate_story": "/api/generate-story",
-            "health": "/health"
+            "generate_story_stream": "/api/generate-story/stream",
+            "generate_story_batch": "/api/generate-story/batch",
+            "generate_story_from_game": "/api/generate-story/from-game",
+            "health": "/health",
+            "metrics": "/metrics"
         }
     }
 
@@ -254,44 +760,241 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "claude_configured": bool(CLAUDE_API_KEY),
-        "gemini_configured": bool(GEMINI_API_KEY)
+        "gemini_configured": bool(GEMINI_API_KEY),
+        "llm_pool": llm_clients.stats(),
+        "generation_cache": generation_cache.stats(),
+        "single_flight": story_flights.stats(),
+        "providers": provider_router.stats(),
+        "admission": {
+            "clients": client_limiter.stats(),
+            "providers": provider_admission.stats()
+        },
+        "game_context_cache": game_contexts.stats(),
+        "story_analysis_cache": story_analyses.stats(),
+        "stat_range_cache": stat_range_analyses.stats(),
+        "play_index_cache": play_indexes.stats(),
+        "event_loop": loop_monitor.stats(),
+        "io_pool": io_pool_stats()
+    }
+
+def _cache_results():
+    caches = {
+        "generation": generation_cache.stats(),
+        "game_context": game_contexts.stats(),
+        "story_analysis": story_analyses.stats(),
+        "stat_range": stat_range_analyses.stats(),
+        "play_index": play_indexes.stats(),
     }
+    for name, stats in caches.items():
+        yield (name, "hit"), stats["hits"]
+        yield (name, "miss"), stats["misses"]
+
+REGISTRY.callback("cache_requests_total", "캐시 조회 수 (적중/실패)", "counter", ("cache", "result"), _cache_results)
+REGISTRY.callback(
+    "story_requests_coalesced_total", "진행 중인 같은 생성 요청에 합쳐진 요청 수", "counter", (),
+    lambda: [((), story_flights.coalesced)],
+)
+REGISTRY.callback(
+    "llm_requests_in_flight", "진행 중인 업스트림 LLM HTTP 요청 수", "gauge", ("provider",),
+    lambda: [((provider,), stats["inFlight"]) for provider, stats in llm_clients.stats()["providers"].items()],
+)
+REGISTRY.callback(
+    "llm_queue_depth", "제공자 대기열에서 기다리는 요청 수", "gauge", ("provider",),
+    lambda: [((provider,), limiter.queued) for provider, limiter in provider_admission.limiters.items()],
+)
+REGISTRY.callback(
+    "llm_admission_rejected_total", "제공자 한도로 거절된 요청 수", "counter", ("provider", "reason"),
+    lambda: [
+        item
+        for provider, limiter in provider_admission.limiters.items()
+        for item in (((provider, "queue_full"), limiter.rejected), ((provider, "queue_timeout"), limiter.timed_out))
+    ],
+)
+REGISTRY.callback(
+    "rate_limit_rejected_total", "클라이언트별 요청 한도로 거절된 요청 수", "counter", (),
+    lambda: [((), client_limiter.rejected)],
+)
+REGISTRY.callback(
+    "llm_provider_available", "auto 후보에 포함되는 제공자 (서킷 브레이커가 열려 있으면 0)", "gauge", ("provider",),
+    lambda: [((provider,), 0 if health.state == CIRCUIT_OPEN else 1) for provider, health in provider_router.health.items()],
+)
+REGISTRY.callback(
+    "llm_hedged_requests_total", "헤지 요청 수", "counter", (),
+    lambda: [((), provider_router.hedges)],
+)
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭"""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
 
 @app.post("/api/generate-story", response_model=StoryGenerationResponse)
-async def generate_story(request: StoryGenerationRequest):
+async def generate_story(request: StoryGenerationRequest, http_request: Request):
     """
     스토리 생성 API
     
     현재 노드의 컨텍스트를 바탕으로 LLM을 사용해 스토리를 생성합니다.
     """
+    check_client_rate(http_request)
     try:
-        # 제공자에 따라 다른 API 호출
-        if request.provider.lower() == "claude":
-            generated_story = await generate_story_with_claude(request)
-        elif request.provider.lower() == "gemini":
-            generated_story = await generate_story_with_gemini(request)
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Unsupported provider. Use 'claude' or 'gemini'"
-            )
+        # 제공자에 따라 다른 API 호출 (동일한 요청은 캐시에서 응답)
+        generated_story, cached, coalesced, served_by = await generate_story_text(request)
         
         # 응답 구성
-        response = StoryGenerationResponse(
-            generatedStory=generated_story.strip(),
-            suggestions={
-                "wordCount": len(generated_story.split()),
-                "provider": request.provider
-            },
-            metadata={
-                "nodeId": request.currentNode.id,
-                "timestamp": datetime.now().isoformat(),
-                "parentCount": len(request.parentNodes),
-                "childCount": len(request.childNodes)
-            }
+        return build_story_response(request, generated_story, cached, coalesced, served_by)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Story generation failed: {str(e)}"
+        )
+
+@app.post("/api/generate-story/stream")
+async def generate_story_stream(request: StoryGenerationRequest, http_request: Request):
+    """
+    스토리 생성 스트리밍 API (Server-Sent Events)
+    
+    제공자의 스트리밍 API로 받은 텍스트 조각을 `delta` 이벤트로 바로 전달하고,
+    완료되면 StoryGenerationResponse와 같은 필드를 담은 `done` 이벤트를 보냅니다.
+    provider가 auto이면 상태가 가장 좋은 제공자로 스트리밍하고, 첫 조각을 받기 전에 실패하면 다음 제공자로 넘깁니다.
+    """
+    provider = get_provider(request)
+    
+    # 스트림 시작 전에 설정 오류와 한도 초과는 일반 HTTP 오류로 응답
+    candidates = route_providers(provider)
+    check_client_rate(http_request)
+    provider_admission.check(candidates[0])
+    
+    prompt = build_story_prompt(request)
+    cache_keys = {candidate: story_cache_key(candidate, prompt) for candidate in candidates}
+    
+    async def event_stream():
+        chunks = []
+        try:
+            if request.bypassCache:
+                generation_cache.record_bypass()
+            else:
+                for candidate, cache_key in cache_keys.items():
+                    cached_story = await generation_cache.get(cache_key)
+                    if cached_story is not None:
+                        yield format_sse("delta", {"text": cached_story})
+                        response = build_story_response(request, cached_story, cached=True, served_by=candidate)
+                        yield format_sse("done", response.dict())
+                        return
+            
+            for index, candidate in enumerate(candidates):
+                try:
+                    async with provider_admission.slot(candidate):
+                        async with provider_router.track(candidate), observe_llm_call(candidate):
+                            async for text in STORY_STREAMERS[candidate](prompt):
+                                chunks.append(text)
+                                yield format_sse("delta", {"text": text})
+                    break
+                except Exception as e:
+                    # 이미 보낸 조각이 있으면 다른 제공자로 이어 쓸 수 없음
+                    if chunks or index == len(candidates) - 1:
+                        raise
+                    provider_router.failovers += 1
+                    logger.warning(f"스트리밍 제공자 전환: {candidate} → {candidates[index + 1]} ({str(e)})")
+            
+            generated_story = "".join(chunks)
+            await generation_cache.set(cache_keys[candidate], generated_story)
+            response = build_story_response(request, generated_story, served_by=candidate)
+            yield format_sse("done", response.dict())
+        except asyncio.CancelledError:
+            # 클라이언트 연결이 끊기면 스트림이 취소되고 업스트림 요청도 함께 닫힘
+            logger.warning(f"스토리 스트리밍 중단 (클라이언트 연결 종료): {request.currentNode.id}")
+            raise
+        except HTTPException as e:
+            yield format_sse("error", {"status": e.status_code, "detail": e.detail})
+        except Exception as e:
+            yield format_sse("error", {"status": 500, "detail": f"Story generation failed: {str(e)}"})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# 저장된 게임의 컨텍스트 인덱스 캐시
+game_contexts = GameContextCache(max_entries=int(os.getenv("GAME_CONTEXT_CACHE_SIZE", 64)))
+
+# 스토리 구조 분석 결과 캐시 (그래프 구조 해시별)
+story_analyses = AnalysisCache(max_entries=int(os.getenv("STORY_ANALYSIS_CACHE_SIZE", 128)))
+
+GAME_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+def validate_game_id(game_id: str) -> str:
+    if not GAME_ID_PATTERN.fullmatch(game_id):
+        raise HTTPException(status_code=400, detail="잘못된 게임 ID입니다.")
+    return game_id
+
+def validate_game_graph(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+    """
+    저장 전 그래프 구조 검사
+
+    조회 API는 저장된 바이트를 검사 없이 그대로 보내므로 플레이어가 읽을 수 없는 게임은 저장 시점에 거부합니다.
+    존재하지 않는 노드를 가리키는 엣지는 프론트엔드와 마찬가지로 허용합니다.
+    """
+    node_ids = set()
+    for node in nodes:
+        if node["id"] in node_ids:
+            raise HTTPException(status_code=400, detail=f"노드 ID가 중복되었습니다: {node['id']}")
+        node_ids.add(node["id"])
+    for edge in edges:
+        if not isinstance(edge.get("source"), str) or not isinstance(edge.get("target"), str):
+            raise HTTPException(status_code=400, detail="엣지에는 문자열 source와 target이 필요합니다.")
+
+# 게임 ETag를 버전으로 사용해 컨텍스트 로드
+async def load_game_context(game_id: str):
+    validate_game_id(game_id)
+    version = await game_store.aget_etag(game_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+    
+    def loader():
+        game_data = game_store.get(game_id)
+        if game_data is None:
+            raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+        return game_data
+    
+    return await asyncio.to_thread(game_contexts.get, game_id, version, loader)
+
+@app.post("/api/generate-story/from-game", response_model=StoryGenerationResponse)
+async def generate_story_from_game(request: GameStoryGenerationRequest, http_request: Request):
+    """
+    저장된 게임 기반 스토리 생성 API
+    
+    전체 그래프 대신 게임 ID와 노드 ID만 받아 서버에서 부모/자식 노드를 찾습니다.
+    저장 이후 편집된 노드/엣지는 nodeUpdates, addedEdges, removedEdgeIds로 함께 보낼 수 있습니다.
+    """
+    check_client_rate(http_request)
+    try:
+        context = await load_game_context(request.gameId)
+        nodes, graph = context.with_delta(
+            node_updates=[node.dict() for node in request.nodeUpdates or []],
+            added_edges=request.addedEdges,
+            removed_edge_ids=request.removedEdgeIds
         )
         
-        return response
+        if request.nodeId not in nodes:
+            raise HTTPException(status_code=404, detail=f"Node not found: {request.nodeId}")
+        
+        story_request = StoryGenerationRequest(
+            currentNode=NodeData(**nodes[request.nodeId]),
+            parentNodes=[NodeData(**nodes[parent_id]) for parent_id in graph.parents[request.nodeId]],
+            childNodes=[NodeData(**nodes[child_id]) for child_id in graph.children[request.nodeId]],
+            gameConfig=request.gameConfig or GameConfig(**context.game_config),
+            allNodes=[],
+            allEdges=[],
+            provider=request.provider,
+            bypassCache=request.bypassCache
+        )
+        
+        generated_story, cached, coalesced, served_by = await generate_story_text(story_request)
+        return build_story_response(story_request, generated_story, cached, coalesced, served_by)
         
     except HTTPException:
         raise
@@ -301,64 +1004,133 @@ async def generate_story(request: StoryGenerationRequest):
             detail=f"Story generation failed: {str(e)}"
         )
 
+# 배치 생성 동시 실행 한도
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", 4))
+
+@app.post("/api/generate-story/batch")
+async def generate_story_batch(request: BatchStoryGenerationRequest, http_request: Request):
+    """
+    하위 트리 일괄 스토리 생성 API (Server-Sent Events)
+    
+    위상 정렬 순서로 생성하여 각 노드의 프롬프트에 방금 생성된 부모 스토리가 반영되고,
+    서로 독립적인 분기는 세마포어 한도 안에서 동시에 생성됩니다.
+    노드가 완료될 때마다 `node` 이벤트(또는 `error`)를, 마지막에 `done` 이벤트를 보냅니다.
+    """
+    provider = get_provider(request)
+    configured_providers(provider)
+    # 배치는 요청 하나로 한도를 한 번 쓰고, 노드별 호출은 제공자 대기열에서 조절
+    check_client_rate(http_request)
+    
+    nodes = {node.id: node for node in request.allNodes}
+    graph = GraphIndex(nodes.keys(), request.allEdges)
+    
+    if request.rootNodeId is not None:
+        if request.rootNodeId not in nodes:
+            raise HTTPException(status_code=404, detail=f"Node not found: {request.rootNodeId}")
+        target_ids = graph.descendants(request.rootNodeId)
+    elif request.nodeIds:
+        missing = [node_id for node_id in request.nodeIds if node_id not in nodes]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Node not found: {', '.join(missing)}")
+        target_ids = request.nodeIds
+    else:
+        raise HTTPException(status_code=400, detail="rootNodeId or nodeIds is required")
+    
+    order, cyclic = graph.topological_order(target_ids)
+    # 순환에 포함된 노드는 순환 밖의 부모만 기다린 뒤 생성
+    run_order = order + cyclic
+    cyclic_ids = set(cyclic)
+    selected = set(run_order)
+    
+    concurrency = max(1, min(request.maxConcurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    semaphore = asyncio.Semaphore(concurrency)
+    finished = {node_id: asyncio.Event() for node_id in run_order}
+    results: asyncio.Queue = asyncio.Queue()
+    
+    async def generate_node(node_id: str):
+        try:
+            for parent_id in graph.parents[node_id]:
+                if parent_id in selected and parent_id not in cyclic_ids:
+                    await finished[parent_id].wait()
+            
+            async with semaphore:
+                node_request = StoryGenerationRequest(
+                    currentNode=nodes[node_id],
+                    parentNodes=[nodes[parent_id] for parent_id in graph.parents[node_id]],
+                    childNodes=[nodes[child_id] for child_id in graph.children[node_id]],
+                    gameConfig=request.gameConfig,
+                    allNodes=[],
+                    allEdges=[],
+                    provider=request.provider,
+                    bypassCache=request.bypassCache
+                )
+                generated_story, cached, coalesced, served_by = await generate_story_text(node_request)
+            
+            # 자식 노드 프롬프트에 새 스토리가 반영되도록 그래프 상태 갱신
+            nodes[node_id] = nodes[node_id].copy(update={"story": generated_story.strip()})
+            response = build_story_response(node_request, generated_story, cached, coalesced, served_by)
+            await results.put(("node", response.dict()))
+        except HTTPException as e:
+            await results.put(("error", {"nodeId": node_id, "status": e.status_code, "detail": e.detail}))
+        except Exception as e:
+            await results.put(("error", {"nodeId": node_id, "status": 500, "detail": f"Story generation failed: {str(e)}"}))
+        finally:
+            finished[node_id].set()
+    
+    async def event_stream():
+        tasks = [asyncio.create_task(generate_node(node_id)) for node_id in run_order]
+        completed = failed = 0
+        try:
+            for _ in run_order:
+                event, data = await results.get()
+                if event == "node":
+                    completed += 1
+                else:
+                    failed += 1
+                yield format_sse(event, data)
+            
+            yield format_sse("done", {
+                "requested": len(run_order),
+                "completed": completed,
+                "failed": failed,
+                "order": run_order,
+                "cyclicNodes": cyclic,
+                "concurrency": concurrency
+            })
+        finally:
+            # 클라이언트 연결이 끊기면 남은 생성 작업 취소
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/analyze-story")
 async def analyze_story_structure(request: Dict[str, Any]):
     """
     스토리 구조 분석 API
     
     전체 노드 구조를 분석하여 스토리의 일관성과 흐름을 체크합니다.
+    nodes/edges 대신 gameId를 보내면 저장된 게임을 분석합니다.
+    같은 구조의 그래프는 캐시된 결과를 그대로 반환합니다.
     """
     try:
-        nodes = request.get("nodes", [])
-        edges = request.get("edges", [])
-        
-        # 기본 분석
-        analysis = {
-            "nodeCount": len(nodes),
-            "edgeCount": len(edges),
-            "rootNodes": [],
-            "leafNodes": [],
-            "orphanNodes": [],
-            "maxDepth": 0,
-            "branchingFactor": 0
-        }
-        
-        # 루트 노드 찾기 (부모가 없는 노드)
-        node_ids = {node["id"] for node in nodes}
-        target_ids = {edge["target"] for edge in edges}
-        source_ids = {edge["source"] for edge in edges}
-        
-        analysis["rootNodes"] = [
-            node["id"] for node in nodes 
-            if node["id"] not in target_ids
-        ]
-        
-        # 리프 노드 찾기 (자식이 없는 노드)
-        analysis["leafNodes"] = [
-            node["id"] for node in nodes 
-            if node["id"] not in source_ids
-        ]
-        
-        # 고아 노드 찾기 (연결이 없는 노드)
-        connected_nodes = target_ids | source_ids
-        analysis["orphanNodes"] = [
-            node["id"] for node in nodes 
-            if node["id"] not in connected_nodes
-        ]
-        
-        # 평균 분기 계수 계산
-        if source_ids:
-            branch_counts = {}
-            for edge in edges:
-                source = edge["source"]
-                branch_counts[source] = branch_counts.get(source, 0) + 1
-            
-            analysis["branchingFactor"] = round(
-                sum(branch_counts.values()) / len(branch_counts), 2
-            )
+        game_id = request.get("gameId")
+        if game_id:
+            context = await load_game_context(game_id)
+            node_ids, edges = list(context.nodes), context.edges
+        else:
+            node_ids = [node["id"] for node in request.get("nodes", [])]
+            edges = request.get("edges", [])
         
-        return analysis
+        content = await asyncio.to_thread(analyze_story, node_ids, edges, story_analyses)
+        return Response(content=content, media_type="application/json")
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -369,80 +1141,107 @@ async def analyze_story_structure(request: Dict[str, Any]):
 @app.post("/api/upload-image")
 async def upload_image(file: UploadFile = File(...)):
     try:
-        print(f"이미지 업로드 시작: {file.filename}, 타입: {file.content_type}")
+        logger.info(f"이미지 업로드 시작: {file.filename}, 타입: {file.content_type}")
         
         # 파일 타입 검증
         if not file.content_type or not file.content_type.startswith('image/'):
-            print(f"잘못된 파일 타입: {file.content_type}")
+            logger.warning(f"잘못된 파일 타입: {file.content_type}")
             raise HTTPException(status_code=400, detail="이미지 파일만 업로드 가능합니다.")
         
-        # 파일 크기 제한 (5MB)
-        max_size = 5 * 1024 * 1024  # 5MB
-        content = await file.read()
-        print(f"파일 크기: {len(content)} bytes")
-        
-        if len(content) > max_size:
-            print(f"파일 크기 초과: {len(content)} > {max_size}")
-            raise HTTPException(status_code=400, detail="파일 크기는 5MB 이하여야 합니다.")
+        file_extension = image_extension(file.filename, file.content_type)
         
-        # 고유한 파일명 생성
-        if not file.filename or '.' not in file.filename:
-            file_extension = 'jpg'  # 기본 확장자
-        else:
-            file_extension = file.filename.split('.')[-1].lower()
-        
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = UPLOAD_DIR / unique_filename
-        
-        print(f"파일 저장 경로: {file_path}")
-        
-        # 파일 저장
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
+        # 청크 단위로 임시 파일에 쓰면서 크기 제한 확인과 해시 계산을 함께 하고,
+        # 같은 이미지가 없으면 해시 이름으로 원자적으로 이동 (이벤트 루프 밖에서 실행)
+        try:
+            filename, created, size = await asyncio.to_thread(
+                image_store.put_file, file.file, file_extension, MAX_UPLOAD_BYTES
+            )
+        except ImageTooLarge:
+            logger.warning(f"파일 크기 초과: > {MAX_UPLOAD_BYTES}")
+            raise upload_too_large(MAX_UPLOAD_BYTES)
         
         # 파일 URL 반환
-        file_url = f"/uploads/{unique_filename}"
-        print(f"파일 업로드 성공: {file_url}")
+        file_url = image_store.url_for(filename)
+        logger.info(f"파일 업로드 성공: {file_url} ({size} bytes{'' if created else ', 기존 이미지 재사용'})")
         
-        return {"imageUrl": file_url, "filename": unique_filename}
+        return {"imageUrl": file_url, "filename": filename}
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"이미지 업로드 오류: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"이미지 업로드 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"이미지 업로드 중 오류가 발생했습니다: {str(e)}")
 
+# 이어 올리기(청크) 업로드 API
+@app.post("/api/uploads", status_code=201)
+async def create_upload(request: UploadSessionRequest):
+    """업로드 세션 생성 후 PUT /api/uploads/{uploadId}로 청크를 순서대로 전송"""
+    upload = await asyncio.to_thread(resumable_uploads.create, request.filename, request.contentType, request.size)
+    upload["chunkSize"] = UPLOAD_CHUNK_SIZE
+    return upload
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload_status(upload_id: str):
+    """현재까지 받은 오프셋 조회 (연결이 끊긴 뒤 이어 올릴 위치 확인)"""
+    return await asyncio.to_thread(resumable_uploads.status, upload_id)
+
+@app.put("/api/uploads/{upload_id}")
+async def append_upload(upload_id: str, request: Request):
+    """Upload-Offset 헤더 위치부터 요청 본문을 이어 쓰기"""
+    offset_header = request.headers.get("upload-offset", "0")
+    if not offset_header.isdigit():
+        raise HTTPException(status_code=400, detail="Upload-Offset 헤더가 올바르지 않습니다.")
+    return await resumable_uploads.append(upload_id, int(offset_header), request.stream())
+
+@app.post("/api/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str):
+    """모든 청크를 받은 뒤 해시 이름으로 이미지 저장소에 등록"""
+    result = await resumable_uploads.complete(upload_id)
+    logger.info(f"이어 올리기 업로드 완료: {result['imageUrl']}")
+    return result
+
+@app.delete("/api/uploads/{upload_id}")
+async def abort_upload(upload_id: str):
+    await asyncio.to_thread(resumable_uploads.abort, upload_id)
+    return {"message": "업로드가 취소되었습니다."}
+
 # 이미지 삭제 엔드포인트
 @app.delete("/api/delete-image/{filename}")
 async def delete_image(filename: str):
     try:
-        print(f"이미지 삭제 요청: {filename}")
-        file_path = UPLOAD_DIR / filename
+        logger.info(f"이미지 삭제 요청: {filename}")
         
-        if file_path.exists():
-            file_path.unlink()
-            print(f"이미지 삭제 성공: {filename}")
+        if not is_content_addressed(filename):
+            # 해시 이름이 아닌 이전 업로드는 한 게임만 쓰므로 바로 삭제
+            deleted = await asyncio.to_thread(image_store.delete, filename)
+        else:
+            # 참조 색인만 확인 (저장소를 훑지 않음), 저장과 순서를 맞추도록 쓰기 스레드에서 확인 후 삭제
+            await asyncio.to_thread(image_references.ensure_built)
+            deleted = await game_store.awrite(image_references.delete_unreferenced, filename, image_store.delete)
+        if deleted:
+            logger.info(f"이미지 삭제 성공: {filename}")
             return {"message": "이미지가 삭제되었습니다."}
         else:
-            print(f"파일을 찾을 수 없음: {filename}")
+            logger.warning(f"파일을 찾을 수 없음: {filename}")
             raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다.")
             
+    except ImageInUse:
+        # 같은 내용의 이미지를 쓰는 다른 게임(또는 이전 버전)이 있으면 지우지 않음
+        logger.warning(f"사용 중인 이미지 삭제 거부: {filename}")
+        raise HTTPException(status_code=409, detail="다른 게임이나 버전에서 사용 중인 이미지는 삭제할 수 없습니다.")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"이미지 삭제 오류: {str(e)}")
+        logger.error(f"이미지 삭제 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"이미지 삭제 중 오류가 발생했습니다: {str(e)}")
 
 # 게임 저장 API
-@app.post("/api/games", response_model=Dict[str, str])
+@app.post("/api/games", response_model=Dict[str, Any])
 async def save_game(game_data: GameData):
-    """게임 데이터를 JSON 파일로 저장하고 공유 가능한 ID를 반환"""
+    """게임 데이터를 게임 저장소에 저장하고 공유 가능한 ID를 반환"""
     try:
         # 8자리 게임 ID 생성
         game_id = str(uuid.uuid4())[:8]
-        game_file = GAMES_DIR / f"{game_id}.json"
         
         # 게임 데이터 준비
         game_dict = {
@@ -456,117 +1255,453 @@ async def save_game(game_data: GameData):
             "updatedAt": datetime.now().isoformat()
         }
         
-        # JSON 파일로 저장
-        with open(game_file, 'w', encoding='utf-8') as f:
-            json.dump(game_dict, f, ensure_ascii=False, indent=2)
+        # 인라인 base64 이미지는 uploads/로 옮기고 참조 URL만 저장
+        image_stats = await asyncio.to_thread(image_store.externalize_nodes, game_dict["nodes"])
+        if image_stats["extracted"]:
+            logger.info(f"인라인 이미지 추출: {image_stats['extracted']}개 (신규 {image_stats['written']}개)")
         
-        print(f"게임 저장 성공: {game_id}")
-        return {"gameId": game_id, "shareUrl": f"/game/{game_id}"}
+        # 버전 1로 저장 (이미 저장된 노드 객체는 다시 쓰지 않음, 검증은 validate_game_graph)
+        result = await game_versions.acreate(game_dict)
         
+        logger.info(f"게임 저장 성공: {game_id} (노드 객체 {result['nodesWritten']}개, {result['bytesWritten']} bytes)")
+        return {
+            "gameId": game_id,
+            "shareUrl": f"/game/{game_id}",
+            "version": result["version"],
+            "bundleUrl": await current_bundle_url(game_id),
+        }
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        # JSON으로 표현할 수 없는 값 (NaN 등)
+        logger.warning(f"게임 저장 거부: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"저장할 수 없는 게임 데이터입니다: {str(e)}")
     except Exception as e:
-        print(f"게임 저장 오류: {str(e)}")
+        logger.error(f"게임 저장 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"게임 저장 중 오류가 발생했습니다: {str(e)}")
 
 # 게임 조회 API
 @app.get("/api/games/{game_id}")
-async def get_game(game_id: str):
-    """게임 ID로 게임 데이터 조회"""
+async def get_game(game_id: str, request: Request):
+    """
+    게임 ID로 게임 데이터 조회
+
+    저장 시점에 압축해 둔 사본 중 클라이언트가 받을 수 있는 것을 Content-Encoding과 함께 그대로 보내고,
+    압축을 받지 않는 클라이언트에만 압축을 풀어 보냅니다. If-None-Match가 일치하면 본문을 읽지 않고 304.
+    본문은 파싱하거나 다시 직렬화하지 않습니다 (검증은 저장 시점에 수행).
+    """
     try:
-        game_file = GAMES_DIR / f"{game_id}.json"
+        validate_game_id(game_id)
         
-        if not game_file.exists():
-            print(f"게임을 찾을 수 없음: {game_id}")
-            raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+        etag = await game_store.aget_etag(game_id)
+        if etag is not None:
+            if_none_match = request.headers.get("if-none-match")
+            for encoding in ["identity", *AVAILABLE_ENCODINGS]:
+                current = representation_etag(etag, encoding)
+                if etag_matches(if_none_match, current):
+                    return Response(status_code=304, headers={
+                        "ETag": current,
+                        "Cache-Control": REVALIDATE_CACHE_CONTROL,
+                        "Vary": "Accept-Encoding"
+                    })
         
-        with open(game_file, 'r', encoding='utf-8') as f:
-            game_data = json.load(f)
+        encodings = acceptable_encodings(request.headers.get("accept-encoding"), AVAILABLE_ENCODINGS)
+        opened = encoded = None
+        if etag is not None:
+            # 파일 저장소면 연 파일을 그대로 스트리밍 (본문을 메모리에 올리거나 파싱하지 않음)
+            opened = await game_store.aopen_encoded(game_id, encodings)
+            if opened is None:
+                encoded = await game_store.aget_encoded(game_id, encodings)
+        if opened is None and encoded is None:
+            logger.warning(f"게임을 찾을 수 없음: {game_id}")
+            raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
         
-        print(f"게임 조회 성공: {game_id}")
-        return game_data
+        # 응답 ETag는 본문과 같은 시점에 읽은 값 (위의 304 확인 이후 다시 저장되었을 수 있음)
+        encoding, etag = (opened[1], opened[3]) if opened is not None else (encoded[1], encoded[2])
+        headers = {
+            "ETag": representation_etag(etag, encoding),
+            "Cache-Control": REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        if opened is not None:
+            file, _, size, _ = opened
+            logger.info(f"게임 조회 성공: {game_id} ({encoding}, {size} bytes, file)")
+            return OpenFileResponse(file, size, headers=headers, media_type="application/json")
+        content = encoded[0]
+        logger.info(f"게임 조회 성공: {game_id} ({encoding}, {len(content)} bytes)")
+        return Response(content=content, media_type="application/json", headers=headers)
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"게임 조회 오류: {str(e)}")
+        logger.error(f"게임 조회 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"게임 조회 중 오류가 발생했습니다: {str(e)}")
 
+def bundle_url(game_id: str, digest: str) -> str:
+    return f"/api/games/{game_id}/bundle?v={digest}"
+
+async def current_bundle_url(game_id: str) -> Optional[str]:
+    """이미 컴파일된 현재 번들의 영구 캐시 URL (저장은 컴파일을 기다리지 않으므로 아직 컴파일 전이면 None)"""
+    info = await asyncio.to_thread(game_bundles.current, game_id)
+    return bundle_url(game_id, info["hash"]) if info is not None else None
+
+# 플레이용 번들 API
+@app.get("/api/games/{game_id}/bundle")
+async def get_game_bundle(game_id: str, request: Request, v: Optional[str] = None):
+    """
+    저장 시점에 컴파일한 플레이용 번들 (정수 인덱스 노드, 노드별 자식 목록, 시작 노드, 이미지 URL 목록)
+
+    v(번들 해시)를 붙인 URL은 내용이 바뀌지 않으므로 immutable로 캐시하고, v가 현재 번들과 다르면 현재 URL로 보냅니다.
+    v 없이 요청하면 매번 재검증합니다 (변경이 없으면 304).
+    """
+    validate_game_id(game_id)
+    try:
+        info = await game_bundles.aensure(game_id)
+    except Exception as e:
+        logger.error(f"번들 컴파일 오류: {game_id}, {str(e)}")
+        raise HTTPException(status_code=500, detail=f"번들을 만드는 중 오류가 발생했습니다: {str(e)}")
+    if info is None:
+        raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+    
+    current_url = bundle_url(game_id, info["hash"])
+    if v is not None and v != info["hash"]:
+        return RedirectResponse(current_url, status_code=307, headers={"Cache-Control": "no-store"})
+    
+    etag = f'"{info["hash"]}"'
+    cache_control = IMMUTABLE_CACHE_CONTROL if v is not None else REVALIDATE_CACHE_CONTROL
+    if_none_match = request.headers.get("if-none-match")
+    for encoding in ["identity", *AVAILABLE_ENCODINGS]:
+        current = representation_etag(etag, encoding)
+        if etag_matches(if_none_match, current):
+            return Response(status_code=304, headers={
+                "ETag": current,
+                "Cache-Control": cache_control,
+                "Vary": "Accept-Encoding"
+            })
+    
+    encodings = acceptable_encodings(request.headers.get("accept-encoding"), AVAILABLE_ENCODINGS)
+    encoded = await game_bundles.aget_encoded(info["hash"], encodings)
+    if encoded is None:
+        raise HTTPException(status_code=404, detail="번들을 찾을 수 없습니다.")
+    content, encoding = encoded
+    headers = {
+        "ETag": representation_etag(etag, encoding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+        "Content-Location": current_url
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=content, media_type="application/json", headers=headers)
+
+# 플레이 구간 API
+# 게임별 인접 인덱스 캐시 (캐시한 전체 노드 수로 제한)
+play_indexes = PlayIndexCache(max_nodes=int(os.getenv("PLAY_INDEX_CACHE_MAX_NODES", "200000")))
+PLAY_WINDOW_MAX_DEPTH = int(os.getenv("PLAY_WINDOW_MAX_DEPTH", "3"))
+PLAY_WINDOW_MAX_NODES = int(os.getenv("PLAY_WINDOW_MAX_NODES", "200"))
+PLAY_PRELOAD_LINKS = int(os.getenv("PLAY_PRELOAD_LINKS", "8"))
+
+@app.get("/api/games/{game_id}/play")
+async def get_play_window(game_id: str, request: Request, node: Optional[str] = None, depth: int = 1):
+    """
+    노드 하나와 그 선택지(depth단계 아래까지)만 조회
+
+    node를 생략하면 시작 노드부터 보냅니다. 각 노드의 choices는 자식 노드 ID 목록이고,
+    창 안 노드의 이미지는 Link: rel=preload 헤더로 미리 알려 브라우저가 JSON을 파싱하기 전에 받기 시작하게 합니다.
+    """
+    validate_game_id(game_id)
+    if not 0 <= depth <= PLAY_WINDOW_MAX_DEPTH:
+        raise HTTPException(status_code=400, detail=f"depth는 0~{PLAY_WINDOW_MAX_DEPTH} 사이여야 합니다.")
+    try:
+        info = await game_bundles.aensure(game_id)
+        if info is None:
+            raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+        
+        def load_index():
+            def loader():
+                bundle = game_bundles.get_bundle(info["hash"])
+                if bundle is None:
+                    raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+                return bundle
+            return play_indexes.get(game_id, info["hash"], loader)
+        
+        # 캐시에 있으면 스레드로 넘기지 않고 바로 사용
+        index = play_indexes.peek(game_id, info["hash"]) or await asyncio.to_thread(load_index)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"플레이 인덱스 로드 오류: {game_id}, {str(e)}")
+        raise HTTPException(status_code=500, detail=f"게임을 불러오는 중 오류가 발생했습니다: {str(e)}")
+    
+    start = index.root if node is None else index.index.get(node)
+    if start is None:
+        if node is not None:
+            raise HTTPException(status_code=404, detail="노드를 찾을 수 없습니다.")
+        nodes, truncated = [], False
+    else:
+        nodes, truncated = index.window(start, depth, PLAY_WINDOW_MAX_NODES)
+    
+    etag = f'"{info["hash"][:32]}-{start}-{depth}"'
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    images = list(dict.fromkeys(entry["imageUrl"] for entry in nodes if entry.get("imageUrl", "").startswith("/")))
+    if images:
+        headers["Link"] = ", ".join(f"<{url}>; rel=preload; as=image" for url in images[:PLAY_PRELOAD_LINKS])
+    content = {
+        "gameId": game_id,
+        "bundleVersion": info["hash"],
+        "nodeCount": len(index),
+        "root": index.nodes[index.root]["id"] if index.root is not None else None,
+        "node": nodes[0]["id"] if nodes else None,
+        "depth": depth,
+        "game": index.game,
+        "nodes": nodes,
+        "truncated": truncated,
+    }
+    return Response(
+        content=json.dumps(content, ensure_ascii=False, separators=(",", ":")),
+        media_type="application/json",
+        headers=headers,
+    )
+
+# 게임 수정 API (새 버전 저장)
+@app.patch("/api/games/{game_id}")
+async def patch_game(game_id: str, patch: GamePatchRequest):
+    """
+    노드/엣지 변경분만 받아 새 버전 저장
+
+    바뀐 노드만 내용 해시로 저장하고 버전에는 변경 목록만 기록하므로,
+    큰 게임에서 한 노드를 고쳐도 버전 데이터는 고친 만큼만 씁니다.
+    """
+    validate_game_id(game_id)
+    node_updates = patch.nodeUpdates or []
+    if any(not isinstance(update.get("id"), str) for update in node_updates):
+        raise HTTPException(status_code=400, detail="nodeUpdates의 각 항목에는 문자열 id가 필요합니다.")
+    
+    fields = {"title": patch.title, "description": patch.description}
+    fields = {field: value for field, value in fields.items() if value is not None}
+    if patch.gameConfig is not None:
+        fields["gameConfig"] = patch.gameConfig.dict()
+    
+    try:
+        # 인라인 base64 이미지는 uploads/로 옮기고 참조 URL만 저장
+        await asyncio.to_thread(image_store.externalize_nodes, node_updates)
+        result = await game_versions.apatch(
+            game_id,
+            fields=fields,
+            node_updates=node_updates,
+            removed_node_ids=patch.removedNodeIds or [],
+            added_edges=patch.addedEdges or [],
+            removed_edge_ids=patch.removedEdgeIds or [],
+            base_version=patch.baseVersion,
+        )
+    except HTTPException:
+        raise
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=f"게임이 다른 곳에서 수정되었습니다. 현재 버전: {e.current_version}")
+    except ValueError as e:
+        logger.warning(f"게임 수정 거부: {game_id}, {str(e)}")
+        raise HTTPException(status_code=400, detail=f"수정할 수 없는 게임 데이터입니다: {str(e)}")
+    except Exception as e:
+        logger.error(f"게임 수정 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"게임 수정 중 오류가 발생했습니다: {str(e)}")
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+    logger.info(
+        f"게임 수정 성공: {game_id} v{result['version']} "
+        f"(노드 객체 {result['nodesWritten']}개, {result['bytesWritten']} bytes)"
+    )
+    return {**result, "bundleUrl": await current_bundle_url(game_id)}
+
+# 게임 버전 목록 API
+@app.get("/api/games/{game_id}/versions")
+async def list_game_versions(game_id: str):
+    validate_game_id(game_id)
+    versions = await game_versions.alist_versions(game_id)
+    if not versions and not await asyncio.to_thread(game_store.exists, game_id):
+        raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+    # 버전 기록 이전에 저장된 게임은 첫 수정 시 버전 1로 등록됨
+    return {"gameId": game_id, "versions": versions}
+
+# 특정 버전 조회 API
+@app.get("/api/games/{game_id}/versions/{version}")
+async def get_game_version(game_id: str, version: int):
+    validate_game_id(game_id)
+    game_dict = await game_versions.aget_version(game_id, version)
+    if game_dict is None:
+        raise HTTPException(status_code=404, detail="해당 버전을 찾을 수 없습니다.")
+    return game_dict
+
+# 게임 포크 API
+@app.post("/api/games/{game_id}/fork")
+async def fork_game(game_id: str, version: Optional[int] = None):
+    """게임(특정 버전)을 새 ID로 복제 (노드 객체는 원본과 공유)"""
+    validate_game_id(game_id)
+    new_game_id = str(uuid.uuid4())[:8]
+    try:
+        result = await game_versions.afork(game_id, new_game_id, version)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"게임 포크 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"게임 포크 중 오류가 발생했습니다: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="게임 또는 버전을 찾을 수 없습니다.")
+    
+    logger.info(f"게임 포크 성공: {game_id} → {new_game_id} ({result['bytesWritten']} bytes)")
+    return {
+        "gameId": new_game_id,
+        "shareUrl": f"/game/{new_game_id}",
+        "bundleUrl": await current_bundle_url(new_game_id),
+        "version": result["version"],
+        "forkedFrom": result["forkedFrom"],
+        "bytesWritten": result["bytesWritten"],
+    }
+
+# 플레이 시뮬레이션 API
+SIMULATION_MAX_RUNS = int(os.getenv("SIMULATION_MAX_RUNS", "200000"))
+SIMULATION_MAX_STEPS = int(os.getenv("SIMULATION_MAX_STEPS", "5000"))
+SIMULATION_PROCESSES = int(os.getenv("SIMULATION_PROCESSES", "0"))
+
+@app.post("/api/games/{game_id}/simulate")
+async def simulate_game(game_id: str, request: SimulationRequest):
+    """
+    저장된 게임을 여러 번 무작위로 플레이해 엔딩/게임 오버 확률과 단계별 스탯 분포 계산
+
+    모든 플레이를 NumPy 배열로 함께 진행하며, SIMULATION_PROCESSES가 2 이상이면 프로세스 풀로 나눠 실행합니다.
+    """
+    validate_game_id(game_id)
+    if playthrough_sim.np is None:
+        raise HTTPException(status_code=503, detail="시뮬레이션에는 numpy 패키지가 필요합니다.")
+    if not 1 <= request.runs <= SIMULATION_MAX_RUNS:
+        raise HTTPException(status_code=400, detail=f"runs는 1~{SIMULATION_MAX_RUNS} 사이여야 합니다.")
+    if not 1 <= request.maxSteps <= SIMULATION_MAX_STEPS:
+        raise HTTPException(status_code=400, detail=f"maxSteps는 1~{SIMULATION_MAX_STEPS} 사이여야 합니다.")
+    if not 0 <= request.trajectorySteps <= request.maxSteps:
+        raise HTTPException(status_code=400, detail="trajectorySteps는 0~maxSteps 사이여야 합니다.")
+    
+    game_dict = await game_store.aget(game_id)
+    if game_dict is None:
+        raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+    
+    def run():
+        model = playthrough_sim.PlayModel(game_dict, request.weights)
+        return playthrough_sim.simulate(
+            model,
+            request.runs,
+            seed=request.seed,
+            max_steps=request.maxSteps,
+            trajectory_steps=request.trajectorySteps,
+            processes=SIMULATION_PROCESSES,
+        )
+    
+    try:
+        result = await asyncio.to_thread(run)
+    except Exception as e:
+        logger.error(f"시뮬레이션 오류: {game_id}, {str(e)}")
+        raise HTTPException(status_code=500, detail=f"시뮬레이션 중 오류가 발생했습니다: {str(e)}")
+    
+    logger.info(f"시뮬레이션 완료: {game_id} {request.runs}회 ({result['seconds']}초)")
+    return {"gameId": game_id, **result}
+
+# 도달 가능한 스탯 범위 API
+# 게임 버전(ETag)별 결과 캐시
+stat_range_analyses = AnalysisCache(max_entries=int(os.getenv("STAT_RANGE_CACHE_SIZE", 64)))
+stat_range_flights = SingleFlight()
+STAT_RANGE_STATE_LIMIT = int(os.getenv("STAT_RANGE_STATE_LIMIT", str(JOINT_STATE_LIMIT)))
+
+@app.get("/api/games/{game_id}/stat-ranges")
+async def get_stat_ranges(game_id: str):
+    """
+    각 노드에 도착했을 때 가능한 스탯 범위와 실제로 도달 가능한 엔딩
+
+    표본을 뽑는 시뮬레이션과 달리 모든 선택을 따져 계산하며, 게임 버전이 같으면 캐시된 결과를 반환합니다.
+    """
+    validate_game_id(game_id)
+    version = await game_store.aget_etag(game_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+    key = (game_id, version)
+    content = stat_range_analyses.get(key)
+    if content is None:
+        async def compute():
+            game_dict = await game_store.aget(game_id)
+            if game_dict is None:
+                raise HTTPException(status_code=404, detail="게임을 찾을 수 없습니다.")
+            result = await asyncio.to_thread(stat_ranges_json, game_dict, STAT_RANGE_STATE_LIMIT)
+            stat_range_analyses.put(key, result)
+            return result
+        
+        try:
+            content, _ = await stat_range_flights.do(f"{game_id}:{version}", compute)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"스탯 범위 분석 오류: {game_id}, {str(e)}")
+            raise HTTPException(status_code=500, detail=f"스탯 범위 분석 중 오류가 발생했습니다: {str(e)}")
+    return Response(content=content, media_type="application/json")
+
 # 게임 목록 조회 API (옵션)
+GAMES_PAGE_DEFAULT_LIMIT = int(os.getenv("GAMES_PAGE_DEFAULT_LIMIT", "50"))
+GAMES_PAGE_MAX_LIMIT = int(os.getenv("GAMES_PAGE_MAX_LIMIT", "200"))
+
 @app.get("/api/games")
-async def list_games():
-    """저장된 게임 목록 조회"""
+async def list_games(limit: int = GAMES_PAGE_DEFAULT_LIMIT, cursor: Optional[str] = None):
+    """저장된 게임 목록 조회 (생성일시 내림차순, 커서 기반 페이지네이션)"""
+    if limit < 1 or limit > GAMES_PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit은 1~{GAMES_PAGE_MAX_LIMIT} 사이여야 합니다.")
+
     try:
-        games = []
-        for game_file in GAMES_DIR.glob("*.json"):
-            try:
-                with open(game_file, 'r', encoding='utf-8') as f:
-                    game_data = json.load(f)
-                
-                # 요약 정보만 포함
-                games.append({
-                    "id": game_data.get("id"),
-                    "title": game_data.get("title"),
-                    "description": game_data.get("description"),
-                    "createdAt": game_data.get("createdAt"),
-                    "nodeCount": len(game_data.get("nodes", [])),
-                    "edgeCount": len(game_data.get("edges", []))
-                })
-            except Exception as e:
-                print(f"게임 파일 읽기 오류: {game_file.name}, {str(e)}")
-                continue
-        
-        # 생성일시 기준 내림차순 정렬
-        games.sort(key=lambda x: x.get("createdAt", ""), reverse=True)
-        
-        return {"games": games, "count": len(games)}
-        
+        summaries, next_cursor = await game_store.alist_page(limit, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다.")
     except Exception as e:
-        print(f"게임 목록 조회 오류: {str(e)}")
+        logger.error(f"게임 목록 조회 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"게임 목록 조회 중 오류가 발생했습니다: {str(e)}")
 
+    # 요약 인덱스의 정보만 포함 (게임 본문은 읽지 않음)
+    games = [
+        {
+            "id": summary["id"],
+            "title": summary["title"],
+            "description": summary["description"],
+            "createdAt": summary["createdAt"],
+            "nodeCount": summary["nodeCount"],
+            "edgeCount": summary["edgeCount"]
+        }
+        for summary in summaries
+    ]
+
+    return {"games": games, "count": len(games), "nextCursor": next_cursor}
+
 # 스토리지 모니터링 API
 @app.get("/api/storage/health")
 async def storage_health_check():
     """스토리지 사용량 및 상태 모니터링"""
     try:
-        import shutil
-        
-        # 게임 파일 통계
-        game_files = list(GAMES_DIR.glob("*.json"))
-        total_games = len(game_files)
-        
-        # 각 게임 파일 크기 계산
-        total_size_bytes = 0
-        largest_file_size = 0
-        smallest_file_size = float('inf')
-        
-        for game_file in game_files:
-            try:
-                size = game_file.stat().st_size
-                total_size_bytes += size
-                largest_file_size = max(largest_file_size, size)
-                smallest_file_size = min(smallest_file_size, size)
-            except:
-                continue
+        # 게임/이미지 통계 (저장·삭제 시 갱신되는 메모리 카운터)
+        snapshot = storage_stats.snapshot()
+        total_games = snapshot["games"]["count"]
+        total_size_bytes = snapshot["games"]["totalBytes"]
+        largest_file_size = snapshot["games"]["largestBytes"]
+        smallest_file_size = snapshot["games"]["smallestBytes"]
         
         # 평균 파일 크기
         avg_file_size = total_size_bytes / total_games if total_games > 0 else 0
         
-        # 사람이 읽기 쉬운 크기 변환 함수
-        def format_bytes(bytes_value):
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if bytes_value < 1024.0:
-                    return f"{bytes_value:.2f} {unit}"
-                bytes_value /= 1024.0
-            return f"{bytes_value:.2f} TB"
-        
         # 이미지 파일 통계
-        image_files = list(UPLOAD_DIR.glob("*"))
-        total_images = len([f for f in image_files if f.is_file()])
-        total_image_size_bytes = sum(f.stat().st_size for f in image_files if f.is_file())
+        total_images = snapshot["images"]["count"]
+        total_image_size_bytes = snapshot["images"]["totalBytes"]
         
         # 디스크 사용량 (가능한 경우)
         try:
-            disk_usage = shutil.disk_usage(GAMES_DIR.parent)
+            disk_usage = await asyncio.to_thread(shutil.disk_usage, GAMES_DIR.parent)
             total_disk = disk_usage.total
             used_disk = disk_usage.used
             free_disk = disk_usage.free
@@ -575,27 +1710,9 @@ async def storage_health_check():
             total_disk = used_disk = free_disk = disk_usage_percent = None
         
         # 게임 생성 시간별 통계
-        from datetime import datetime, timedelta
-        
-        now = datetime.now()
-        games_24h = games_7d = games_30d = 0
-        
-        for game_file in game_files:
-            try:
-                with open(game_file, 'r', encoding='utf-8') as f:
-                    game_data = json.load(f)
-                created_at_str = game_data.get('createdAt', '')
-                if created_at_str:
-                    created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                    
-                    if now - created_at <= timedelta(hours=24):
-                        games_24h += 1
-                    if now - created_at <= timedelta(days=7):
-                        games_7d += 1
-                    if now - created_at <= timedelta(days=30):
-                        games_30d += 1
-            except:
-                continue
+        games_24h = snapshot["games"]["last24h"]
+        games_7d = snapshot["games"]["last7d"]
+        games_30d = snapshot["games"]["last30d"]
         
         # 응답 데이터 구성
         storage_info = {
@@ -607,12 +1724,13 @@ async def storage_health_check():
                 "total_size_bytes": total_size_bytes,
                 "average_size": format_bytes(avg_file_size),
                 "largest_size": format_bytes(largest_file_size) if total_games > 0 else "0 B",
-                "smallest_size": format_bytes(smallest_file_size) if total_games > 0 and smallest_file_size != float('inf') else "0 B",
+                "smallest_size": format_bytes(smallest_file_size) if total_games > 0 else "0 B",
                 "recent_activity": {
                     "last_24h": games_24h,
                     "last_7d": games_7d,
                     "last_30d": games_30d
-                }
+                },
+                "daily_created": storage_stats.daily_histogram(days=30)
             },
             "images": {
                 "total_count": total_images,
@@ -622,7 +1740,12 @@ async def storage_health_check():
             "storage_paths": {
                 "games_directory": str(GAMES_DIR),
                 "images_directory": str(UPLOAD_DIR)
-            }
+            },
+            "game_store": game_store.describe(),
+            "bundles": game_bundles.describe(),
+            "stats": storage_stats.describe(),
+            "sweeper": storage_sweeper.stats(),
+            "imageReferences": image_references.stats()
         }
         
         # 디스크 정보 추가
@@ -642,8 +1765,8 @@ async def storage_health_check():
                 storage_info["status"] = "caution"
                 storage_info["warnings"] = ["⚠️ 디스크 사용량이 80%를 초과했습니다."]
         
-        # 게임 파일 수 경고
-        if total_games > 1000:
+        # 게임 파일 수 경고 (파일 저장소에서만 의미 있음)
+        if game_store.backend == "file" and total_games > 1000:
             if "warnings" not in storage_info:
                 storage_info["warnings"] = []
             storage_info["warnings"].append(f"📁 게임 파일 수가 {total_games}개로 많습니다. 정리를 고려해보세요.")
@@ -651,7 +1774,7 @@ async def storage_health_check():
         return storage_info
         
     except Exception as e:
-        print(f"스토리지 헬스체크 오류: {str(e)}")
+        logger.error(f"스토리지 헬스체크 오류: {str(e)}")
         return {
             "status": "error",
             "timestamp": datetime.now().isoformat(),
@@ -660,75 +1783,77 @@ async def storage_health_check():
             "images": {"total_count": 0, "total_size": "0 B"}
         }
 
+# 스토리지 통계 시계열 API
+@app.get("/api/storage/history")
+async def storage_history(limit: int = 288):
+    """주기적으로 기록한 스토리지 통계 스냅샷 (오래된 것부터)"""
+    history = list(storage_stats.history)[-limit:] if limit > 0 else []
+    return {
+        "interval_seconds": STORAGE_STATS_SNAPSHOT_INTERVAL,
+        "count": len(history),
+        "snapshots": history
+    }
+
 # 스토리지 정리 API (관리자용)
 @app.post("/api/storage/cleanup")
 async def cleanup_storage(days_old: int = 30, dry_run: bool = True):
-    """오래된 게임 파일 정리 (기본 30일 이상)"""
+    """오래된 게임 정리 (기본 30일 이상, 생성일시 인덱스 사용)"""
     try:
-        from datetime import datetime, timedelta
-        
-        cutoff_date = datetime.now() - timedelta(days=days_old)
-        files_to_delete = []
-        total_size_to_free = 0
-        
-        for game_file in GAMES_DIR.glob("*.json"):
-            try:
-                with open(game_file, 'r', encoding='utf-8') as f:
-                    game_data = json.load(f)
-                
-                created_at_str = game_data.get('createdAt', '')
-                if created_at_str:
-                    created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                    
-                    if created_at < cutoff_date:
-                        file_size = game_file.stat().st_size
-                        files_to_delete.append({
-                            "file": game_file.name,
-                            "created_at": created_at.isoformat(),
-                            "size_bytes": file_size,
-                            "title": game_data.get('title', 'Unknown')
-                        })
-                        total_size_to_free += file_size
-                    
-            except Exception as e:
-                print(f"파일 분석 오류: {game_file.name}, {str(e)}")
-                continue
-        
-        # dry_run이 False인 경우에만 실제 삭제
-        deleted_files = []
-        if not dry_run:
-            for file_info in files_to_delete:
-                try:
-                    file_path = GAMES_DIR / file_info["file"]
-                    file_path.unlink()
-                    deleted_files.append(file_info)
-                except Exception as e:
-                    print(f"파일 삭제 오류: {file_info['file']}, {str(e)}")
-                    continue
+        result = await storage_sweeper.sweep_expired_games(days_old, dry_run=dry_run)
         
-        def format_bytes(bytes_value):
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if bytes_value < 1024.0:
-                    return f"{bytes_value:.2f} {unit}"
-                bytes_value /= 1024.0
-            return f"{bytes_value:.2f} TB"
+        def file_info(summary):
+            return {
+                "id": summary["id"],
+                "file": game_store.location(summary["id"]),
+                "created_at": summary["createdAt"],
+                "size_bytes": summary["sizeBytes"],
+                "title": summary.get("title") or 'Unknown'
+            }
+        
+        files_to_delete = [file_info(summary) for summary in result["found"]]
+        deleted_files = [file_info(summary) for summary in result["deleted"]]
         
         return {
             "status": "success",
             "dry_run": dry_run,
-            "cutoff_date": cutoff_date.isoformat(),
+            "cutoff_date": result["cutoff"],
             "days_old": days_old,
             "files_found": len(files_to_delete),
             "files_deleted": len(deleted_files),
-            "space_would_free": format_bytes(total_size_to_free),
-            "space_freed": format_bytes(sum(f["size_bytes"] for f in deleted_files)),
+            "space_would_free": format_bytes(sum(f["size_bytes"] for f in files_to_delete)),
+            "space_freed": format_bytes(result["bytesFreed"]),
+            "backlog": result["backlog"],
+            "duration_seconds": result["seconds"],
             "files": files_to_delete if dry_run else deleted_files
         }
         
     except Exception as e:
-        print(f"스토리지 정리 오류: {str(e)}")
+        logger.error(f"스토리지 정리 오류: {str(e)}")
         raise HTTPException(status_code=500, detail=f"스토리지 정리 중 오류가 발생했습니다: {str(e)}")
 
+# 고아 이미지 정리 API (관리자용)
+@app.post("/api/storage/cleanup-images")
+async def cleanup_orphaned_images(dry_run: bool = True):
+    """어떤 게임도 참조하지 않고 유예 시간이 지난 업로드 이미지 정리"""
+    try:
+        result = await storage_sweeper.sweep_orphaned_images(dry_run=dry_run)
+        return {
+            "status": "success",
+            "dry_run": dry_run,
+            "referenced_count": result["referenced"],
+            "files_found": len(result["found"]),
+            "files_deleted": len(result["deleted"]),
+            "space_would_free": format_bytes(sum(f["size_bytes"] for f in result["found"])),
+            "space_freed": format_bytes(result["bytesFreed"]),
+            "backlog": result["backlog"],
+            "duration_seconds": result["seconds"],
+            "files": result["found"] if dry_run else result["deleted"]
+        }
+        
+    except Exception as e:
+        logger.error(f"고아 이미지 정리 오류: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"고아 이미지 정리 중 오류가 발생했습니다: {str(e)}")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
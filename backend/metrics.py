@@ -0,0 +1,349 @@
+"""
+Prometheus 텍스트 형식 메트릭
+
+prometheus_client 없이 필요한 만큼만 구현합니다.
+
+- 값은 스레드별 배열(셀)에 기록하고 /metrics를 읽을 때 합칩니다.
+  각 스레드는 자기 셀에만 쓰므로 기록 경로에 잠금이 없습니다 (셀 등록은 스레드당 한 번).
+- 히스토그램 구간은 생성 시 정해지며, 관측 한 번은 이진 탐색 + 덧셈 두 번입니다.
+- 캐시 적중 수처럼 다른 객체가 이미 세고 있는 값은 CallbackMetric으로 읽을 때 가져옵니다.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.routing import Mount
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+STORAGE_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Cells:
+    """스레드별 값 배열"""
+
+    __slots__ = ("size", "_local", "_all")
+
+    def __init__(self, size: int):
+        self.size = size
+        self._local = threading.local()
+        self._all: List[list] = []
+
+    def mine(self) -> list:
+        try:
+            return self._local.cells
+        except AttributeError:
+            cells = self._local.cells = [0] * self.size
+            # list.append는 GIL 아래에서 원자적
+            self._all.append(cells)
+            return cells
+
+    def totals(self) -> list:
+        totals = [0] * self.size
+        for cells in list(self._all):
+            for i, value in enumerate(cells):
+                totals[i] += value
+        return totals
+
+
+class CounterChild:
+    __slots__ = ("_cells",)
+
+    def __init__(self):
+        self._cells = _Cells(1)
+
+    def inc(self, amount: float = 1):
+        self._cells.mine()[0] += amount
+
+    def value(self) -> float:
+        return self._cells.totals()[0]
+
+
+class GaugeChild(CounterChild):
+    """inc/dec만 지원하는 게이지 (스레드별 증감을 합산)"""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1):
+        self._cells.mine()[0] -= amount
+
+
+class HistogramChild:
+    __slots__ = ("bounds", "_cells")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # 구간별 개수 (마지막은 +Inf) + 합계
+        self._cells = _Cells(len(bounds) + 2)
+
+    def observe(self, value: float):
+        cells = self._cells.mine()
+        cells[bisect_left(self.bounds, value)] += 1
+        cells[-1] += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        totals = self._cells.totals()
+        return totals[:-1], totals[-1]
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: HistogramChild):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+class _Family:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """레이블 값별 자식 (처음 한 번만 잠금, 자주 쓰는 조합은 호출자가 보관해도 됨)"""
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.label_names):
+                raise ValueError(f"{self.name}: 레이블 {self.label_names}가 필요합니다.")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(child.value())}")
+        return lines
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self):
+        return CounterChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Family):
+    kind = "gauge"
+
+    def _new_child(self):
+        return GaugeChild()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self.labels().dec(amount)
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.bounds = tuple(sorted(float(bound) for bound in buckets))
+
+    def _new_child(self):
+        return HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bucket_labels = [_format_value(bound) for bound in self.bounds] + ["+Inf"]
+        for key, child in list(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for le, count in zip(bucket_labels, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(float(total))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Family):
+    """읽을 때 collect()가 돌려주는 (레이블 값, 값) 목록을 그대로 내보내는 메트릭"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Sequence[str], float]]],
+    ):
+        super().__init__(name, documentation, label_names)
+        self.kind = kind
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for values, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+
+    def register(self, family: _Family) -> _Family:
+        if family.name in self._families:
+            raise ValueError(f"이미 등록된 메트릭입니다: {family.name}")
+        self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        kind: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Iterable[Tuple[Sequence[str], float]]],
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, kind, label_names, collect))
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        for family in list(self._families.values()):
+            try:
+                lines.extend(family.render())
+            except Exception as e:
+                # 한 메트릭을 읽지 못해도 나머지는 내보냄
+                lines.append(f"# {family.name} 수집 실패: {_escape(str(e))}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# 모듈들이 공유하는 기본 레지스트리
+REGISTRY = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """
+    HTTP 요청 수/처리 시간/처리 중 요청 수를 기록하는 ASGI 미들웨어
+
+    레이블은 실제 경로 대신 route 경로(/api/games/{game_id})를 써서 계열 수가 늘어나지 않게 합니다.
+    Mount(/uploads 등)는 scope["route"]를 남기지 않으므로 마운트 경로를 레이블로 씁니다.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        registry = registry or REGISTRY
+        self.requests = registry.counter(
+            "http_requests_total", "처리한 HTTP 요청 수", ("method", "route", "status")
+        )
+        self.duration = registry.histogram(
+            "http_request_duration_seconds", "HTTP 요청 처리 시간 (응답 본문 전송 완료까지)",
+            ("method", "route", "status"),
+        )
+        self.in_flight = registry.gauge("http_requests_in_flight", "처리 중인 HTTP 요청 수").labels()
+
+    @staticmethod
+    def _route_label(scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        # Mount는 일치하면 scope["endpoint"]에 마운트된 앱을 남김
+        endpoint = scope.get("endpoint")
+        if endpoint is not None:
+            for route in getattr(scope.get("app"), "routes", ()):
+                if isinstance(route, Mount) and route.app is endpoint:
+                    return route.path
+        return "<unmatched>"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.in_flight.dec()
+            labels = (scope.get("method", ""), self._route_label(scope), str(status))
+            self.duration.labels(*labels).observe(time.perf_counter() - started)
+            self.requests.labels(*labels).inc()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+saved_games/*.json 게임 파일을 SQLite 게임 저장소로 가져오는 마이그레이션
+
+서버는 SQLite 저장소가 비어 있으면 시작할 때 같은 가져오기를 자동으로 실행합니다.
+이미 게임이 있는 저장소에 나중에 추가된 파일은 이 스크립트로 가져옵니다.
+
+사용법:
+    python migrate_games_to_sqlite.py              # 없는 게임만 가져오기
+    python migrate_games_to_sqlite.py --overwrite  # 이미 있는 게임도 덮어쓰기
+    python migrate_games_to_sqlite.py --dry-run    # 대상만 출력
+    python migrate_games_to_sqlite.py --recompress # 압축 없이 저장된 기존 행을 압축 형식으로 다시 저장
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+from game_codec import STORAGE_ENCODING
+from game_store import SQLiteGameStore, import_game_files
+from image_store import ImageStore
+
+GAMES_DIR = Path(os.getenv("GAMES_STORAGE_PATH", "saved_games"))
+SQLITE_PATH = Path(os.getenv("GAME_STORE_SQLITE_PATH", str(GAMES_DIR / "games.sqlite3")))
+UPLOAD_DIR = Path("uploads")
+
+
+def migrate(overwrite: bool = False, dry_run: bool = False):
+    store = SQLiteGameStore(SQLITE_PATH)
+    try:
+        # 인라인 base64 이미지는 uploads/로 옮긴 뒤 저장
+        totals = import_game_files(
+            store, GAMES_DIR, overwrite=overwrite, dry_run=dry_run, report=print,
+            prepare=ImageStore(UPLOAD_DIR).externalize_game,
+        )
+    finally:
+        store.close()
+
+    print(json.dumps(totals, indent=2, ensure_ascii=False))
+    return totals
+
+
+def recompress(dry_run: bool = False):
+    """이전 버전에서 압축 없이(indent=2 JSON) 저장된 행을 현재 저장 형식으로 다시 저장"""
+    store = SQLiteGameStore(SQLITE_PATH)
+    totals = {"rows": 0, "recompressed": 0, "bytesBefore": 0, "bytesAfter": 0}
+
+    try:
+        rows = store._connection().execute(
+            "SELECT id, size_bytes FROM games WHERE encoding != ?", (STORAGE_ENCODING,)
+        ).fetchall()
+        for row in rows:
+            totals["rows"] += 1
+            if dry_run:
+                print(f"[dry-run] {row['id']} ({row['size_bytes']} bytes)")
+                continue
+            store.put(store.get(row["id"]))
+            store.flush_variants()
+            totals["recompressed"] += 1
+            totals["bytesBefore"] += row["size_bytes"]
+            totals["bytesAfter"] += store._connection().execute(
+                "SELECT size_bytes FROM games WHERE id = ?", (row["id"],)
+            ).fetchone()["size_bytes"]
+    finally:
+        store.close()
+
+    print(json.dumps(totals, indent=2, ensure_ascii=False))
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON 게임 파일을 SQLite 저장소로 가져오기")
+    parser.add_argument("--overwrite", action="store_true", help="이미 있는 게임도 덮어쓰기")
+    parser.add_argument("--dry-run", action="store_true", help="저장소를 변경하지 않고 대상만 출력")
+    parser.add_argument("--recompress", action="store_true", help="압축 없이 저장된 기존 행을 압축 형식으로 다시 저장")
+    args = parser.parse_args()
+    if args.recompress:
+        recompress(dry_run=args.dry_run)
+    else:
+        migrate(overwrite=args.overwrite, dry_run=args.dry_run)
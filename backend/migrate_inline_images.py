@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+기존 저장 게임의 인라인 base64 이미지를 콘텐츠 주소 이미지 저장소로 옮기는 일회성 마이그레이션
+
+서버와 같은 게임 저장소(GAME_STORE_BACKEND=sqlite|file)의 게임을 읽어 이미지를 uploads/로 옮기고 다시 저장합니다.
+서버가 실행 중이면 서버를 멈춘 뒤 실행하세요 (다시 저장한 게임의 번들, 통계는 서버 시작 시 다시 만들어집니다).
+
+사용법:
+    python migrate_inline_images.py            # 실제 변환
+    python migrate_inline_images.py --dry-run  # 변환 대상만 출력
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+from game_store import create_game_store
+from image_store import ImageStore
+
+GAMES_DIR = Path(os.getenv("GAMES_STORAGE_PATH", "saved_games"))
+UPLOAD_DIR = Path("uploads")
+
+
+def format_bytes(bytes_value):
+    """바이트를 읽기 쉬운 형태로 변환"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if bytes_value < 1024.0:
+            return f"{bytes_value:.2f} {unit}"
+        bytes_value /= 1024.0
+    return f"{bytes_value:.2f} TB"
+
+
+def migrate(dry_run: bool = False):
+    image_store = ImageStore(UPLOAD_DIR)
+    store = create_game_store(GAMES_DIR, prepare_import=image_store.externalize_game)
+    totals = {"games": 0, "migrated": 0, "extracted": 0, "written": 0, "deduplicated": 0, "before": 0, "after": 0}
+
+    try:
+        for summary in store.list_summaries():
+            totals["games"] += 1
+            game_id = summary["id"]
+            try:
+                content = store.get_bytes(game_id)
+                if content is None:
+                    continue
+                game_data = json.loads(content)
+            except Exception as e:
+                print(f"게임 읽기 오류: {game_id}, {str(e)}")
+                continue
+
+            nodes = game_data.get("nodes", [])
+            inline_count = sum(1 for node in nodes if str(node.get("imageUrl") or "").startswith("data:"))
+            if inline_count == 0:
+                continue
+
+            if dry_run:
+                print(f"[dry-run] {game_id}: 인라인 이미지 {inline_count}개, {format_bytes(len(content))}")
+                totals["extracted"] += inline_count
+                continue
+
+            stats = image_store.externalize_game(game_data)
+            store.put(game_data)
+            after_size = len(store.get_bytes(game_id) or b"")
+
+            totals["migrated"] += 1
+            totals["before"] += len(content)
+            totals["after"] += after_size
+            for key in ("extracted", "written", "deduplicated"):
+                totals[key] += stats[key]
+            print(f"{game_id}: 이미지 {stats['extracted']}개 추출, {format_bytes(len(content))} → {format_bytes(after_size)}")
+    finally:
+        # 백그라운드 압축 사본 생성까지 마친 뒤 종료
+        store.close()
+
+    print(json.dumps(totals, indent=2, ensure_ascii=False))
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="저장 게임의 인라인 이미지를 uploads/로 추출")
+    parser.add_argument("--dry-run", action="store_true", help="게임을 변경하지 않고 대상만 출력")
+    args = parser.parse_args()
+    migrate(dry_run=args.dry_run)
@@ -0,0 +1,104 @@
+"""
+플레이 구간 조회
+
+큰 게임에서도 첫 카드를 바로 보여줄 수 있도록 노드 하나와 그 선택지(원하면 k단계 아래까지)만 보냅니다.
+게임별 인접 인덱스(PlayIndex)는 저장 시점에 컴파일한 번들로 만들고, 전체 노드 수로 크기를 제한한 LRU 캐시에 둡니다.
+캐시에 있으면 응답 시간은 게임 크기와 무관하게 보내는 노드 수에만 비례합니다.
+"""
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from game_bundle import NODE_FIELDS
+
+
+class PlayIndex:
+    """번들 → 노드 ID 인덱스와 노드별 자식 목록"""
+
+    def __init__(self, bundle: Dict[str, Any]):
+        self.nodes: List[Dict[str, Any]] = bundle.get("nodes") or []
+        self.children: List[List[int]] = bundle.get("children") or []
+        self.assets: List[str] = bundle.get("assets") or []
+        self.root: Optional[int] = bundle.get("root")
+        self.game = {field: bundle.get(field) for field in ("title", "description", "gameConfig")}
+        self.index = {node["id"]: i for i, node in enumerate(self.nodes)}
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def node_entry(self, i: int) -> Dict[str, Any]:
+        node = self.nodes[i]
+        entry = {"id": node["id"]}
+        for field in NODE_FIELDS:
+            if field in node:
+                entry[field] = node[field]
+        if "image" in node:
+            entry["imageUrl"] = self.assets[node["image"]]
+        entry["choices"] = [self.nodes[child]["id"] for child in self.children[i]]
+        return entry
+
+    def window(self, start: int, depth: int, max_nodes: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """start에서 depth단계 아래까지의 노드 (BFS 순서, 반환값: 노드 목록, max_nodes에서 잘렸는지)"""
+        seen = {start}
+        order = [start]
+        queue = deque([(start, 0)])
+        truncated = False
+        while queue:
+            node, level = queue.popleft()
+            if level == depth:
+                continue
+            for child in self.children[node]:
+                if child in seen:
+                    continue
+                if len(order) >= max_nodes:
+                    truncated = True
+                    break
+                seen.add(child)
+                order.append(child)
+                queue.append((child, level + 1))
+        return [self.node_entry(i) for i in order], truncated
+
+
+class PlayIndexCache:
+    """게임 ID별 PlayIndex LRU 캐시 (버전이 바뀌면 다시 로드, 캐시한 전체 노드 수가 max_nodes를 넘으면 오래된 것부터 제거)"""
+
+    def __init__(self, max_nodes: int = 200000):
+        self.max_nodes = max_nodes
+        self._entries: "OrderedDict[str, Tuple[Hashable, PlayIndex]]" = OrderedDict()
+        self._nodes = 0
+        # 조회(move_to_end)와 교체/제거는 잠금, 로드는 여러 스레드에서 동시에 할 수 있도록 잠금 밖에서
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, game_id: str, version: Hashable) -> Optional[PlayIndex]:
+        """캐시에 있는 인덱스 (없으면 None, 로드하지 않음)"""
+        with self._lock:
+            entry = self._entries.get(game_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(game_id)
+            self.hits += 1
+            return entry[1]
+
+    def get(self, game_id: str, version: Hashable, loader: Callable[[], Dict[str, Any]]) -> PlayIndex:
+        index = self.peek(game_id, version)
+        if index is not None:
+            return index
+
+        index = PlayIndex(loader())
+        with self._lock:
+            self.misses += 1
+            previous = self._entries.pop(game_id, None)
+            if previous is not None:
+                self._nodes -= len(previous[1])
+            self._entries[game_id] = (version, index)
+            self._nodes += len(index)
+            # 방금 넣은 게임은 혼자 한도를 넘어도 유지
+            while self._nodes > self.max_nodes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nodes -= len(evicted)
+        return index
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "nodes": self._nodes, "hits": self.hits, "misses": self.misses}
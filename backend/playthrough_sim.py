@@ -0,0 +1,359 @@
+"""
+플레이 시뮬레이터 (스탯 밸런스 확인용)
+
+저장된 게임을 ReignsGame.js와 같은 규칙으로 여러 번 무작위(또는 가중치) 플레이합니다.
+
+- 시작: 어떤 엣지의 target도 아닌 첫 노드, 스탯은 gameConfig.initialStats (없으면 모두 50)
+- 선택: 현재 노드의 자식 중 앞의 두 개 (카드를 왼쪽/오른쪽으로 넘기는 두 선택지)
+- 선택한 노드의 statChanges를 더하고 0~100으로 자름 (statChanges가 없으면 스탯마다 -10~10 무작위)
+- 어떤 스탯이든 0 이하 또는 100 이상이면 게임 오버, 선택지가 없으면 그 노드가 엔딩
+
+모든 플레이를 NumPy 배열로 한 단계씩 함께 진행합니다 (단계마다 진행 중인 플레이 수에 비례하는 벡터 연산).
+스탯은 0~100 정수이므로 단계별 분포를 101칸 히스토그램으로 모아 백분위수를 정확히 계산하고,
+히스토그램과 횟수는 더하기만 하면 되므로 프로세스 풀로 나눠 실행한 결과도 그대로 합칩니다.
+"""
+import json
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from story_analysis import CompactGraph
+
+logger = logging.getLogger(__name__)
+
+STAT_KEYS = ("health", "wealth", "happiness", "power")
+DEFAULT_STAT = 50
+# 카드 UI에서 고를 수 있는 선택지 수 (왼쪽/오른쪽)
+MAX_CHOICES = 2
+# statChanges가 없는 노드의 무작위 변화 범위 (generateStatChanges와 동일, 양 끝 포함)
+RANDOM_CHANGE_MIN, RANDOM_CHANGE_MAX = -10, 10
+PERCENTILES = (5, 25, 50, 75, 95)
+# 이보다 적은 플레이는 프로세스 풀을 쓰지 않음 (프로세스 간 전달 비용이 더 큼)
+PARALLEL_MIN_RUNS = 20000
+# 방문 노드를 이만큼 모을 때마다 집계
+VISIT_FLUSH_SIZE = 1 << 20
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_size = 0
+
+
+def parse_stat_changes(value) -> Optional[List[int]]:
+    """
+    노드의 statChanges → 스탯별 변화량
+
+    비어 있으면 None(선택할 때마다 무작위)이고, 읽을 수 없는 값은 변화 없음으로 취급합니다 (프론트엔드와 동일).
+    """
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = {}
+    if not isinstance(value, dict):
+        return [0] * len(STAT_KEYS)
+    changes = []
+    for key in STAT_KEYS:
+        try:
+            changes.append(int(value.get(key) or 0))
+        except (TypeError, ValueError):
+            changes.append(0)
+    return changes
+
+
+class PlayModel:
+    """
+    시뮬레이션용 배열
+
+    프로세스 풀로 보낼 수 있도록 NumPy 배열과 기본 타입만 보관합니다.
+    weights(노드 ID → 가중치)가 있으면 두 선택지 중 가중치에 비례해 고릅니다 (없는 노드는 1).
+    """
+
+    def __init__(self, game_dict: Dict[str, Any], weights: Optional[Dict[str, float]] = None):
+        nodes = game_dict.get("nodes") or []
+        graph = CompactGraph((node["id"] for node in nodes), game_dict.get("edges") or [])
+        n = len(graph)
+        self.ids: List[str] = graph.ids
+        self.start = graph.start_node()
+        self.policy = "weighted" if weights else "random"
+
+        initial = (game_dict.get("gameConfig") or {}).get("initialStats") or {}
+        self.initial_stats = np.array([int(initial.get(key, DEFAULT_STAT)) for key in STAT_KEYS], dtype=np.int16)
+
+        # 선택지: 엣지 순서대로 앞의 두 자식 (first/second, 없으면 -1)
+        offsets = graph.offsets.tolist()
+        targets = graph.targets.tolist()
+        first = np.full(n, -1, dtype=np.int64)
+        second = np.full(n, -1, dtype=np.int64)
+        second_probability = np.zeros(n, dtype=np.float64)
+        for i in range(n):
+            children = targets[offsets[i]:offsets[i + 1]]
+            if children:
+                first[i] = children[0]
+            if len(children) >= MAX_CHOICES:
+                second[i] = children[1]
+                if weights:
+                    w1 = max(0.0, float(weights.get(self.ids[children[0]], 1.0)))
+                    w2 = max(0.0, float(weights.get(self.ids[children[1]], 1.0)))
+                    second_probability[i] = w2 / (w1 + w2) if w1 + w2 > 0 else 0.5
+                else:
+                    second_probability[i] = 0.5
+        self.first = first
+        self.second = second
+        self.second_probability = second_probability
+
+        by_id = {str(node["id"]): node for node in nodes}
+        self.changes = np.zeros((n, len(STAT_KEYS)), dtype=np.int16)
+        self.random_changes = np.zeros(n, dtype=bool)
+        for i, node_id in enumerate(self.ids):
+            parsed = parse_stat_changes(by_id[node_id].get("statChanges"))
+            if parsed is None:
+                self.random_changes[i] = True
+            else:
+                self.changes[i] = parsed
+
+        # 선택지 수 제한 없이 시작 노드에서 도달 가능한 노드
+        self.reachable = np.zeros(n, dtype=bool)
+        if self.start is not None:
+            self.reachable[self.start] = True
+            queue = deque([self.start])
+            while queue:
+                node = queue.popleft()
+                for child in targets[offsets[node]:offsets[node + 1]]:
+                    if not self.reachable[child]:
+                        self.reachable[child] = True
+                        queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _stat_histogram(stats) -> "np.ndarray":
+    """(플레이 수, 4) 스탯 → (4, 101) 히스토그램"""
+    shifted = stats.astype(np.int64) + np.arange(len(STAT_KEYS), dtype=np.int64) * 101
+    return np.bincount(shifted.ravel(), minlength=len(STAT_KEYS) * 101).reshape(len(STAT_KEYS), 101)
+
+
+def simulate_runs(model: PlayModel, runs: int, seed, max_steps: int, trajectory_steps: int) -> Dict[str, Any]:
+    """
+    runs번 플레이한 집계 (모두 더해서 합칠 수 있는 횟수/히스토그램)
+
+    프로세스 풀에서도 실행되므로 모듈 최상위 함수입니다.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(model)
+    stat_count = len(STAT_KEYS)
+    result = {
+        "runs": runs,
+        "visits": np.zeros(n, dtype=np.int64),
+        "endings": np.zeros(n, dtype=np.int64),
+        "deaths": np.zeros(n, dtype=np.int64),
+        "limitHits": np.zeros((stat_count, 2), dtype=np.int64),
+        "truncated": 0,
+        "lengths": np.zeros(max_steps + 1, dtype=np.int64),
+        "trajectory": np.zeros((trajectory_steps + 1, stat_count, 101), dtype=np.int64),
+        "finalStats": np.zeros((stat_count, 101), dtype=np.int64),
+    }
+    if model.start is None or runs <= 0:
+        return result
+
+    # 진행 중인 플레이만 남기도록 배열을 매 단계 줄여 나감
+    current = np.full(runs, model.start, dtype=np.int64)
+    stats = np.tile(model.initial_stats, (runs, 1))
+    result["visits"][model.start] += runs
+    result["trajectory"][0] += _stat_histogram(stats)
+
+    def finish(mask, step):
+        # 끝난 플레이를 집계에서 정리하고 나머지만 남김
+        nonlocal current, stats
+        result["lengths"][step] += int(mask.sum())
+        result["finalStats"] += _stat_histogram(stats[mask])
+        current, stats = current[~mask], stats[~mask]
+
+    def record_game_over(step):
+        low = stats <= 0
+        high = stats >= 100
+        over = (low | high).any(axis=1)
+        if over.any():
+            result["limitHits"][:, 0] += low[over].sum(axis=0)
+            result["limitHits"][:, 1] += high[over].sum(axis=0)
+            np.add.at(result["deaths"], current[over], 1)
+            finish(over, step)
+
+    visited: List["np.ndarray"] = []
+    visited_size = 0
+
+    def flush_visits():
+        nonlocal visited, visited_size
+        if visited:
+            result["visits"] += np.bincount(np.concatenate(visited), minlength=n)
+        visited, visited_size = [], 0
+
+    # 초기 스탯이 이미 범위를 벗어나면 바로 게임 오버
+    record_game_over(0)
+
+    for step in range(1, max_steps + 1):
+        if not len(current):
+            break
+        leaf = model.first[current] < 0
+        if leaf.any():
+            np.add.at(result["endings"], current[leaf], 1)
+            finish(leaf, step - 1)
+            if not len(current):
+                break
+
+        pick_second = rng.random(len(current)) < model.second_probability[current]
+        current = np.where(pick_second, model.second[current], model.first[current])
+
+        change = model.changes[current].copy()
+        random_rows = model.random_changes[current]
+        if random_rows.any():
+            change[random_rows] = rng.integers(
+                RANDOM_CHANGE_MIN, RANDOM_CHANGE_MAX + 1, size=(int(random_rows.sum()), stat_count), dtype=np.int16
+            )
+        stats = np.clip(stats + change, 0, 100).astype(np.int16)
+        # 방문 횟수는 모아 두었다가 한 번에 셈 (단계마다 노드 수 크기의 bincount를 하지 않도록)
+        visited.append(current)
+        visited_size += len(current)
+        if visited_size >= VISIT_FLUSH_SIZE:
+            flush_visits()
+        if step <= trajectory_steps:
+            result["trajectory"][step] += _stat_histogram(stats)
+        record_game_over(step)
+
+    flush_visits()
+    if len(current):
+        # max_steps 안에 끝나지 않은 플레이 (순환)
+        leaf = model.first[current] < 0
+        np.add.at(result["endings"], current[leaf], 1)
+        result["truncated"] = int((~leaf).sum())
+        result["lengths"][max_steps] += len(current)
+        result["finalStats"] += _stat_histogram(stats)
+    return result
+
+
+def _merge(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = parts[0]
+    for part in parts[1:]:
+        for key, value in part.items():
+            merged[key] = merged[key] + value
+    return merged
+
+
+def _get_process_pool(processes: int) -> ProcessPoolExecutor:
+    global _process_pool, _process_pool_size
+    if _process_pool is None or _process_pool_size != processes:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        # fork로 시작해 서버 모듈(main)을 다시 import하지 않음 (작업 함수는 NumPy 배열만 다루므로 락을 쓰지 않음)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        _process_pool = ProcessPoolExecutor(max_workers=processes, mp_context=context)
+        _process_pool_size = processes
+    return _process_pool
+
+
+def shutdown_process_pool():
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True)
+        _process_pool = None
+
+
+def _histogram_summary(histogram) -> Dict[str, Any]:
+    """0~100 히스토그램의 평균과 백분위수 (nearest-rank)"""
+    total = int(histogram.sum())
+    if total == 0:
+        return {"runs": 0, "mean": None, **{f"p{p}": None for p in PERCENTILES}}
+    cumulative = np.cumsum(histogram)
+    summary = {"runs": total, "mean": round(float((histogram * np.arange(len(histogram))).sum() / total), 2)}
+    for p in PERCENTILES:
+        summary[f"p{p}"] = int(np.searchsorted(cumulative, max(1, int(np.ceil(p / 100 * total)))))
+    return summary
+
+
+def simulate(
+    model: PlayModel,
+    runs: int,
+    seed: Optional[int] = None,
+    max_steps: int = 500,
+    trajectory_steps: int = 50,
+    processes: int = 0,
+) -> Dict[str, Any]:
+    """
+    runs번 플레이한 결과 요약
+
+    processes가 2 이상이고 플레이 수가 충분하면 프로세스 풀에 나눠 실행합니다.
+    seed가 같고 processes가 같으면 결과도 같습니다.
+    """
+    started = time.perf_counter()
+    seed_sequence = np.random.SeedSequence(seed)
+    if processes > 1 and runs >= PARALLEL_MIN_RUNS:
+        chunk_sizes = [runs // processes + (1 if i < runs % processes else 0) for i in range(processes)]
+        pool = _get_process_pool(processes)
+        futures = [
+            pool.submit(simulate_runs, model, size, child_seed, max_steps, trajectory_steps)
+            for size, child_seed in zip(chunk_sizes, seed_sequence.spawn(processes))
+        ]
+        totals = _merge([future.result() for future in futures])
+    else:
+        totals = simulate_runs(model, runs, seed_sequence, max_steps, trajectory_steps)
+
+    ids = model.ids
+    ending_counts = {ids[i]: int(count) for i, count in enumerate(totals["endings"]) if count}
+    death_counts = {ids[i]: int(count) for i, count in enumerate(totals["deaths"]) if count}
+    game_overs = int(totals["deaths"].sum())
+    lengths = totals["lengths"]
+    visited = totals["visits"] > 0
+
+    def probability(count: int) -> float:
+        return round(count / runs, 6) if runs else 0.0
+
+    return {
+        "runs": runs,
+        "policy": model.policy,
+        "startNode": ids[model.start] if model.start is not None else None,
+        "initialStats": dict(zip(STAT_KEYS, model.initial_stats.tolist())),
+        "endings": {
+            "nodes": {
+                node_id: {"count": count, "probability": probability(count)}
+                for node_id, count in sorted(ending_counts.items(), key=lambda item: -item[1])
+            },
+            "gameOver": {"count": game_overs, "probability": probability(game_overs)},
+            "truncated": {"count": totals["truncated"], "probability": probability(totals["truncated"])},
+        },
+        "statLimits": {
+            key: {
+                "zero": probability(int(totals["limitHits"][i, 0])),
+                "hundred": probability(int(totals["limitHits"][i, 1])),
+            }
+            for i, key in enumerate(STAT_KEYS)
+        },
+        # 게임 오버가 가장 많이 일어난 노드
+        "gameOverNodes": {
+            node_id: probability(count)
+            for node_id, count in sorted(death_counts.items(), key=lambda item: -item[1])[:20]
+        },
+        "trajectories": {
+            key: [
+                {"step": step, **_histogram_summary(totals["trajectory"][step, i])}
+                for step in range(len(totals["trajectory"]))
+                if totals["trajectory"][step, i].sum()
+            ]
+            for i, key in enumerate(STAT_KEYS)
+        },
+        "finalStats": {key: _histogram_summary(totals["finalStats"][i]) for i, key in enumerate(STAT_KEYS)},
+        "playLength": _histogram_summary(lengths),
+        # 시작 노드에서 이어져 있지만 어떤 플레이도 도달하지 못한 노드 (세 번째 이후 선택지, 항상 게임 오버 뒤 등)
+        "deadBranches": [ids[i] for i in np.flatnonzero(model.reachable & ~visited)],
+        "visitedNodes": int(visited.sum()),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
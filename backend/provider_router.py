@@ -0,0 +1,273 @@
+"""
+지연 시간 기반 제공자 선택과 헤지 요청 (provider "auto")
+
+- 제공자별로 응답 시간과 오류율의 EWMA를 기록하고, 점수(지연 × 오류 가중치)가 가장 좋은 제공자부터 시도합니다.
+  아직 기록이 없는 제공자는 점수 0으로 먼저 시도해 상태를 알아냅니다.
+- 헤지: 첫 제공자가 자기 최근 p95 안에 답하지 않으면 다음 제공자에도 같은 요청을 보내고,
+  먼저 성공한 응답을 쓰며 나머지 요청은 취소합니다. 첫 제공자가 실패하면 기다리지 않고 바로 다음 제공자로 넘깁니다.
+- 서킷 브레이커: 연속 실패가 failure_threshold번이거나 오류율 EWMA가 error_threshold를 넘으면
+  cooldown 동안 후보에서 빼고, 이후 요청 하나로 회복 여부를 확인합니다 (half-open).
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from admission import too_many_requests
+
+logger = logging.getLogger(__name__)
+
+# p95 계산에 쓰는 최근 응답 시간 표본 수
+LATENCY_SAMPLE_SIZE = 256
+# 오류율이 점수에 주는 가중치 (오류율 50%면 지연이 3배인 것으로 취급)
+ERROR_PENALTY = 4.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def counts_as_failure(error: BaseException) -> bool:
+    """제공자 상태에 반영할 오류인지 (요청 자체가 잘못된 4xx는 제외, 429/408은 포함)"""
+    status = getattr(error, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status not in (408, 429))
+
+
+class ProviderHealth:
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+        self.observations = 0
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.opened = 0
+
+    def observe_latency(self, latency: float):
+        self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+
+    def observe_error(self, failed: bool):
+        self.observations += 1
+        self.error_rate += self.alpha * ((1.0 if failed else 0.0) - self.error_rate)
+
+    def p95(self) -> Optional[float]:
+        if not self.latencies:
+            return None
+        return _percentile(sorted(self.latencies), 95)
+
+    def score(self) -> float:
+        return (self.latency or 0.0) * (1 + ERROR_PENALTY * self.error_rate)
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        p95 = self.p95()
+        return {
+            "state": self.state,
+            "latencyMs": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "p95Ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "errorRate": round(self.error_rate, 3),
+            "consecutiveFailures": self.consecutive_failures,
+            "reopensIn": round(max(0.0, self.open_until - now), 1) if self.state == OPEN else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "cancelled": self.cancelled,
+            "opened": self.opened,
+        }
+
+
+class ProviderRouter:
+    def __init__(
+        self,
+        providers,
+        alpha: float = 0.2,
+        failure_threshold: int = 5,
+        error_threshold: float = 0.5,
+        min_observations: int = 10,
+        cooldown: float = 30.0,
+        hedge_delay: float = 5.0,
+        min_hedge_delay: float = 0.5,
+        min_latency_samples: int = 20,
+        hedging: bool = True,
+    ):
+        self.health = {provider: ProviderHealth(alpha) for provider in providers}
+        self.failure_threshold = failure_threshold
+        self.error_threshold = error_threshold
+        self.min_observations = min_observations
+        self.cooldown = cooldown
+        self.hedge_delay_default = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.min_latency_samples = min_latency_samples
+        self.hedging = hedging
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    # 서킷 브레이커
+    def available(self, provider: str, now: Optional[float] = None) -> bool:
+        health = self.health[provider]
+        if health.state == CLOSED:
+            return True
+        now = time.monotonic() if now is None else now
+        if health.state == OPEN and now >= health.open_until:
+            health.state = HALF_OPEN
+            logger.info(f"제공자 회복 확인 시작: {provider}")
+        # half-open 동안에는 확인 요청 하나만 보냄
+        return health.state == HALF_OPEN and not health.trial_in_flight
+
+    def _open(self, provider: str, health: ProviderHealth):
+        health.state = OPEN
+        health.open_until = time.monotonic() + self.cooldown
+        health.opened += 1
+        logger.warning(
+            f"제공자 일시 제외: {provider} ({self.cooldown:.0f}초, 연속 실패 {health.consecutive_failures}회, "
+            f"오류율 {health.error_rate:.2f})"
+        )
+
+    def rank(self, providers: List[str]) -> List[str]:
+        """차단되지 않은 제공자를 점수가 좋은 순서로"""
+        now = time.monotonic()
+        candidates = [provider for provider in providers if self.available(provider, now)]
+        return sorted(candidates, key=lambda provider: self.health[provider].score())
+
+    def retry_after(self, providers: List[str]) -> float:
+        """모든 제공자가 차단되었을 때 가장 먼저 풀리기까지 남은 시간"""
+        now = time.monotonic()
+        return min((self.health[provider].open_until - now for provider in providers), default=0.0)
+
+    def hedge_delay(self, provider: str) -> float:
+        """이 시간 안에 답이 없으면 헤지 요청 (기록이 적으면 기본값)"""
+        health = self.health[provider]
+        if len(health.latencies) < self.min_latency_samples:
+            return self.hedge_delay_default
+        return max(self.min_hedge_delay, health.p95())
+
+    # 결과 기록
+    @asynccontextmanager
+    async def track(self, provider: str):
+        """
+        감싼 업스트림 호출의 소요 시간과 성공/실패를 기록
+
+        half-open 확인 요청은 여기서 확인과 표시를 한 번에 하므로 (await 없이) 하나만 통과하고,
+        rank() 이후 대기열에서 기다리는 사이 다른 요청이 먼저 확인을 시작했으면 503으로 거절합니다.
+        """
+        health = self.health[provider]
+        trial = health.state == HALF_OPEN
+        if trial:
+            if health.trial_in_flight:
+                raise too_many_requests(
+                    f"{provider.capitalize()} 제공자의 회복을 확인하는 중입니다. 잠시 후 다시 시도해주세요.",
+                    self.hedge_delay(provider),
+                    status_code=503,
+                )
+            health.trial_in_flight = True
+        started = time.monotonic()
+        try:
+            yield
+        except asyncio.CancelledError:
+            # 헤지에서 진 요청: 적어도 이만큼은 걸렸으므로 지연 EWMA만 올림
+            health.cancelled += 1
+            elapsed = time.monotonic() - started
+            if health.latency is None or elapsed > health.latency:
+                health.observe_latency(elapsed)
+            raise
+        except Exception as e:
+            if counts_as_failure(e):
+                self._record_failure(provider, health)
+            raise
+        else:
+            self._record_success(health, time.monotonic() - started)
+        finally:
+            if trial:
+                health.trial_in_flight = False
+
+    def _record_success(self, health: ProviderHealth, latency: float):
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.latencies.append(latency)
+        health.observe_latency(latency)
+        health.observe_error(False)
+        if health.state != CLOSED:
+            health.state = CLOSED
+
+    def _record_failure(self, provider: str, health: ProviderHealth):
+        health.failures += 1
+        health.consecutive_failures += 1
+        health.observe_error(True)
+        if health.state == HALF_OPEN:
+            self._open(provider, health)
+        elif health.state == CLOSED and (
+            health.consecutive_failures >= self.failure_threshold
+            or (health.observations >= self.min_observations and health.error_rate >= self.error_threshold)
+        ):
+            self._open(provider, health)
+
+    async def run(
+        self,
+        providers: List[str],
+        call: Callable[[str], Awaitable[Any]],
+        hedge: bool = True,
+    ) -> Tuple[Any, str, bool]:
+        """
+        providers 순서대로 call(provider) 실행 (반환값: 결과, 응답한 제공자, 헤지 여부)
+
+        모든 제공자가 실패하면 마지막 오류를 그대로 올립니다.
+        """
+        backups = list(providers[1:])
+        hedge = hedge and self.hedging
+        tasks: Dict[asyncio.Task, str] = {asyncio.create_task(call(providers[0])): providers[0]}
+        hedged = False
+        error: Optional[BaseException] = None
+        timeout = self.hedge_delay(providers[0]) if hedge and backups else None
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 진행 중인 요청은 그대로 두고 다음 제공자에도 요청
+                    backup = backups.pop(0)
+                    tasks[asyncio.create_task(call(backup))] = backup
+                    hedged = True
+                    self.hedges += 1
+                    timeout = self.hedge_delay(backup) if backups else None
+                    continue
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is None:
+                        if hedged and provider != providers[0]:
+                            self.hedge_wins += 1
+                        return task.result(), provider, hedged
+                    error = task.exception()
+                if not tasks and backups:
+                    backup = backups.pop(0)
+                    tasks[asyncio.create_task(call(backup))] = backup
+                    self.failovers += 1
+                    timeout = self.hedge_delay(backup) if hedge and backups else None
+            raise error
+        finally:
+            # 진 요청(또는 클라이언트가 떠난 요청)의 업스트림 호출 취소
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "hedging": self.hedging,
+            "cooldownSeconds": self.cooldown,
+            "hedges": self.hedges,
+            "hedgeWins": self.hedge_wins,
+            "failovers": self.failovers,
+            "providers": {provider: health.stats(now) for provider, health in self.health.items()},
+        }
@@ -0,0 +1,169 @@
+"""
+이벤트 루프 모니터링
+
+- configure_logging: 로그를 큐에 넣고 별도 스레드가 출력 (핸들러에서 print로 stdout에 직접 쓰지 않음)
+- RequestTracker / RequestTrackingMiddleware: 현재 처리 중인 요청(핸들러) 추적
+- LoopLagMonitor: 주기적으로 sleep을 예약해 실제로 깨어난 시각과의 차이(스케줄링 지연)를 측정하고,
+  임계값을 넘으면 그 구간에 처리 중이던 핸들러를 함께 로그로 남김
+"""
+import asyncio
+import atexit
+import logging
+import logging.handlers
+import queue
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: str = "INFO"):
+    """루트 로거에 큐 핸들러 연결 (이미 설정되어 있으면 그대로 둠)"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    if root.handlers:
+        return
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """남은 로그를 모두 출력한 뒤 출력 스레드 종료"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class RequestTracker:
+    """
+    처리 중인 HTTP 요청 기록
+
+    라우팅 이후 scope에 들어오는 route 경로(/api/games/{game_id} 등)로 핸들러를 식별합니다.
+    """
+
+    def __init__(self, recent_size: int = 256):
+        self._active: Dict[int, tuple] = {}
+        # 최근 끝난 요청 (이름, 시작, 종료) — 지연 구간 도중 끝난 핸들러도 찾기 위함
+        self._recent: deque = deque(maxlen=recent_size)
+        self._next_id = 0
+
+    @staticmethod
+    def _handler_name(scope) -> str:
+        route = scope.get("route")
+        path = getattr(route, "path", None) or scope.get("path", "")
+        return f"{scope.get('method', '')} {path}"
+
+    def start(self, scope) -> int:
+        request_id = self._next_id
+        self._next_id += 1
+        self._active[request_id] = (scope, time.monotonic())
+        return request_id
+
+    def finish(self, request_id: int):
+        scope, started = self._active.pop(request_id)
+        self._recent.append((self._handler_name(scope), started, time.monotonic()))
+
+    def handlers_between(self, start: float, end: float) -> List[str]:
+        """start~end 구간에 처리 중이었던 핸들러 이름"""
+        names = {self._handler_name(scope) for scope, started in list(self._active.values()) if started <= end}
+        names.update(name for name, started, finished in list(self._recent) if started <= end and finished >= start)
+        return sorted(names)
+
+    def active_count(self) -> int:
+        return len(self._active)
+
+
+class RequestTrackingMiddleware:
+    """모든 HTTP 요청을 RequestTracker에 기록하는 ASGI 미들웨어"""
+
+    def __init__(self, app, tracker: RequestTracker):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self.tracker.start(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.tracker.finish(request_id)
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        tracker: Optional[RequestTracker] = None,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        window: int = 1200,
+    ):
+        self.tracker = tracker
+        self.interval = interval
+        self.threshold = threshold
+        self._samples: deque = deque(maxlen=window)
+        self.slow_events = 0
+        self.max_lag = 0.0
+        self.last_slow: Optional[Dict[str, Any]] = None
+
+    async def run(self):
+        while True:
+            scheduled = time.monotonic()
+            await asyncio.sleep(self.interval)
+            woke = time.monotonic()
+            lag = max(0.0, woke - scheduled - self.interval)
+            self._samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self._report(lag, scheduled, woke)
+
+    def _report(self, lag: float, start: float, end: float):
+        handlers = self.tracker.handlers_between(start, end) if self.tracker else []
+        self.slow_events += 1
+        self.last_slow = {
+            "lagMs": round(lag * 1000, 1),
+            "handlers": handlers,
+            "at": time.time(),
+        }
+        logger.warning(
+            "이벤트 루프 지연 %.1fms (처리 중 핸들러: %s)",
+            lag * 1000,
+            ", ".join(handlers) or "없음",
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        return {
+            "samples": len(samples),
+            "intervalMs": round(self.interval * 1000, 1),
+            "thresholdMs": round(self.threshold * 1000, 1),
+            "p50Ms": round(_percentile(samples, 50) * 1000, 2),
+            "p99Ms": round(_percentile(samples, 99) * 1000, 2),
+            "maxMs": round(self.max_lag * 1000, 2),
+            "slowEvents": self.slow_events,
+            "lastSlow": self.last_slow,
+            "activeRequests": self.tracker.active_count() if self.tracker else None,
+        }
@@ -0,0 +1,57 @@
+"""
+동일한 동시 요청 합치기 (single-flight)
+
+같은 키로 이미 진행 중인 작업이 있으면 새 업스트림 호출을 만들지 않고
+진행 중인 작업의 결과를 함께 기다립니다. 작업의 예외는 모든 대기자에게
+그대로 전달되고, 대기자가 모두 취소되면 작업도 취소됩니다.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class _Call:
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """fn()을 키당 한 번만 실행 (반환값: 결과, 다른 요청과 공유 여부)"""
+        call = self._calls.get(key)
+        shared = call is not None
+
+        if call is None:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # 한 대기자의 취소가 공유 작업을 취소하지 않도록 shield
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # 결과를 기다리는 요청이 더 이상 없으면 업스트림 호출도 중단
+                self._forget(key, call)
+                call.task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "inFlight": len(self._calls),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
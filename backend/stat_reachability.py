@@ -0,0 +1,228 @@
+"""
+도달 가능한 스탯 범위 분석
+
+플레이 시뮬레이터(playthrough_sim)와 같은 규칙으로, 표본 대신 모든 경우를 따져
+각 노드에 도착했을 때 가능한 스탯 값과 실제로 도달 가능한 엔딩을 계산합니다.
+
+1. 정확한 탐색: (노드, 스탯 4개) 상태를 한 번씩만 방문하는 BFS. 순환이 있어도 상태가 유한하므로 끝나고,
+   상태 수가 JOINT_STATE_LIMIT 이하이고 무작위 변화 노드에 도달하지 않으면 결과가 정확합니다 ("exact": true).
+2. 스탯별 집합 전파: 그렇지 않으면 스탯마다 0~100 값 집합을 101비트 정수(비트마스크)로 두고 전파합니다.
+   SCC를 한 노드로 줄인 DAG를 위상 순서로 한 번 훑고(DAG는 O(V+E)), 순환 안에서는 집합이 더 이상 커지지 않을 때까지
+   반복합니다 (집합은 커지기만 하므로 반드시 끝남). 스탯 사이의 관계는 따지지 않으므로 실제보다 넓을 수 있지만
+   ("exact": false), 도달 불가로 나온 노드와 엔딩은 실제로도 도달할 수 없습니다.
+"""
+import json
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from playthrough_sim import (
+    DEFAULT_STAT, MAX_CHOICES, RANDOM_CHANGE_MAX, RANDOM_CHANGE_MIN, STAT_KEYS, parse_stat_changes,
+)
+from story_analysis import CompactGraph
+
+# 정확한 탐색에서 허용하는 (노드, 스탯) 상태 수
+JOINT_STATE_LIMIT = 200000
+
+STAT_MAX = 100
+FULL_MASK = (1 << (STAT_MAX + 1)) - 1
+# 게임이 계속되는 값 (1~99)
+ALIVE_MASK = FULL_MASK & ~1 & ~(1 << STAT_MAX)
+
+
+def _shift(mask: int, delta: int) -> int:
+    """값 집합에 delta를 더하고 0~100으로 자른 집합"""
+    if delta > 0:
+        shifted = mask << delta
+        if shifted >> (STAT_MAX + 1):
+            shifted |= 1 << STAT_MAX
+        return shifted & FULL_MASK
+    if delta < 0:
+        shifted = mask >> -delta
+        if mask & ((1 << (-delta + 1)) - 1):
+            shifted |= 1
+        return shifted
+    return mask
+
+
+def _spread(mask: int) -> int:
+    """
+    무작위 변화(-10~10)를 적용했을 때 가능한 값 집합
+
+    양쪽에 여유 비트를 두고 자르지 않은 채 0~20칸 이동의 합집합을 만든 뒤(이동 5번),
+    0 이하와 100 이상으로 넘어간 값을 0과 100으로 모읍니다.
+    """
+    spread = mask
+    for step in (1, 2, 4, 8, RANDOM_CHANGE_MAX - RANDOM_CHANGE_MIN - 15):
+        spread |= spread << step
+    offset = -RANDOM_CHANGE_MIN
+    result = (spread >> offset) & FULL_MASK
+    if spread & ((1 << (offset + 1)) - 1):
+        result |= 1
+    if spread >> (offset + STAT_MAX):
+        result |= 1 << STAT_MAX
+    return result
+
+
+def _mask_range(mask: int) -> Optional[List[int]]:
+    if not mask:
+        return None
+    return [(mask & -mask).bit_length() - 1, mask.bit_length() - 1]
+
+
+class StatModel:
+    """선택 그래프(노드별 앞의 두 자식)와 노드별 스탯 변화 (무작위면 None)"""
+
+    def __init__(self, game_dict: Dict[str, Any]):
+        nodes = game_dict.get("nodes") or []
+        graph = CompactGraph((node["id"] for node in nodes), game_dict.get("edges") or [])
+        self.ids = graph.ids
+        self.start = graph.start_node()
+        offsets = graph.offsets.tolist()
+        targets = graph.targets.tolist()
+        self.choices: List[List[int]] = [
+            targets[offsets[i]:offsets[i + 1]][:MAX_CHOICES] for i in range(len(self.ids))
+        ]
+        # 순환 판정은 실제로 고를 수 있는 선택지만으로 함
+        self.choice_graph = CompactGraph.from_children(self.ids, self.choices)
+
+        by_id = {str(node["id"]): node for node in nodes}
+        self.changes: List[Optional[List[int]]] = [
+            parse_stat_changes(by_id[node_id].get("statChanges")) for node_id in self.ids
+        ]
+        initial = (game_dict.get("gameConfig") or {}).get("initialStats") or {}
+        # 범위를 벗어난 초기값도 게임 오버 여부는 같으므로 0~100으로 자름
+        self.initial = tuple(
+            min(STAT_MAX, max(0, int(initial.get(key, DEFAULT_STAT)))) for key in STAT_KEYS
+        )
+
+
+def _alive(state: Tuple[int, ...]) -> bool:
+    return all(0 < value < STAT_MAX for value in state)
+
+
+def _explore_states(model: StatModel, limit: int) -> Optional[List[Set[Tuple[int, ...]]]]:
+    """노드별 도착 상태 집합 (상태가 limit을 넘거나 무작위 변화 노드에 도달하면 None)"""
+    states: List[Set[Tuple[int, ...]]] = [set() for _ in model.ids]
+    states[model.start].add(model.initial)
+    queue = deque([(model.start, model.initial)])
+    total = 1
+    while queue:
+        node, state = queue.popleft()
+        if not _alive(state):
+            continue
+        for child in model.choices[node]:
+            change = model.changes[child]
+            if change is None:
+                return None
+            arrived = tuple(min(STAT_MAX, max(0, value + delta)) for value, delta in zip(state, change))
+            if arrived in states[child]:
+                continue
+            total += 1
+            if total > limit:
+                return None
+            states[child].add(arrived)
+            queue.append((child, arrived))
+    return states
+
+
+def _propagate_masks(model: StatModel) -> List[List[int]]:
+    """노드별 스탯 값 집합 (SCC 위상 순서로 전파, 순환 안에서는 고정점까지 반복)"""
+    n = len(model.ids)
+    stat_count = len(STAT_KEYS)
+    masks = [[0] * stat_count for _ in range(n)]
+    masks[model.start] = [1 << value for value in model.initial]
+
+    components = model.choice_graph.strongly_connected_components()
+    component_of = [0] * n
+    for c, members in enumerate(components):
+        for member in members:
+            component_of[member] = c
+
+    for c in range(len(components) - 1, -1, -1):
+        work = deque(member for member in components[c] if any(masks[member]))
+        queued = set(work)
+        while work:
+            node = work.popleft()
+            queued.discard(node)
+            alive = [mask & ALIVE_MASK for mask in masks[node]]
+            # 어떤 스탯이든 게임을 이어갈 값이 없으면 이 노드에서 항상 게임 오버
+            if not all(alive):
+                continue
+            for child in model.choices[node]:
+                change = model.changes[child]
+                if change is None:
+                    arrived = [_spread(mask) for mask in alive]
+                else:
+                    arrived = [_shift(mask, delta) for mask, delta in zip(alive, change)]
+                current = masks[child]
+                merged = [old | new for old, new in zip(current, arrived)]
+                if merged != current:
+                    masks[child] = merged
+                    # 같은 순환 안의 노드만 다시 처리 (이후 SCC는 차례가 오면 한 번에 처리)
+                    if component_of[child] == c and child not in queued:
+                        queued.add(child)
+                        work.append(child)
+    return masks
+
+
+def analyze_stat_ranges(game_dict: Dict[str, Any], state_limit: int = JOINT_STATE_LIMIT) -> Dict[str, Any]:
+    model = StatModel(game_dict)
+    ids = model.ids
+    result: Dict[str, Any] = {
+        "exact": True,
+        "startNode": ids[model.start] if model.start is not None else None,
+        "initialStats": dict(zip(STAT_KEYS, model.initial)),
+        "nodes": {},
+        "reachableEndings": [],
+        "unreachableEndings": [],
+        "unreachableNodes": [],
+        "gameOverNodes": [],
+    }
+    if model.start is None:
+        return result
+
+    # 노드별 (스탯 범위, 게임을 이어갈 수 있는지, 게임 오버가 날 수 있는지)
+    summaries: List[Optional[Tuple[List[Optional[List[int]]], bool, bool]]] = [None] * len(ids)
+    states = _explore_states(model, state_limit)
+    if states is not None:
+        for i, node_states in enumerate(states):
+            if not node_states:
+                continue
+            columns = list(zip(*node_states))
+            alive = [_alive(state) for state in node_states]
+            summaries[i] = ([[min(column), max(column)] for column in columns], any(alive), not all(alive))
+    else:
+        result["exact"] = False
+        dead = FULL_MASK & ~ALIVE_MASK
+        for i, masks in enumerate(_propagate_masks(model)):
+            if not any(masks):
+                continue
+            summaries[i] = (
+                [_mask_range(mask) for mask in masks],
+                all(mask & ALIVE_MASK for mask in masks),
+                any(mask & dead for mask in masks),
+            )
+
+    for i, summary in enumerate(summaries):
+        is_ending = not model.choices[i]
+        if summary is None:
+            result["unreachableNodes"].append(ids[i])
+            if is_ending:
+                result["unreachableEndings"].append(ids[i])
+            continue
+        ranges, can_continue, can_game_over = summary
+        result["nodes"][ids[i]] = {
+            "stats": dict(zip(STAT_KEYS, ranges)),
+            "canContinue": can_continue,
+            "canGameOver": can_game_over,
+        }
+        if can_game_over:
+            result["gameOverNodes"].append(ids[i])
+        if is_ending:
+            # 도착은 하지만 항상 게임 오버가 먼저 나는 엔딩은 도달 불가
+            (result["reachableEndings"] if can_continue else result["unreachableEndings"]).append(ids[i])
+    return result
+
+
+def stat_ranges_json(game_dict: Dict[str, Any], state_limit: int = JOINT_STATE_LIMIT) -> bytes:
+    return json.dumps(analyze_stat_ranges(game_dict, state_limit), ensure_ascii=False, separators=(",", ":")).encode('utf-8')
@@ -4,12 +4,45 @@
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import json
+from contextlib import asynccontextmanager
+import asyncio
+import os
 import shutil
 from pathlib import Path
 from datetime import datetime, timedelta
 
-app = FastAPI(title="Storage Health Monitor", version="1.0.0")
+from game_store import create_game_store
+from image_store import ImageStore
+from storage_stats import StorageStats, run_storage_stats, format_bytes
+
+# 디렉토리 설정
+GAMES_DIR = Path(os.getenv("GAMES_STORAGE_PATH", "saved_games"))
+UPLOAD_DIR = Path("uploads")
+
+# 별도 프로세스이므로 저장 알림을 받지 못함 → 저장소 요약과의 주기적 대조로만 갱신
+STORAGE_STATS_RECONCILE_INTERVAL = float(os.getenv("STORAGE_STATS_RECONCILE_INTERVAL", "60"))
+STORAGE_STATS_SNAPSHOT_INTERVAL = float(os.getenv("STORAGE_STATS_SNAPSHOT_INTERVAL", "300"))
+game_store = create_game_store(GAMES_DIR, prepare_import=ImageStore(UPLOAD_DIR).externalize_game)
+storage_stats = StorageStats(history_size=int(os.getenv("STORAGE_STATS_HISTORY", "288")))
+
+def current_summaries():
+    """다른 프로세스(메인 서버)의 변경을 반영한 게임 요약 목록"""
+    game_store.refresh()
+    return game_store.list_summaries()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(lambda: storage_stats.reconcile(current_summaries(), UPLOAD_DIR))
+    stats_task = asyncio.create_task(run_storage_stats(
+        storage_stats, current_summaries, UPLOAD_DIR,
+        reconcile_interval=STORAGE_STATS_RECONCILE_INTERVAL,
+        snapshot_interval=STORAGE_STATS_SNAPSHOT_INTERVAL,
+    ))
+    yield
+    stats_task.cancel()
+    game_store.close()
+
+app = FastAPI(title="Storage Health Monitor", version="1.0.0", lifespan=lifespan)
 
 # CORS 설정
 app.add_middleware(
@@ -20,21 +53,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 디렉토리 설정
-GAMES_DIR = Path("saved_games")
-UPLOAD_DIR = Path("uploads")
-
-def format_bytes(bytes_value):
-    """바이트를 읽기 쉬운 형태로 변환"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_value < 1024.0:
-            return f"{bytes_value:.2f} {unit}"
-        bytes_value /= 1024.0
-    return f"{bytes_value:.2f} TB"
-
 @app.get("/")
 def root():
-    return {"message": "Storage Health Monitor API", "endpoints": ["/health", "/storage/health", "/storage/cleanup"]}
+    return {"message": "Storage Health Monitor API", "endpoints": ["/health", "/storage/health", "/storage/history", "/storage/cleanup"]}
 
 @app.get("/health")
 def basic_health():
@@ -44,31 +65,19 @@ def basic_health():
 def storage_health_check():
     """스토리지 사용량 및 상태 모니터링"""
     try:
-        # 게임 파일 통계
-        game_files = list(GAMES_DIR.glob("*.json"))
-        total_games = len(game_files)
-        
-        # 각 게임 파일 크기 계산
-        total_size_bytes = 0
-        largest_file_size = 0
-        smallest_file_size = float('inf')
-        
-        for game_file in game_files:
-            try:
-                size = game_file.stat().st_size
-                total_size_bytes += size
-                largest_file_size = max(largest_file_size, size)
-                smallest_file_size = min(smallest_file_size, size)
-            except:
-                continue
+        # 게임/이미지 통계 (주기적으로 대조한 메모리 카운터)
+        snapshot = storage_stats.snapshot()
+        total_games = snapshot["games"]["count"]
+        total_size_bytes = snapshot["games"]["totalBytes"]
+        largest_file_size = snapshot["games"]["largestBytes"]
+        smallest_file_size = snapshot["games"]["smallestBytes"]
         
         # 평균 파일 크기
         avg_file_size = total_size_bytes / total_games if total_games > 0 else 0
         
         # 이미지 파일 통계
-        image_files = list(UPLOAD_DIR.glob("*"))
-        total_images = len([f for f in image_files if f.is_file()])
-        total_image_size_bytes = sum(f.stat().st_size for f in image_files if f.is_file())
+        total_images = snapshot["images"]["count"]
+        total_image_size_bytes = snapshot["images"]["totalBytes"]
         
         # 디스크 사용량
         try:
@@ -81,25 +90,9 @@ def storage_health_check():
             total_disk = used_disk = free_disk = disk_usage_percent = None
         
         # 최근 활동 통계
-        now = datetime.now()
-        games_24h = games_7d = games_30d = 0
-        
-        for game_file in game_files:
-            try:
-                with open(game_file, 'r', encoding='utf-8') as f:
-                    game_data = json.load(f)
-                created_at_str = game_data.get('createdAt', '')
-                if created_at_str:
-                    created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                    
-                    if now - created_at <= timedelta(hours=24):
-                        games_24h += 1
-                    if now - created_at <= timedelta(days=7):
-                        games_7d += 1
-                    if now - created_at <= timedelta(days=30):
-                        games_30d += 1
-            except:
-                continue
+        games_24h = snapshot["games"]["last24h"]
+        games_7d = snapshot["games"]["last7d"]
+        games_30d = snapshot["games"]["last30d"]
         
         # 결과 구성
         result = {
@@ -111,12 +104,13 @@ def storage_health_check():
                 "total_size_bytes": total_size_bytes,
                 "average_size": format_bytes(avg_file_size),
                 "largest_size": format_bytes(largest_file_size) if total_games > 0 else "0 B",
-                "smallest_size": format_bytes(smallest_file_size) if total_games > 0 and smallest_file_size != float('inf') else "0 B",
+                "smallest_size": format_bytes(smallest_file_size) if total_games > 0 else "0 B",
                 "recent_activity": {
                     "last_24h": games_24h,
                     "last_7d": games_7d,
                     "last_30d": games_30d
-                }
+                },
+                "daily_created": storage_stats.daily_histogram(days=30)
             },
             "images": {
                 "total_count": total_images,
@@ -126,7 +120,9 @@ def storage_health_check():
             "storage_paths": {
                 "games_directory": str(GAMES_DIR),
                 "images_directory": str(UPLOAD_DIR)
-            }
+            },
+            "game_store": game_store.describe(),
+            "stats": storage_stats.describe()
         }
         
         # 디스크 정보 추가
@@ -146,8 +142,8 @@ def storage_health_check():
                 result["status"] = "caution"
                 result["warnings"] = ["⚠️ 디스크 사용량이 80%를 초과했습니다."]
         
-        # 게임 파일 수 경고
-        if total_games > 1000:
+        # 게임 파일 수 경고 (파일 저장소에서만 의미 있음)
+        if game_store.backend == "file" and total_games > 1000:
             if "warnings" not in result:
                 result["warnings"] = []
             result["warnings"].append(f"📁 게임 파일 수가 {total_games}개로 많습니다. 정리를 고려해보세요.")
@@ -163,6 +159,16 @@ def storage_health_check():
             "images": {"total_count": 0, "total_size": "0 B"}
         }
 
+@app.get("/storage/history")
+def storage_history(limit: int = 288):
+    """주기적으로 기록한 스토리지 통계 스냅샷 (오래된 것부터)"""
+    history = list(storage_stats.history)[-limit:] if limit > 0 else []
+    return {
+        "interval_seconds": STORAGE_STATS_SNAPSHOT_INTERVAL,
+        "count": len(history),
+        "snapshots": history
+    }
+
 @app.post("/storage/cleanup")
 def cleanup_storage(days_old: int = 30, dry_run: bool = True):
     """오래된 게임 파일 정리"""
@@ -171,36 +177,25 @@ def cleanup_storage(days_old: int = 30, dry_run: bool = True):
         files_to_delete = []
         total_size_to_free = 0
         
-        for game_file in GAMES_DIR.glob("*.json"):
-            try:
-                with open(game_file, 'r', encoding='utf-8') as f:
-                    game_data = json.load(f)
-                
-                created_at_str = game_data.get('createdAt', '')
-                if created_at_str:
-                    created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                    
-                    if created_at < cutoff_date:
-                        file_size = game_file.stat().st_size
-                        files_to_delete.append({
-                            "file": game_file.name,
-                            "created_at": created_at.isoformat(),
-                            "size_bytes": file_size,
-                            "title": game_data.get('title', 'Unknown')
-                        })
-                        total_size_to_free += file_size
-                    
-            except Exception as e:
-                continue
+        # 생성일시 인덱스로 오래된 게임 조회 (게임 본문은 읽지 않음)
+        game_store.refresh()
+        for summary in game_store.created_before(cutoff_date):
+            files_to_delete.append({
+                "id": summary["id"],
+                "file": game_store.location(summary["id"]),
+                "created_at": summary["createdAt"],
+                "size_bytes": summary["sizeBytes"],
+                "title": summary.get("title") or 'Unknown'
+            })
+            total_size_to_free += summary["sizeBytes"]
         
         # dry_run이 False인 경우에만 실제 삭제
         deleted_files = []
         if not dry_run:
             for file_info in files_to_delete:
                 try:
-                    file_path = GAMES_DIR / file_info["file"]
-                    file_path.unlink()
-                    deleted_files.append(file_info)
+                    if game_store.delete(file_info["id"]):
+                        deleted_files.append(file_info)
                 except Exception as e:
                     continue
         
@@ -0,0 +1,228 @@
+"""
+스토리지 통계 카운터
+
+게임/이미지를 저장하거나 삭제할 때마다 갱신되는 메모리 카운터입니다.
+/api/storage/health는 파일을 훑지 않고 이 카운터로 바로 응답하며,
+백그라운드 작업이 주기적으로 실제 저장소와 대조(reconcile)해 어긋난 값을 바로잡습니다.
+"""
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from game_store import parse_created_at
+
+logger = logging.getLogger(__name__)
+
+
+def format_bytes(bytes_value):
+    """바이트를 읽기 쉬운 형태로 변환"""
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if bytes_value < 1024.0:
+            return f"{bytes_value:.2f} {unit}"
+        bytes_value /= 1024.0
+    return f"{bytes_value:.2f} TB"
+
+
+class StorageStats:
+    def __init__(self, history_size: int = 288):
+        self._lock = threading.Lock()
+        # 게임: id → (크기, 생성일시)
+        self._games: Dict[str, tuple] = {}
+        self._game_bytes = 0
+        self._sorted_sizes: List[int] = []
+        self._sorted_created: List[datetime] = []
+        self._daily_created: Counter = Counter()
+        # 이미지: 파일명 → 크기
+        self._images: Dict[str, int] = {}
+        self._image_bytes = 0
+        # 대조 중에 들어온 변경 (대조 결과에 다시 적용)
+        self._pending: Optional[list] = None
+
+        self.last_reconciled_at: Optional[str] = None
+        self.last_reconcile_seconds: Optional[float] = None
+        self.last_drift: Dict[str, int] = {}
+        self.history: deque = deque(maxlen=history_size)
+
+    # 게임
+    def _add_game(self, game_id: str, size: int, created_at: Optional[datetime]):
+        self._games[game_id] = (size, created_at)
+        self._game_bytes += size
+        bisect.insort(self._sorted_sizes, size)
+        if created_at is not None:
+            bisect.insort(self._sorted_created, created_at)
+            self._daily_created[created_at.date().isoformat()] += 1
+
+    def _remove_game(self, game_id: str):
+        entry = self._games.pop(game_id, None)
+        if entry is None:
+            return
+        size, created_at = entry
+        self._game_bytes -= size
+        _remove_sorted(self._sorted_sizes, size)
+        if created_at is not None:
+            _remove_sorted(self._sorted_created, created_at)
+            day = created_at.date().isoformat()
+            self._daily_created[day] -= 1
+            if self._daily_created[day] <= 0:
+                del self._daily_created[day]
+
+    def game_saved(self, summary: Dict[str, Any]):
+        """GameStore 저장 알림"""
+        try:
+            created_at = parse_created_at(summary.get("createdAt"))
+        except ValueError:
+            created_at = None
+        with self._lock:
+            self._remember("game_saved", summary)
+            self._remove_game(summary["id"])
+            self._add_game(summary["id"], summary["sizeBytes"], created_at)
+
+    def game_deleted(self, game_id: str):
+        """GameStore 삭제 알림"""
+        with self._lock:
+            self._remember("game_deleted", game_id)
+            self._remove_game(game_id)
+
+    # 이미지
+    def image_added(self, filename: str, size: int):
+        with self._lock:
+            self._remember("image_added", filename, size)
+            self._image_bytes += size - self._images.get(filename, 0)
+            self._images[filename] = size
+
+    def image_removed(self, filename: str):
+        with self._lock:
+            self._remember("image_removed", filename)
+            self._image_bytes -= self._images.pop(filename, 0)
+
+    def _remember(self, method: str, *args):
+        if self._pending is not None:
+            self._pending.append((method, args))
+
+    # 대조
+    def reconcile(self, summaries: Iterable[Dict[str, Any]], image_dir: Path):
+        """
+        저장소 요약 목록과 이미지 디렉토리로 카운터를 다시 계산 (백그라운드 스레드에서 호출)
+
+        게임 본문은 읽지 않으며(요약 인덱스 사용), 이미지는 stat만 합니다.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._pending = []
+        fresh = StorageStats()
+        try:
+            for summary in summaries:
+                fresh.game_saved(summary)
+            for image_file in image_dir.glob("*"):
+                try:
+                    if image_file.is_file() and not image_file.name.startswith("."):
+                        fresh.image_added(image_file.name, image_file.stat().st_size)
+                except OSError:
+                    continue
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            for method, args in self._pending:
+                getattr(fresh, method)(*args)
+            self._pending = None
+            self.last_drift = {
+                "games": len(fresh._games) - len(self._games),
+                "gameBytes": fresh._game_bytes - self._game_bytes,
+                "images": len(fresh._images) - len(self._images),
+                "imageBytes": fresh._image_bytes - self._image_bytes,
+            }
+            self._games = fresh._games
+            self._game_bytes = fresh._game_bytes
+            self._sorted_sizes = fresh._sorted_sizes
+            self._sorted_created = fresh._sorted_created
+            self._daily_created = fresh._daily_created
+            self._images = fresh._images
+            self._image_bytes = fresh._image_bytes
+            self.last_reconciled_at = datetime.now().isoformat()
+            self.last_reconcile_seconds = round(time.perf_counter() - started, 4)
+
+    # 조회
+    def snapshot(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """현재 카운터 값 (O(log n))"""
+        now = now or datetime.now()
+        with self._lock:
+            created = self._sorted_created
+            return {
+                "timestamp": now.isoformat(),
+                "games": {
+                    "count": len(self._games),
+                    "totalBytes": self._game_bytes,
+                    "largestBytes": self._sorted_sizes[-1] if self._sorted_sizes else 0,
+                    "smallestBytes": self._sorted_sizes[0] if self._sorted_sizes else 0,
+                    "last24h": len(created) - bisect.bisect_left(created, now - timedelta(hours=24)),
+                    "last7d": len(created) - bisect.bisect_left(created, now - timedelta(days=7)),
+                    "last30d": len(created) - bisect.bisect_left(created, now - timedelta(days=30)),
+                },
+                "images": {
+                    "count": len(self._images),
+                    "totalBytes": self._image_bytes,
+                },
+            }
+
+    def daily_histogram(self, days: int = 30, now: Optional[datetime] = None) -> Dict[str, int]:
+        """최근 days일의 일별 생성 수 (오래된 날짜부터)"""
+        today = (now or datetime.now()).date()
+        with self._lock:
+            return {
+                day: self._daily_created.get(day, 0)
+                for day in ((today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1))
+            }
+
+    def record_snapshot(self) -> Dict[str, Any]:
+        snapshot = self.snapshot()
+        self.history.append(snapshot)
+        return snapshot
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "lastReconciledAt": self.last_reconciled_at,
+            "lastReconcileSeconds": self.last_reconcile_seconds,
+            "lastDrift": self.last_drift,
+            "historySize": len(self.history),
+        }
+
+
+def _remove_sorted(values: list, value):
+    position = bisect.bisect_left(values, value)
+    if position < len(values) and values[position] == value:
+        del values[position]
+
+
+async def run_storage_stats(
+    stats: StorageStats,
+    reconcile_source,
+    image_dir: Path,
+    reconcile_interval: float,
+    snapshot_interval: float,
+):
+    """
+    주기적으로 스냅샷을 기록하고 reconcile_interval마다 저장소와 대조하는 백그라운드 루프
+
+    reconcile_source는 게임 요약 목록을 반환하는 동기 함수이며 스레드에서 실행됩니다.
+    """
+    last_reconcile = 0.0
+    while True:
+        if time.monotonic() - last_reconcile >= reconcile_interval:
+            try:
+                await asyncio.to_thread(lambda: stats.reconcile(reconcile_source(), image_dir))
+                if any(stats.last_drift.values()):
+                    logger.info(f"스토리지 통계 보정: {stats.last_drift}")
+            except Exception as e:
+                logger.error(f"스토리지 통계 대조 오류: {str(e)}")
+            last_reconcile = time.monotonic()
+        stats.record_snapshot()
+        await asyncio.sleep(snapshot_interval)
@@ -0,0 +1,283 @@
+"""
+스토리지 정리 작업
+
+- 만료 게임 정리: 생성일시 인덱스에서 오래된 게임부터 작은 배치로 나눠 삭제 (배치 사이 대기)
+- 버전 정리: 게임을 삭제한 뒤 어떤 버전도 참조하지 않는 노드 객체 정리 (game_versions.GameVersionStore.prune)
+- 고아 이미지 GC: 모든 게임 본문, 버전 기록의 노드 객체, 플레이용 번들에서 /uploads/ 참조를 모은 뒤(mark)
+  어떤 게임이나 버전, 번들도 참조하지 않고 유예 시간이 지난 업로드 파일을 삭제(sweep)
+
+작업 시간, 확보한 용량, 남은 정리 대상 수는 stats()로 확인할 수 있습니다.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from game_bundle import BundleStore
+from game_store import GameStore
+from game_versions import GameVersionStore
+from image_store import ImageInUse, ImageReferences, ImageStore, upload_references
+
+logger = logging.getLogger(__name__)
+
+
+class StorageSweeper:
+    def __init__(
+        self,
+        game_store: GameStore,
+        image_store: ImageStore,
+        game_ttl_days: float = 0,
+        image_grace_seconds: float = 24 * 3600,
+        batch_size: int = 50,
+        batch_pause: float = 1.0,
+        version_store: Optional[GameVersionStore] = None,
+        bundle_store: Optional[BundleStore] = None,
+        image_references: Optional[ImageReferences] = None,
+    ):
+        self.game_store = game_store
+        self.image_store = image_store
+        self.game_ttl_days = game_ttl_days
+        self.image_grace_seconds = image_grace_seconds
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.version_store = version_store
+        self.bundle_store = bundle_store
+        self.image_references = image_references
+
+        # mark 단계 도중 저장된 게임 (sweep 전에 다시 확인)
+        self._marking = False
+        self._saved_during_mark: Set[str] = set()
+        self._mark_lock = threading.Lock()
+        self._run_lock = asyncio.Lock()
+
+        self.counters = {
+            "gameSweeps": 0,
+            "gamesDeleted": 0,
+            "gameBytesFreed": 0,
+            "imageSweeps": 0,
+            "imagesDeleted": 0,
+            "imageBytesFreed": 0,
+        }
+        self.last_game_sweep: Dict[str, Any] = {}
+        self.last_image_sweep: Dict[str, Any] = {}
+
+    # GameStore 알림
+    def game_saved(self, summary: Dict[str, Any]):
+        with self._mark_lock:
+            if self._marking:
+                self._saved_during_mark.add(summary["id"])
+
+    def game_deleted(self, game_id: str):
+        pass
+
+    # 만료 게임
+    async def sweep_expired_games(self, days_old: float, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        days_old일 이전에 생성된 게임 정리
+
+        dry_run이면 대상만 보고하고, 아니면 batch_size개씩 삭제하며 배치 사이에 batch_pause초 쉽니다.
+        """
+        cutoff = datetime.now() - timedelta(days=days_old)
+        started = time.perf_counter()
+
+        if dry_run:
+            expired = await self.game_store.acreated_before(cutoff)
+            return {
+                "cutoff": cutoff.isoformat(),
+                "found": expired,
+                "deleted": [],
+                "bytesFreed": 0,
+                "backlog": len(expired),
+                "seconds": round(time.perf_counter() - started, 4),
+            }
+
+        async with self._run_lock:
+            deleted: List[Dict[str, Any]] = []
+            found: List[Dict[str, Any]] = []
+            seen: Set[str] = set()
+            while True:
+                batch = await self.game_store.acreated_before(cutoff, self.batch_size)
+                # 삭제에 실패한 게임이 계속 다시 조회되는 경우 중단
+                batch = [summary for summary in batch if summary["id"] not in seen]
+                if not batch:
+                    break
+                found.extend(batch)
+                seen.update(summary["id"] for summary in batch)
+                for summary in batch:
+                    try:
+                        if await self.game_store.adelete(summary["id"]):
+                            deleted.append(summary)
+                    except Exception as e:
+                        logger.error(f"만료 게임 삭제 오류: {summary['id']}, {str(e)}")
+                if len(batch) < self.batch_size:
+                    break
+                await asyncio.sleep(self.batch_pause)
+
+            backlog = await asyncio.to_thread(self.game_store.count_created_before, cutoff)
+            bytes_freed = sum(summary["sizeBytes"] for summary in deleted)
+            if deleted and self.version_store is not None:
+                try:
+                    bytes_freed += (await self.version_store.aprune())["bytesFreed"]
+                except Exception as e:
+                    logger.error(f"버전 노드 객체 정리 오류: {str(e)}")
+            self.counters["gameSweeps"] += 1
+            self.counters["gamesDeleted"] += len(deleted)
+            self.counters["gameBytesFreed"] += bytes_freed
+            self.last_game_sweep = {
+                "finishedAt": datetime.now().isoformat(),
+                "seconds": round(time.perf_counter() - started, 4),
+                "deleted": len(deleted),
+                "bytesFreed": bytes_freed,
+                "backlog": backlog,
+            }
+            return {
+                "cutoff": cutoff.isoformat(),
+                "found": found,
+                "deleted": deleted,
+                "bytesFreed": bytes_freed,
+                "backlog": backlog,
+                "seconds": self.last_game_sweep["seconds"],
+            }
+
+    # 고아 이미지
+    def _references(self, game_ids) -> Set[str]:
+        referenced = set()
+        for game_id in game_ids:
+            content = self.game_store.get_bytes(game_id)
+            if content is not None:
+                referenced.update(upload_references(content))
+        return referenced
+
+    def _mark(self) -> Set[str]:
+        """모든 게임, 버전 기록, 번들이 참조하는 업로드 파일 이름"""
+        referenced = self._references(summary["id"] for summary in self.game_store.list_summaries())
+        if self.version_store is not None:
+            # 이전 버전으로 되돌리거나 포크할 때 다시 쓰이는 노드의 이미지도 유지
+            for content in self.version_store.iter_node_data():
+                referenced.update(upload_references(content))
+        if self.bundle_store is not None:
+            # 번들 컴파일 때 인라인 이미지를 옮겨 만든 파일은 번들만 참조함
+            referenced.update(self.bundle_store.iter_upload_files())
+        return referenced
+
+    def _delete_image(self, filename: str) -> bool:
+        """
+        고아 이미지 하나 삭제
+
+        참조 색인이 있으면 삭제 직전에 한 번 더 확인합니다 (mark 이후 번들 컴파일이 옮긴 인라인 이미지 등).
+        """
+        if self.image_references is None:
+            return self.image_store.delete(filename)
+        try:
+            return self.image_references.delete_unreferenced(filename, self.image_store.delete)
+        except ImageInUse:
+            return False
+
+    def find_orphaned_images(self, referenced: Set[str]) -> List[Dict[str, Any]]:
+        """참조되지 않고 유예 시간이 지난 업로드 파일"""
+        cutoff = time.time() - self.image_grace_seconds
+        orphans = []
+        for path in self.image_store.directory.iterdir():
+            if path.name.startswith(".") or path.name in referenced:
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.is_file() and stat.st_mtime < cutoff:
+                orphans.append({"file": path.name, "size_bytes": stat.st_size})
+        return orphans
+
+    async def sweep_orphaned_images(self, dry_run: bool = False) -> Dict[str, Any]:
+        started = time.perf_counter()
+        async with self._run_lock:
+            with self._mark_lock:
+                self._marking = True
+                self._saved_during_mark = set()
+            try:
+                referenced = await asyncio.to_thread(self._mark)
+                orphans = await asyncio.to_thread(self.find_orphaned_images, referenced)
+                checked: Set[str] = set()
+
+                async def exclude_late_references(candidates):
+                    # mark 이후 저장된 게임이 참조하는 파일은 제외
+                    with self._mark_lock:
+                        saved = self._saved_during_mark - checked
+                    if not saved:
+                        return candidates
+                    checked.update(saved)
+                    late_references = await asyncio.to_thread(self._references, saved)
+                    referenced.update(late_references)
+                    return [orphan for orphan in candidates if orphan["file"] not in referenced]
+
+                orphans = await exclude_late_references(orphans)
+                deleted: List[Dict[str, Any]] = []
+                if not dry_run:
+                    for start in range(0, len(orphans), self.batch_size):
+                        if start:
+                            await asyncio.sleep(self.batch_pause)
+                        batch = await exclude_late_references(orphans[start:start + self.batch_size])
+                        for orphan in batch:
+                            try:
+                                if await asyncio.to_thread(self._delete_image, orphan["file"]):
+                                    deleted.append(orphan)
+                            except OSError as e:
+                                logger.error(f"고아 이미지 삭제 오류: {orphan['file']}, {str(e)}")
+            finally:
+                with self._mark_lock:
+                    self._marking = False
+                    self._saved_during_mark = set()
+
+            bytes_freed = sum(orphan["size_bytes"] for orphan in deleted)
+            orphans = [orphan for orphan in orphans if orphan["file"] not in referenced]
+            result = {
+                "referenced": len(referenced),
+                "found": orphans,
+                "deleted": deleted,
+                "bytesFreed": bytes_freed,
+                "backlog": len(orphans) - len(deleted),
+                "seconds": round(time.perf_counter() - started, 4),
+            }
+            if not dry_run:
+                self.counters["imageSweeps"] += 1
+                self.counters["imagesDeleted"] += len(deleted)
+                self.counters["imageBytesFreed"] += bytes_freed
+                self.last_image_sweep = {
+                    "finishedAt": datetime.now().isoformat(),
+                    "seconds": result["seconds"],
+                    "deleted": len(deleted),
+                    "bytesFreed": bytes_freed,
+                    "backlog": result["backlog"],
+                }
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "gameTtlDays": self.game_ttl_days,
+            "imageGraceSeconds": self.image_grace_seconds,
+            **self.counters,
+            "lastGameSweep": self.last_game_sweep,
+            "lastImageSweep": self.last_image_sweep,
+        }
+
+
+async def run_storage_sweeper(sweeper: StorageSweeper, interval: float, image_gc: bool):
+    """interval초마다 만료 게임(TTL 설정 시)과 고아 이미지(image_gc 시) 정리"""
+    while True:
+        await asyncio.sleep(interval)
+        if sweeper.game_ttl_days > 0:
+            try:
+                result = await sweeper.sweep_expired_games(sweeper.game_ttl_days)
+                if result["deleted"]:
+                    logger.info(f"만료 게임 정리: {len(result['deleted'])}개, {result['bytesFreed']} bytes")
+            except Exception as e:
+                logger.error(f"만료 게임 정리 오류: {str(e)}")
+        if image_gc:
+            try:
+                result = await sweeper.sweep_orphaned_images()
+                if result["deleted"]:
+                    logger.info(f"고아 이미지 정리: {len(result['deleted'])}개, {result['bytesFreed']} bytes")
+            except Exception as e:
+                logger.error(f"고아 이미지 정리 오류: {str(e)}")
@@ -0,0 +1,307 @@
+"""
+스토리 그래프 구조 분석
+
+노드를 0..n-1 정수로 바꾼 CSR 인접 배열(offsets/targets) 위에서 모든 지표를 O(V+E)로 계산합니다.
+
+- 순환: 반복형 Tarjan SCC (크기 2 이상이거나 자기 자신을 가리키는 SCC)
+- 깊이/경로 수/플레이 길이: SCC를 한 노드로 줄인 DAG를 위상 순서로 한 번 훑어 계산
+- 시작 노드: 프론트엔드(ReignsGame.js)와 같이 어떤 엣지의 target도 아닌 첫 노드, 없으면 첫 노드
+
+결과는 그래프 구조 해시별로 AnalysisCache에 보관하므로 같은 그래프를 다시 분석하면 바로 반환됩니다.
+"""
+import hashlib
+import json
+import threading
+from array import array
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+
+def graph_hash(node_ids: Iterable[str], edges: Iterable[Dict[str, Any]]) -> str:
+    """분석 결과에 영향을 주는 구조(노드 ID 순서, 엣지 source/target)만의 해시"""
+    digest = hashlib.sha256()
+    for node_id in node_ids:
+        digest.update(str(node_id).encode('utf-8'))
+        digest.update(b"\0")
+    digest.update(b"\1")
+    for edge in edges:
+        digest.update(f"{edge.get('source')}\0{edge.get('target')}\0".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class CompactGraph:
+    """정수 인덱스 CSR 그래프 (존재하지 않는 노드를 가리키는 엣지는 제외)"""
+
+    def __init__(self, node_ids: Iterable[str], edges: Iterable[Dict[str, Any]]):
+        self.ids: List[str] = list(dict.fromkeys(str(node_id) for node_id in node_ids))
+        index = {node_id: i for i, node_id in enumerate(self.ids)}
+        n = len(self.ids)
+
+        sources = array('i')
+        targets = array('i')
+        # 존재하지 않는 노드와 이어진 엣지까지 포함한 target/source 여부 (루트/리프 판정은 프론트엔드와 동일)
+        self.targeted = bytearray(n)
+        self.sourced = bytearray(n)
+        self.ignored_edges = 0
+        for edge in edges:
+            target = index.get(edge.get("target"))
+            if target is not None:
+                self.targeted[target] = 1
+            source = index.get(edge.get("source"))
+            if source is not None:
+                self.sourced[source] = 1
+            if source is None or target is None:
+                self.ignored_edges += 1
+                continue
+            sources.append(source)
+            targets.append(target)
+
+        self.out_degree = array('i', bytes(4 * n))
+        self.in_degree = array('i', bytes(4 * n))
+        for source, target in zip(sources, targets):
+            self.out_degree[source] += 1
+            self.in_degree[target] += 1
+
+        self.offsets = array('i', bytes(4 * (n + 1)))
+        for i in range(n):
+            self.offsets[i + 1] = self.offsets[i] + self.out_degree[i]
+        self.targets = array('i', bytes(4 * len(targets)))
+        fill = array('i', self.offsets[:n])
+        for source, target in zip(sources, targets):
+            self.targets[fill[source]] = target
+            fill[source] += 1
+
+    @classmethod
+    def from_children(cls, node_ids: List[str], children: List[List[int]]) -> "CompactGraph":
+        """이미 정수 인덱스로 바꾼 자식 목록으로 만들기 (엣지 dict를 다시 만들지 않음)"""
+        graph = cls.__new__(cls)
+        n = len(node_ids)
+        graph.ids = list(node_ids)
+        graph.ignored_edges = 0
+        graph.out_degree = array('i', (len(targets) for targets in children))
+        graph.offsets = array('i', bytes(4 * (n + 1)))
+        for i in range(n):
+            graph.offsets[i + 1] = graph.offsets[i] + graph.out_degree[i]
+        graph.targets = array('i', (target for targets in children for target in targets))
+        graph.in_degree = array('i', bytes(4 * n))
+        graph.targeted = bytearray(n)
+        for target in graph.targets:
+            graph.in_degree[target] += 1
+            graph.targeted[target] = 1
+        graph.sourced = bytearray(1 if targets else 0 for targets in children)
+        return graph
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    def children(self, node: int):
+        return self.targets[self.offsets[node]:self.offsets[node + 1]]
+
+    def start_node(self) -> Optional[int]:
+        for i in range(len(self.ids)):
+            if not self.targeted[i]:
+                return i
+        return 0 if self.ids else None
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """반복형 Tarjan (결과는 역위상 순서: 후손 SCC가 먼저)"""
+        n = len(self.ids)
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        order = [-1] * n
+        low = [0] * n
+        on_stack = bytearray(n)
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+            while work:
+                node, position = work[-1]
+                if position < offsets[node + 1]:
+                    work[-1] = (node, position + 1)
+                    child = targets[position]
+                    if order[child] == -1:
+                        order[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = 1
+                        work.append((child, offsets[child]))
+                    elif on_stack[child] and order[child] < low[node]:
+                        low[node] = order[child]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+        return components
+
+
+def analyze_graph(graph: CompactGraph) -> Dict[str, Any]:
+    n = len(graph)
+    ids = graph.ids
+    out_degree = graph.out_degree
+    # 반복문 안에서는 array보다 list 인덱싱이 빠름
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+
+    # 순환 (SCC)
+    components = graph.strongly_connected_components()
+    component_of = [0] * n
+    for c, members in enumerate(components):
+        for member in members:
+            component_of[member] = c
+    cyclic = bytearray(len(components))
+    for c, members in enumerate(components):
+        if len(members) > 1 or members[0] in targets[offsets[members[0]]:offsets[members[0] + 1]]:
+            cyclic[c] = 1
+
+    # 시작 노드에서 도달 가능한 노드와 최소 선택 수 (BFS)
+    start = graph.start_node()
+    distance = [-1] * n
+    if start is not None:
+        distance[start] = 0
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            next_distance = distance[node] + 1
+            for position in range(offsets[node], offsets[node + 1]):
+                child = targets[position]
+                if distance[child] == -1:
+                    distance[child] = next_distance
+                    queue.append(child)
+
+    # SCC를 한 노드로 줄인 DAG를 위상 순서(Tarjan 결과의 역순)로 훑기
+    component_count = len(components)
+    depth = [0] * component_count          # 아무 루트에서나 가장 긴 거리
+    longest = [-1] * component_count       # 시작 노드에서 가장 긴 거리
+    path_count = [0] * component_count     # 시작 노드에서의 경로 수
+    unbounded = bytearray(component_count)  # 도달 경로에 순환이 있음
+    if start is not None:
+        start_component = component_of[start]
+        longest[start_component] = 0
+        path_count[start_component] = 1
+
+    for c in range(component_count - 1, -1, -1):
+        reached = longest[c] >= 0
+        if reached and cyclic[c]:
+            unbounded[c] = 1
+        next_depth = depth[c] + 1
+        next_longest = longest[c] + 1
+        for member in components[c]:
+            for position in range(offsets[member], offsets[member + 1]):
+                d = component_of[targets[position]]
+                if d == c:
+                    continue
+                if next_depth > depth[d]:
+                    depth[d] = next_depth
+                if reached:
+                    if next_longest > longest[d]:
+                        longest[d] = next_longest
+                    path_count[d] += path_count[c]
+                    if unbounded[c]:
+                        unbounded[d] = 1
+
+    leaves = [i for i in range(n) if not graph.sourced[i]]
+    endings = [i for i in range(n) if out_degree[i] == 0 and distance[i] >= 0]
+    unbounded_play = any(unbounded[component_of[i]] for i in range(n) if distance[i] >= 0)
+    ending_paths_unbounded = any(unbounded[component_of[i]] for i in endings)
+
+    cycles = [sorted(members) for c, members in enumerate(components) if cyclic[c]]
+    branching_sources = [out_degree[i] for i in range(n) if out_degree[i] > 0]
+
+    return {
+        "nodeCount": n,
+        "edgeCount": graph.edge_count,
+        "ignoredEdges": graph.ignored_edges,
+        "rootNodes": [ids[i] for i in range(n) if not graph.targeted[i]],
+        "leafNodes": [ids[i] for i in leaves],
+        "orphanNodes": [ids[i] for i in range(n) if not graph.targeted[i] and not graph.sourced[i]],
+        "maxDepth": max(depth) if component_count else 0,
+        "branchingFactor": round(sum(branching_sources) / len(branching_sources), 2) if branching_sources else 0,
+        "startNode": ids[start] if start is not None else None,
+        "unreachableNodes": [ids[i] for i in range(n) if distance[i] == -1],
+        "hasCycles": bool(cycles),
+        "cycles": [[ids[i] for i in cycle] for cycle in cycles],
+        "cycleNodes": [ids[i] for cycle in cycles for i in cycle],
+        # 시작 노드에서 각 노드까지의 경로 수 (순환을 거쳐 도달하면 null = 무한)
+        "pathCounts": {
+            ids[i]: (None if unbounded[component_of[i]] else path_count[component_of[i]])
+            for i in range(n) if distance[i] >= 0
+        },
+        "endingNodes": [ids[i] for i in endings],
+        "distinctEndings": len(endings),
+        "endingPaths": None if ending_paths_unbounded else sum(path_count[component_of[i]] for i in endings),
+        "shortestPlay": min((distance[i] for i in endings), default=None),
+        "longestPlay": None if unbounded_play else max((longest[component_of[i]] for i in endings), default=None),
+        "unboundedPlay": unbounded_play,
+    }
+
+
+class AnalysisCache:
+    """그래프 해시별 분석 결과(JSON 바이트) LRU 캐시"""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        # analyze_story는 워커 스레드에서 실행되므로 조회도 잠금
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            content = self._entries.get(key)
+            if content is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return content
+
+    def put(self, key: Hashable, content: bytes):
+        with self._lock:
+            self._entries[key] = content
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+def analyze_story(node_ids: List[str], edges: List[Dict[str, Any]], cache: Optional[AnalysisCache] = None) -> bytes:
+    """분석 결과 JSON 바이트 (cache가 있으면 그래프 해시로 재사용)"""
+    key = graph_hash(node_ids, edges)
+    if cache is not None:
+        content = cache.get(key)
+        if content is not None:
+            return content
+    analysis = analyze_graph(CompactGraph(node_ids, edges))
+    analysis["graphHash"] = key
+    content = json.dumps(analysis, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    if cache is not None:
+        cache.put(key, content)
+    return content
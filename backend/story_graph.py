@@ -0,0 +1,63 @@
+"""
+스토리 그래프(노드/엣지) 인접 인덱스와 순회 유틸리티
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+
+class GraphIndex:
+    """노드 ID 기준 부모/자식 인접 리스트"""
+
+    def __init__(self, node_ids: Iterable[str], edges: Iterable[Dict[str, Any]]):
+        self.node_ids: List[str] = list(dict.fromkeys(node_ids))
+        self.parents: Dict[str, List[str]] = {node_id: [] for node_id in self.node_ids}
+        self.children: Dict[str, List[str]] = {node_id: [] for node_id in self.node_ids}
+
+        # 존재하지 않는 노드를 가리키는 엣지는 무시 (프론트엔드와 동일)
+        for edge in edges:
+            source, target = edge.get("source"), edge.get("target")
+            if source in self.children and target in self.parents:
+                self.children[source].append(target)
+                self.parents[target].append(source)
+
+    def descendants(self, root_id: str) -> List[str]:
+        """루트 자신을 포함한 하위 노드 (BFS 순서)"""
+        if root_id not in self.children:
+            return []
+        seen = {root_id}
+        order = [root_id]
+        queue = deque([root_id])
+        while queue:
+            for child_id in self.children[queue.popleft()]:
+                if child_id not in seen:
+                    seen.add(child_id)
+                    order.append(child_id)
+                    queue.append(child_id)
+        return order
+
+    def topological_order(self, node_ids: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        선택한 노드들의 위상 정렬 (Kahn 알고리즘)
+
+        반환값: (정렬된 노드, 순환에 포함되어 정렬할 수 없는 노드)
+        """
+        selected: Set[str] = {node_id for node_id in node_ids if node_id in self.parents}
+        in_degree = {
+            node_id: sum(1 for parent_id in self.parents[node_id] if parent_id in selected)
+            for node_id in selected
+        }
+        # 입력 순서를 유지해 결과가 결정적이 되도록 함
+        queue = deque(node_id for node_id in self.node_ids if in_degree.get(node_id) == 0)
+        order = []
+        while queue:
+            node_id = queue.popleft()
+            order.append(node_id)
+            for child_id in self.children[node_id]:
+                if child_id in in_degree:
+                    in_degree[child_id] -= 1
+                    if in_degree[child_id] == 0:
+                        queue.append(child_id)
+
+        ordered = set(order)
+        cyclic = [node_id for node_id in self.node_ids if node_id in selected and node_id not in ordered]
+        return order, cyclic
@@ -0,0 +1,35 @@
+"""
+백엔드 테스트 공통 설정
+
+백엔드 모듈은 패키지가 아니라 backend/ 아래 평면 모듈이므로 테스트에서 바로 import할 수 있도록 경로에 추가합니다.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def make_game(game_id: str = "g1", created_at: str = "2024-01-01T00:00:00", **fields):
+    """노드 두 개(start → end)짜리 게임"""
+    game = {
+        "id": game_id,
+        "title": f"게임 {game_id}",
+        "description": "",
+        "nodes": [
+            {"id": "start", "label": "시작", "story": "처음", "choice": "", "statChanges": {}},
+            {"id": "end", "label": "끝", "story": "마지막", "choice": "간다", "statChanges": {"health": -1}},
+        ],
+        "edges": [{"id": "e1", "source": "start", "target": "end"}],
+        "gameConfig": {"storyTitle": "테스트"},
+        "createdAt": created_at,
+        "updatedAt": created_at,
+    }
+    game.update(fields)
+    return game
+
+
+@pytest.fixture
+def game_factory():
+    return make_game
@@ -0,0 +1,96 @@
+"""클라이언트별 요청 제한, 제공자별 입장 제어"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import admission
+from admission import ClientRateLimiter, ProviderLimiter, client_key
+
+
+def test_client_rate_limiter_rejects_after_burst():
+    limiter = ClientRateLimiter(rate=1, burst=2)
+    limiter.check("1.2.3.4")
+    limiter.check("1.2.3.4")
+    with pytest.raises(HTTPException) as error:
+        limiter.check("1.2.3.4")
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) >= 1
+    # 다른 클라이언트는 영향 없음
+    limiter.check("5.6.7.8")
+
+
+def test_client_key_prefers_forwarded_for():
+    assert client_key("10.0.0.1", "1.1.1.1, 10.0.0.2") == "1.1.1.1"
+    assert client_key("10.0.0.1", None) == "10.0.0.1"
+    assert client_key(None) == "unknown"
+
+
+def test_provider_limiter_queues_in_order():
+    async def scenario():
+        limiter = ProviderLimiter("claude", max_concurrency=1, queue_size=4, queue_timeout=1)
+        order = []
+
+        async def job(name):
+            async with limiter.slot():
+                order.append(name)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(job(i) for i in range(4)))
+        return limiter, order
+
+    limiter, order = asyncio.run(scenario())
+    assert order == [0, 1, 2, 3]
+    assert limiter.in_flight == 0
+    assert limiter.queued_total == 3
+
+
+def test_provider_limiter_rejects_when_queue_full():
+    async def scenario():
+        limiter = ProviderLimiter("claude", max_concurrency=1, queue_size=0, queue_timeout=1)
+        await limiter.acquire()
+        with pytest.raises(HTTPException) as error:
+            await limiter.acquire()
+        limiter.release()
+        return limiter, error.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert limiter.rejected == 1
+    assert limiter.in_flight == 0
+
+
+def test_provider_limiter_times_out_with_503():
+    async def scenario():
+        limiter = ProviderLimiter("claude", max_concurrency=1, queue_size=1, queue_timeout=0.01)
+        await limiter.acquire()
+        with pytest.raises(HTTPException) as error:
+            await limiter.acquire()
+        limiter.release()
+        return limiter, error.value
+
+    limiter, error = asyncio.run(scenario())
+    assert error.status_code == 503
+    assert limiter.timed_out == 1
+    assert limiter.queued == 0
+    assert limiter.in_flight == 0
+
+
+def test_provider_limiter_releases_slot_handed_over_at_timeout(monkeypatch):
+    """시간 초과와 동시에 넘겨받은 자리는 반납되어야 함 (그렇지 않으면 in_flight가 영구히 하나 남음)"""
+    limiter = ProviderLimiter("claude", max_concurrency=1, queue_size=1, queue_timeout=1)
+
+    async def handed_over_then_timed_out(waiter, timeout):
+        # 앞선 요청이 끝나며 자리를 넘겨준 직후 시간 초과
+        limiter.release()
+        raise asyncio.TimeoutError
+
+    async def scenario():
+        await limiter.acquire()
+        monkeypatch.setattr(admission.asyncio, "wait_for", handed_over_then_timed_out)
+        with pytest.raises(HTTPException):
+            await limiter.acquire()
+
+    asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    assert limiter.queued == 0
@@ -0,0 +1,71 @@
+"""플레이용 게임 번들 컴파일, 저장"""
+import asyncio
+import base64
+
+import pytest
+
+from game_bundle import BundleStore, compile_bundle
+from game_store import SQLiteGameStore
+from image_store import ImageInUse, ImageReferences, ImageStore
+
+INLINE_IMAGE = "data:image/png;base64," + base64.b64encode(b"inline").decode("ascii")
+
+
+@pytest.fixture
+def bundles(tmp_path):
+    game_store = SQLiteGameStore(tmp_path / "games.sqlite3")
+    image_store = ImageStore(tmp_path / "uploads")
+    references = ImageReferences(lambda: [])
+    bundles = BundleStore(
+        tmp_path / "bundles.sqlite3", game_store,
+        store_image=lambda value: image_store.store_data_uri(value)[0],
+        image_references=references,
+    )
+    game_store.add_observer(bundles)
+    return bundles, image_store, references
+
+
+def test_compile_bundle_indexes_children_and_assets(game_factory):
+    game = game_factory()
+    game["nodes"][0]["imageUrl"] = "/uploads/a.png"
+    game["nodes"][1]["imageUrl"] = "/uploads/a.png"
+    game["edges"].append({"id": "e2", "source": "start", "target": "missing"})
+    bundle = compile_bundle(game)
+    assert bundle["root"] == 0
+    assert [node["id"] for node in bundle["nodes"]] == ["start", "end"]
+    assert bundle["children"] == [[1], []]
+    assert bundle["assets"] == ["/uploads/a.png"]
+    assert bundle["nodes"][0]["image"] == bundle["nodes"][1]["image"] == 0
+
+
+def test_bundle_is_built_in_background_after_save(bundles, game_factory):
+    bundle_store, _, _ = bundles
+    game_store = bundle_store.game_store
+    game_store.put(game_factory())
+    bundle_store.flush()
+    info = bundle_store.current("g1")
+    assert info["sourceEtag"] == game_store.get_etag("g1")
+    assert bundle_store.get_bundle(info["hash"])["title"] == "게임 g1"
+
+    game_store.put(game_factory(title="바뀐 제목"))
+    # 컴파일 전에는 오래된 번들을 현재 번들로 쓰지 않고, 요청하면 바로 컴파일
+    assert asyncio.run(bundle_store.aensure("g1"))["sourceEtag"] == game_store.get_etag("g1")
+
+    game_store.delete("g1")
+    bundle_store.flush()
+    assert bundle_store.info("g1") is None
+    assert bundle_store.get_bundle(info["hash"]) is None
+
+
+def test_bundle_records_moved_inline_images(bundles, game_factory):
+    bundle_store, image_store, references = bundles
+    game = game_factory()
+    game["nodes"][0]["imageUrl"] = INLINE_IMAGE
+    bundle_store.game_store.put(game)
+    bundle_store.flush()
+
+    (filename,) = bundle_store.upload_files("g1")
+    assert list(bundle_store.iter_upload_files()) == [filename]
+    assert references.owners(filename) == {"g1"}
+    with pytest.raises(ImageInUse):
+        references.delete_unreferenced(filename, image_store.delete)
@@ -0,0 +1,27 @@
+"""저장된 게임에서 만드는 스토리 생성 컨텍스트"""
+from game_context import GameContextCache
+
+
+def test_game_context_applies_unsaved_edits(game_factory):
+    context = GameContextCache().get("g1", 1, game_factory)
+    nodes, graph = context.with_delta(
+        node_updates=[{"id": "new", "label": "새 노드", "story": "추가"}],
+        added_edges=[{"id": "e2", "source": "end", "target": "new"}],
+        removed_edge_ids=["e1"],
+    )
+    assert nodes["new"]["label"] == "새 노드"
+    assert graph.children["end"] == ["new"]
+    assert graph.parents["end"] == []
+    # 캐시한 컨텍스트는 바뀌지 않음
+    assert "new" not in context.nodes
+    assert context.graph.parents["end"] == ["start"]
+
+
+def test_game_context_cache_reloads_on_new_version(game_factory):
+    cache = GameContextCache(max_entries=1)
+    first = cache.get("g1", 1, game_factory)
+    assert cache.get("g1", 1, game_factory) is first
+    assert cache.get("g1", 2, game_factory) is not first
+    cache.get("g2", 1, lambda: game_factory("g2"))
+    cache.invalidate("g2")
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 3}
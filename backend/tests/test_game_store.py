@@ -0,0 +1,232 @@
+"""게임 저장소(파일/SQLite), 압축 사본, 파일 가져오기"""
+import base64
+import json
+import os
+import threading
+
+import pytest
+
+import game_store
+from game_codec import AVAILABLE_ENCODINGS, FILE_EXTENSIONS, STORAGE_ENCODING, decompress, encode_game
+from game_store import FILE_COPY_ENCODINGS, FileGameStore, SQLiteGameStore, import_game_files, iter_game_files
+from http_cache import compute_etag
+from image_store import ImageStore
+
+PRIMARY_SUFFIX = f".json.{FILE_EXTENSIONS[STORAGE_ENCODING]}"
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        return FileGameStore(tmp_path / "games")
+    return SQLiteGameStore(tmp_path / "games.sqlite3")
+
+
+def write_legacy_json(directory, game):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{game['id']}.json"
+    path.write_text(json.dumps(game, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+# 공통 동작
+def test_put_get_roundtrip(store, game_factory):
+    game = game_factory()
+    etag = store.put(game)
+    assert store.get("g1") == game
+    assert store.get_etag("g1") == etag == compute_etag(encode_game(game))
+    assert store.exists("g1")
+    assert not store.exists("missing")
+    assert store.get("missing") is None
+
+
+def test_get_encoded_returns_matching_etag(store, game_factory):
+    game = game_factory()
+    etag = store.put(game)
+    for encodings in ([STORAGE_ENCODING], ["gzip"], []):
+        data, encoding, body_etag = store.get_encoded("g1", encodings)
+        assert json.loads(decompress(data, encoding)) == game
+        assert body_etag == etag
+    assert store.get_encoded("missing", ["gzip"]) is None
+
+
+def test_list_page_is_newest_first(store, game_factory):
+    for day in range(1, 6):
+        store.put(game_factory(f"g{day}", created_at=f"2024-01-0{day}T00:00:00"))
+    first, cursor = store.list_page(2)
+    second, cursor = store.list_page(2, cursor)
+    third, cursor = store.list_page(2, cursor)
+    assert [summary["id"] for summary in first + second + third] == ["g5", "g4", "g3", "g2", "g1"]
+    assert cursor is None
+    assert store.size_stats()["count"] == 5
+
+
+def test_delete(store, game_factory):
+    store.put(game_factory())
+    assert store.delete("g1")
+    assert not store.delete("g1")
+    assert store.get("g1") is None
+    assert store.list_summaries() == []
+
+
+# 압축 사본
+def test_variants_are_built_in_background(store, game_factory):
+    game = game_factory()
+    etag = store.put(game)
+    store.flush_variants()
+    for encoding in AVAILABLE_ENCODINGS:
+        data, stored_encoding, body_etag = store.get_encoded("g1", [encoding])
+        assert stored_encoding == encoding
+        assert json.loads(decompress(data, encoding)) == game
+        assert body_etag == etag
+
+
+def test_variants_never_replace_a_newer_body(store, game_factory, monkeypatch):
+    real_compress = game_store.compress
+    newer = []
+
+    def compress(data, encoding, fast=False):
+        if not fast and not newer:
+            # 높은 수준으로 압축하는 동안 게임이 다시 저장됨
+            newer.append(store.put(game_factory(title="더 새로운")))
+        return real_compress(data, encoding, fast)
+
+    monkeypatch.setattr(game_store, "compress", compress)
+    store.put(game_factory())
+    store.flush_variants()
+    # 다시 저장하며 예약된 사본 생성까지 대기
+    store.flush_variants()
+    for encoding in AVAILABLE_ENCODINGS:
+        data, stored_encoding, etag = store.get_encoded("g1", [encoding])
+        assert json.loads(decompress(data, stored_encoding))["title"] == "더 새로운"
+        assert etag == newer[0]
+
+
+# 파일 저장소 형식
+def test_file_store_layout(tmp_path, game_factory):
+    store = FileGameStore(tmp_path)
+    store.put(game_factory())
+    store.flush_variants()
+    names = {path.name for path in tmp_path.iterdir() if not path.name.startswith("_")}
+    expected = {"g1" + PRIMARY_SUFFIX, "g1.etag"}
+    expected.update(f"g1.json.{FILE_EXTENSIONS[encoding]}" for encoding in FILE_COPY_ENCODINGS)
+    assert names == expected
+    summary = store.list_summaries()[0]
+    assert summary["sizeBytes"] == (tmp_path / ("g1" + PRIMARY_SUFFIX)).stat().st_size
+
+
+def test_file_store_keep_json_writes_plain_copy(tmp_path, game_factory):
+    store = FileGameStore(tmp_path, keep_json=True)
+    game = game_factory()
+    store.put(game)
+    assert json.loads((tmp_path / "g1.json").read_text(encoding="utf-8")) == game
+
+
+def test_file_store_reads_and_upgrades_legacy_json(tmp_path, game_factory):
+    game = game_factory()
+    write_legacy_json(tmp_path, game)
+    store = FileGameStore(tmp_path)
+    assert store.get("g1") == game
+    assert [summary["id"] for summary in store.list_summaries()] == ["g1"]
+
+    store.put({**game, "title": "다시 저장"})
+    assert not (tmp_path / "g1.json").exists()
+    assert (tmp_path / ("g1" + PRIMARY_SUFFIX)).exists()
+    assert store.get("g1")["title"] == "다시 저장"
+
+
+def test_file_store_prefers_newer_plain_json(tmp_path, game_factory):
+    store = FileGameStore(tmp_path, keep_json=True)
+    game = game_factory()
+    store.put(game)
+    store.flush_variants()
+    # 외부 도구가 <id>.json만 고침
+    edited = {**game, "title": "외부 편집"}
+    path = write_legacy_json(tmp_path, edited)
+    primary_mtime = (tmp_path / ("g1" + PRIMARY_SUFFIX)).stat().st_mtime_ns
+    os.utime(path, ns=(primary_mtime + 10**9, primary_mtime + 10**9))
+
+    assert store.get("g1")["title"] == "외부 편집"
+    opened = store.open_encoded("g1", list(FILE_COPY_ENCODINGS))
+    f, encoding, size, _ = opened
+    with f:
+        # 본문보다 오래된 사본은 건너뛰고 JSON 그대로
+        assert encoding == "identity"
+        assert json.loads(f.read())["title"] == "외부 편집"
+        assert size == path.stat().st_size
+
+
+def test_file_store_open_encoded_matches_etag(tmp_path, game_factory):
+    store = FileGameStore(tmp_path)
+    etag = store.put(game_factory())
+    f, encoding, size, body_etag = store.open_encoded("g1", [STORAGE_ENCODING])
+    with f:
+        data = f.read()
+    assert encoding == STORAGE_ENCODING
+    assert size == len(data)
+    assert body_etag == etag == compute_etag(decompress(data, encoding))
+
+
+def test_file_store_snapshot_is_consistent_under_writes(tmp_path, game_factory):
+    store = FileGameStore(tmp_path)
+    store.put(game_factory())
+    stop = threading.Event()
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            store.put(game_factory(title=f"버전 {n}"))
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        for _ in range(50):
+            f, encoding, _, etag = store.open_encoded("g1", [STORAGE_ENCODING])
+            with f:
+                assert compute_etag(decompress(f.read(), encoding)) == etag
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_file_store_rebuilds_index_on_start(tmp_path, game_factory):
+    FileGameStore(tmp_path).put(game_factory())
+    (tmp_path / "_index.jsonl").unlink()
+    assert [summary["id"] for summary in FileGameStore(tmp_path).list_summaries()] == ["g1"]
+
+
+# 파일 가져오기
+def test_import_game_files_handles_both_layouts(tmp_path, game_factory):
+    games_dir = tmp_path / "games"
+    FileGameStore(games_dir).put(game_factory("new"))
+    write_legacy_json(games_dir, game_factory("old"))
+    (games_dir / "broken.json").write_text("{", encoding="utf-8")
+    assert [path.name for path, _ in iter_game_files(games_dir)] == ["broken.json", "new" + PRIMARY_SUFFIX, "old.json"]
+
+    target = SQLiteGameStore(tmp_path / "games.sqlite3")
+    messages = []
+    dry_run = import_game_files(target, games_dir, dry_run=True, report=messages.append)
+    assert dry_run == {"files": 3, "imported": 2, "skipped": 0, "failed": 1}
+    assert target.size_stats()["count"] == 0
+
+    totals = import_game_files(target, games_dir, report=messages.append)
+    assert totals == {"files": 3, "imported": 2, "skipped": 0, "failed": 1}
+    assert target.get("old") == game_factory("old")
+    assert target.get("new") == game_factory("new")
+
+    again = import_game_files(target, games_dir, report=messages.append)
+    assert again["skipped"] == 2 and again["imported"] == 0
+
+
+def test_import_game_files_externalizes_inline_images(tmp_path, game_factory):
+    game = game_factory("old")
+    game["nodes"][0]["imageUrl"] = "data:image/png;base64," + base64.b64encode(b"png").decode("ascii")
+    write_legacy_json(tmp_path / "games", game)
+    image_store = ImageStore(tmp_path / "uploads")
+
+    target = SQLiteGameStore(tmp_path / "games.sqlite3")
+    import_game_files(target, tmp_path / "games", report=lambda message: None, prepare=image_store.externalize_game)
+    image_url = target.get("old")["nodes"][0]["imageUrl"]
+    assert image_url.startswith("/uploads/")
+    assert (image_store.directory / image_url.rsplit("/", 1)[1]).read_bytes() == b"png"
@@ -0,0 +1,65 @@
+"""노드 단위 구조 공유 버전 기록, PATCH"""
+import json
+
+import pytest
+
+from game_store import SQLiteGameStore
+from game_versions import GameVersionStore, VersionConflict
+
+
+@pytest.fixture
+def versions(tmp_path):
+    return GameVersionStore(tmp_path / "versions.sqlite3", SQLiteGameStore(tmp_path / "games.sqlite3"))
+
+
+def test_version_patch_and_history(versions, game_factory):
+    versions.create(game_factory())
+    result = versions.patch(
+        "g1", {"title": "새 제목"}, [{"id": "end", "story": "바뀐 결말"}], [], [], [], base_version=1
+    )
+    assert result["version"] == 2
+    assert result["nodesWritten"] == 1
+
+    latest = versions.game_store.get("g1")
+    assert latest["title"] == "새 제목"
+    assert {node["id"]: node["story"] for node in latest["nodes"]}["end"] == "바뀐 결말"
+    assert versions.get_version("g1", 1)["title"] == "게임 g1"
+    assert [entry["version"] for entry in versions.list_versions("g1")] == [2, 1]
+
+    with pytest.raises(VersionConflict):
+        versions.patch("g1", {"title": "충돌"}, [], [], [], [], base_version=1)
+
+
+def test_version_patch_without_changes_is_noop(versions, game_factory):
+    versions.create(game_factory())
+    result = versions.patch("g1", {"title": "게임 g1"}, [], [], [], [])
+    assert result["unchanged"]
+    assert versions.head("g1") == 1
+
+
+def test_fork_shares_node_objects(versions, game_factory):
+    versions.create(game_factory())
+    result = versions.fork("g1", "g2")
+    assert result["nodesWritten"] == 0
+    assert result["forkedFrom"] == {"gameId": "g1", "version": 1}
+    assert [node["id"] for node in versions.game_store.get("g2")["nodes"]] == ["start", "end"]
+
+
+def test_iter_node_data_skips_unreferenced_nodes(versions, game_factory):
+    versions.create(game_factory())
+    versions.patch("g1", {}, [{"id": "end", "story": "두 번째"}], [], [], [])
+    stories = {json.loads(data)["story"] for data in versions.iter_node_data()}
+    # 이전 버전만 참조하는 노드도 포함
+    assert {"마지막", "두 번째"} <= stories
+
+    versions.game_store.delete("g1")
+    versions.game_deleted("g1")
+    assert list(versions.iter_node_data()) == []
+    assert versions.prune()["nodeObjectsRemoved"] == 3
+
+
+def test_iter_node_data_for_one_game(versions, game_factory):
+    versions.create(game_factory())
+    versions.create(game_factory("g2", nodes=[{"id": "only", "label": "", "story": "g2 노드"}], edges=[]))
+    stories = {json.loads(data)["story"] for data in versions.iter_node_data(game_id="g2")}
+    assert stories == {"g2 노드"}
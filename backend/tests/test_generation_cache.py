@@ -0,0 +1,74 @@
+"""프롬프트 키 생성 캐시 (LRU/TTL, 디스크 계층)"""
+import asyncio
+
+from generation_cache import GenerationCache, make_cache_key
+
+
+def test_cache_key_depends_on_every_part():
+    base = make_cache_key("claude", "m", "prompt", {"t": 1})
+    assert base == make_cache_key("claude", "m", "prompt", {"t": 1})
+    assert base != make_cache_key("gemini", "m", "prompt", {"t": 1})
+    assert base != make_cache_key("claude", "m", "prompt", {"t": 2})
+
+
+def test_cache_hit_and_miss():
+    async def scenario():
+        cache = GenerationCache(max_bytes=10_000, ttl_seconds=0)
+        assert await cache.get("k") is None
+        await cache.set("k", "이야기")
+        assert await cache.get("k") == "이야기"
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    async def scenario():
+        cache = GenerationCache(max_bytes=30, ttl_seconds=0)
+        await cache.set("a", "x" * 10)
+        await cache.set("b", "y" * 10)
+        await cache.get("a")
+        await cache.set("c", "z" * 10)
+        return cache, [await cache.get(key) for key in ("a", "b", "c")]
+
+    cache, values = asyncio.run(scenario())
+    assert values == ["x" * 10, None, "z" * 10]
+    assert cache.evictions == 1
+    assert cache.stats()["bytes"] <= 30
+
+
+def test_cache_expires_entries(monkeypatch):
+    import generation_cache
+
+    now = [1000.0]
+    monkeypatch.setattr(generation_cache.time, "time", lambda: now[0])
+
+    async def scenario():
+        cache = GenerationCache(max_bytes=10_000, ttl_seconds=60)
+        await cache.set("k", "v")
+        now[0] += 61
+        return await cache.get("k")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_cache_disk_tier_survives_restart(tmp_path):
+    async def scenario():
+        await GenerationCache(10_000, 0, disk_dir=tmp_path).set("k" * 64, "디스크")
+        cache = GenerationCache(10_000, 0, disk_dir=tmp_path)
+        return cache, await cache.get("k" * 64)
+
+    cache, value = asyncio.run(scenario())
+    assert value == "디스크"
+    assert cache.disk_hits == 1
+
+
+def test_disabled_cache_stores_nothing():
+    async def scenario():
+        cache = GenerationCache(max_bytes=0, ttl_seconds=0)
+        await cache.set("k", "v")
+        return await cache.get("k")
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,94 @@
+"""콘텐츠 주소 이미지 저장소, 업로드 파일 참조 색인"""
+import base64
+import io
+
+import pytest
+
+from image_store import ImageInUse, ImageReferences, ImageStore, ImageTooLarge, is_content_addressed
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+
+
+def data_uri(data: bytes) -> str:
+    return "data:image/png;base64," + base64.b64encode(data).decode("ascii")
+
+
+@pytest.fixture
+def image_store(tmp_path):
+    return ImageStore(tmp_path / "uploads")
+
+
+def test_externalize_nodes_deduplicates_images(image_store):
+    nodes = [{"id": "a", "imageUrl": data_uri(PNG_BYTES)}, {"id": "b", "imageUrl": data_uri(PNG_BYTES)}, {"id": "c"}]
+    stats = image_store.externalize_nodes(nodes)
+    assert stats == {"extracted": 2, "written": 1, "deduplicated": 1, "bytes": 2 * len(PNG_BYTES)}
+    assert nodes[0]["imageUrl"] == nodes[1]["imageUrl"]
+    filename = nodes[0]["imageUrl"].rsplit("/", 1)[1]
+    assert is_content_addressed(filename)
+    assert (image_store.directory / filename).read_bytes() == PNG_BYTES
+
+
+def test_store_data_uri_ignores_other_values(image_store):
+    assert image_store.store_data_uri("/uploads/a.png") is None
+    assert image_store.store_data_uri("data:text/plain;base64,aGk=") is None
+
+
+def test_put_file_streams_and_enforces_limit(image_store):
+    filename, created, size = image_store.put_file(io.BytesIO(PNG_BYTES), "png", max_bytes=1024)
+    assert (created, size) == (True, len(PNG_BYTES))
+    assert image_store.put_file(io.BytesIO(PNG_BYTES), "png")[:2] == (filename, False)
+
+    with pytest.raises(ImageTooLarge):
+        image_store.put_file(io.BytesIO(b"x" * 100), "png", max_bytes=10)
+    # 임시 파일을 남기지 않음
+    assert [path.name for path in image_store.directory.iterdir()] == [filename]
+
+
+# 참조 색인
+def test_references_refuse_shared_image(image_store):
+    filename, _ = image_store.put_bytes(PNG_BYTES, "png")
+    references = ImageReferences(lambda: [("g1", {filename}), ("g2", {filename})])
+    assert references.owners(filename) == {"g1", "g2"}
+
+    references.game_deleted("g1")
+    with pytest.raises(ImageInUse) as error:
+        references.delete_unreferenced(filename, image_store.delete)
+    assert error.value.filename == filename
+
+    references.game_deleted("g2")
+    assert references.delete_unreferenced(filename, image_store.delete)
+    assert not (image_store.directory / filename).exists()
+
+
+def test_references_keep_earlier_saves_until_deleted():
+    bodies = {"g1": {"a.png"}}
+    references = ImageReferences(lambda: [], load=lambda game_id: bodies[game_id])
+    references.game_saved({"id": "g1"})
+    bodies["g1"] = {"b.png"}
+    references.game_saved({"id": "g1"})
+    # 이전 버전이 쓰던 이미지도 유지
+    assert references.owners("a.png") == references.owners("b.png") == {"g1"}
+    references.game_deleted("g1")
+    assert references.stats() == {"ready": True, "images": 0, "games": 0}
+
+
+def test_references_skip_games_deleted_while_scanning():
+    references = None
+
+    def scan():
+        # 색인을 만드는 도중 삭제됨
+        references.game_deleted("g1")
+        return [("g1", {"a.png"}), ("g2", {"a.png"})]
+
+    references = ImageReferences(scan)
+    assert references.owners("a.png") == {"g2"}
+
+
+def test_references_track_stored_images(image_store):
+    references = ImageReferences(lambda: [])
+    store = references.track("g1", lambda value: image_store.store_data_uri(value)[0])
+    url = store(data_uri(PNG_BYTES))
+    filename = url.rsplit("/", 1)[1]
+    assert references.owners(filename) == {"g1"}
+    with pytest.raises(ImageInUse):
+        references.delete_unreferenced(filename, image_store.delete)
@@ -0,0 +1,61 @@
+"""제공자별 공유 HTTP 클라이언트 풀"""
+import asyncio
+
+import httpx
+
+from llm_client import PROVIDER_BASE_URLS, ProviderClientPool
+
+
+def test_timeout_uses_provider_read_timeout():
+    pool = ProviderClientPool(connect_timeout=2.0)
+    pool.read_timeouts["gemini"] = 45.0
+    timeout = pool.timeout_for("gemini")
+    assert timeout.read == 45.0
+    assert timeout.connect == 2.0
+
+
+def test_client_is_reused_until_closed():
+    async def scenario():
+        pool = ProviderClientPool(http2=False)
+        first = pool.client("claude")
+        assert pool.client("claude") is first
+        assert str(first.base_url).startswith(PROVIDER_BASE_URLS["claude"])
+        await pool.aclose()
+        second = pool.client("claude")
+        await pool.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert second is not first
+    assert first.is_closed
+
+
+def test_post_is_counted_per_provider(monkeypatch):
+    pool = ProviderClientPool(http2=False)
+    in_flight = []
+
+    def handler(request):
+        in_flight.append(pool.stats()["providers"]["gemini"]["inFlight"])
+        return httpx.Response(200, json={"ok": True})
+
+    monkeypatch.setattr(pool, "_create_client", lambda provider: httpx.AsyncClient(
+        base_url=PROVIDER_BASE_URLS[provider], transport=httpx.MockTransport(handler),
+    ))
+
+    async def scenario():
+        response = await pool.post("gemini", "/v1/models")
+        await pool.aclose()
+        return response
+
+    assert asyncio.run(scenario()).json() == {"ok": True}
+    assert in_flight == [1]
+    stats = pool.stats()["providers"]["gemini"]
+    assert stats["inFlight"] == 0
+    assert stats["requestsTotal"] == 1
+
+
+def test_stats_before_any_request():
+    stats = ProviderClientPool(max_connections=4, http2=False).stats()
+    assert stats["maxConnections"] == 4
+    assert set(stats["providers"]) == set(PROVIDER_BASE_URLS)
+    assert stats["providers"]["claude"]["connections"] == {"open": 0, "idle": 0, "active": 0}
@@ -0,0 +1,53 @@
+"""플레이 창(window) 인덱스"""
+from game_bundle import compile_bundle
+from play_window import PlayIndex, PlayIndexCache
+
+
+def make_index(game_factory):
+    game = game_factory()
+    game["nodes"].append({"id": "extra", "label": "추가", "story": "", "imageUrl": "/uploads/a.png"})
+    game["edges"].append({"id": "e2", "source": "end", "target": "extra"})
+    return PlayIndex(compile_bundle(game))
+
+
+def test_play_window_depth_and_choices(game_factory):
+    index = make_index(game_factory)
+    nodes, truncated = index.window(index.root, depth=1, max_nodes=10)
+    assert [node["id"] for node in nodes] == ["start", "end"]
+    assert nodes[0]["choices"] == ["end"]
+    assert not truncated
+
+    nodes, _ = index.window(index.root, depth=5, max_nodes=10)
+    assert nodes[-1]["imageUrl"] == "/uploads/a.png"
+
+
+def test_play_window_truncates_at_max_nodes(game_factory):
+    index = make_index(game_factory)
+    nodes, truncated = index.window(index.root, depth=5, max_nodes=2)
+    assert len(nodes) == 2
+    assert truncated
+
+
+def test_play_index_cache_reloads_on_new_version(game_factory):
+    cache = PlayIndexCache(max_nodes=100)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return compile_bundle(game_factory())
+
+    first = cache.get("g1", "v1", loader)
+    assert cache.get("g1", "v1", loader) is first
+    assert cache.peek("g1", "v2") is None
+    assert cache.get("g1", "v2", loader) is not first
+    assert len(loads) == 2
+    assert cache.stats() == {"entries": 1, "nodes": 2, "hits": 1, "misses": 2}
+
+
+def test_play_index_cache_evicts_by_node_count(game_factory):
+    cache = PlayIndexCache(max_nodes=3)
+    for game_id in ("g1", "g2", "g3"):
+        cache.get(game_id, 1, lambda: compile_bundle(game_factory(game_id)))
+    assert cache.peek("g1", 1) is None
+    assert cache.peek("g3", 1) is not None
+    assert cache.stats()["nodes"] <= 3
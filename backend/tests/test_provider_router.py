@@ -0,0 +1,164 @@
+"""제공자 선택, 헤지, 서킷 브레이커"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from provider_router import CLOSED, HALF_OPEN, OPEN, ProviderRouter, counts_as_failure
+
+
+def make_router(**options):
+    options.setdefault("failure_threshold", 2)
+    options.setdefault("cooldown", 30)
+    return ProviderRouter(["claude", "gemini"], **options)
+
+
+async def succeed(router, provider, delay=0.0):
+    async with router.track(provider):
+        await asyncio.sleep(delay)
+    return provider
+
+
+async def fail(router, provider, status_code=500):
+    async with router.track(provider):
+        raise HTTPException(status_code=status_code, detail="실패")
+
+
+def test_counts_as_failure_ignores_client_errors():
+    assert counts_as_failure(RuntimeError())
+    assert counts_as_failure(HTTPException(status_code=502))
+    assert counts_as_failure(HTTPException(status_code=429))
+    assert not counts_as_failure(HTTPException(status_code=400))
+
+
+def test_rank_prefers_lower_latency():
+    router = make_router()
+    router.health["claude"].observe_latency(2.0)
+    router.health["gemini"].observe_latency(0.5)
+    assert router.rank(["claude", "gemini"]) == ["gemini", "claude"]
+
+
+def test_circuit_opens_after_consecutive_failures():
+    router = make_router()
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await fail(router, "claude")
+
+    asyncio.run(scenario())
+    assert router.health["claude"].state == OPEN
+    assert router.rank(["claude", "gemini"]) == ["gemini"]
+    assert router.retry_after(["claude"]) > 0
+
+
+def test_client_errors_do_not_open_circuit():
+    router = make_router()
+
+    async def scenario():
+        for _ in range(3):
+            with pytest.raises(HTTPException):
+                await fail(router, "claude", status_code=400)
+
+    asyncio.run(scenario())
+    assert router.health["claude"].state == CLOSED
+
+
+def test_half_open_allows_a_single_trial():
+    router = make_router()
+    health = router.health["claude"]
+    health.state = OPEN
+    health.open_until = 0.0
+
+    async def scenario():
+        assert router.available("claude")
+        assert health.state == HALF_OPEN
+        trial = asyncio.create_task(succeed(router, "claude", delay=0.01))
+        await asyncio.sleep(0)
+        assert not router.available("claude")
+        # rank() 이후 늦게 들어온 요청은 확인 요청과 겹치지 않고 503
+        with pytest.raises(HTTPException) as error:
+            await succeed(router, "claude")
+        assert error.value.status_code == 503
+        await trial
+
+    asyncio.run(scenario())
+    assert health.state == CLOSED
+    assert not health.trial_in_flight
+    # 거절된 요청은 실패로 기록하지 않음
+    assert health.failures == 0
+
+
+def test_failed_trial_reopens_circuit():
+    router = make_router()
+    health = router.health["claude"]
+    health.state = HALF_OPEN
+
+    async def scenario():
+        with pytest.raises(HTTPException):
+            await fail(router, "claude")
+
+    asyncio.run(scenario())
+    assert health.state == OPEN
+    assert not health.trial_in_flight
+
+
+def test_run_fails_over_to_next_provider():
+    router = make_router(hedging=False)
+
+    async def call(provider):
+        if provider == "claude":
+            return await fail(router, provider)
+        return await succeed(router, provider)
+
+    result, provider, hedged = asyncio.run(router.run(["claude", "gemini"], call))
+    assert (result, provider, hedged) == ("gemini", "gemini", False)
+    assert router.failovers == 1
+
+
+def test_run_fails_over_when_trial_already_in_flight():
+    router = make_router(hedging=False)
+    router.health["claude"].state = HALF_OPEN
+    router.health["claude"].trial_in_flight = True
+
+    async def call(provider):
+        return await succeed(router, provider)
+
+    _, provider, _ = asyncio.run(router.run(["claude", "gemini"], call))
+    assert provider == "gemini"
+
+
+def test_run_raises_last_error_when_all_fail():
+    router = make_router(hedging=False)
+
+    async def call(provider):
+        return await fail(router, provider)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(router.run(["claude", "gemini"], call))
+
+
+def test_run_hedges_slow_provider_and_cancels_loser():
+    router = make_router(hedge_delay=0.01)
+
+    async def call(provider):
+        return await succeed(router, provider, delay=5 if provider == "claude" else 0)
+
+    result, provider, hedged = asyncio.run(router.run(["claude", "gemini"], call))
+    assert (provider, hedged) == ("gemini", True)
+    assert router.hedges == 1
+    assert router.hedge_wins == 1
+    assert router.health["claude"].cancelled == 1
+
+
+def test_hedge_delay_uses_p95_once_enough_samples():
+    router = make_router(hedge_delay=5.0, min_hedge_delay=0.1, min_latency_samples=3)
+    assert router.hedge_delay("claude") == 5.0
+    router.health["claude"].latencies.extend([0.2, 0.3, 0.4])
+    assert router.hedge_delay("claude") == 0.4
+
+
+def test_stats_shape():
+    stats = make_router().stats()
+    assert set(stats["providers"]) == {"claude", "gemini"}
+    assert stats["providers"]["claude"]["state"] == CLOSED
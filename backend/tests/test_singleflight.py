@@ -0,0 +1,65 @@
+"""동일한 동시 생성 요청 합치기"""
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "결과"
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("k", fetch) for _ in range(5)))
+        return flights, results
+
+    flights, results = asyncio.run(scenario())
+    assert calls == 1
+    assert [value for value, _ in results] == ["결과"] * 5
+    assert sum(shared for _, shared in results) == 4
+    assert flights.stats() == {"inFlight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_single_flight_shares_errors():
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("업스트림 오류")
+
+    async def scenario():
+        flights = SingleFlight()
+        return await asyncio.gather(flights.do("k", fail), flights.do("k", fail), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_single_flight_cancels_work_when_all_waiters_leave():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        flights = SingleFlight()
+        waiter = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        return flights.stats()
+
+    stats = asyncio.run(scenario())
+    assert cancelled == [True]
+    assert stats["inFlight"] == 0
@@ -0,0 +1,99 @@
+"""만료 게임 정리, 고아 이미지 GC"""
+import asyncio
+import base64
+import os
+import time
+
+import pytest
+
+from game_bundle import BundleStore
+from game_store import SQLiteGameStore
+from game_versions import GameVersionStore
+from image_store import ImageStore
+from storage_sweeper import StorageSweeper
+
+
+@pytest.fixture
+def stores(tmp_path):
+    game_store = SQLiteGameStore(tmp_path / "games.sqlite3")
+    image_store = ImageStore(tmp_path / "uploads")
+    version_store = GameVersionStore(tmp_path / "versions.sqlite3", game_store)
+    sweeper = StorageSweeper(
+        game_store, image_store, image_grace_seconds=60, batch_pause=0, version_store=version_store
+    )
+    game_store.add_observer(version_store)
+    game_store.add_observer(sweeper)
+    return game_store, image_store, version_store, sweeper
+
+
+def add_image(image_store, data: bytes, age: float = 3600) -> str:
+    filename, _ = image_store.put_bytes(data, "png")
+    old = time.time() - age
+    os.utime(image_store.directory / filename, (old, old))
+    return filename
+
+
+def with_image(game, image_store, filename):
+    game["nodes"][0]["imageUrl"] = image_store.url_for(filename)
+    return game
+
+
+def test_sweep_expired_games(stores, game_factory):
+    game_store, _, _, sweeper = stores
+    game_store.put(game_factory("old", created_at="2000-01-01T00:00:00"))
+    game_store.put(game_factory("new", created_at="2999-01-01T00:00:00"))
+
+    dry_run = asyncio.run(sweeper.sweep_expired_games(30, dry_run=True))
+    assert [summary["id"] for summary in dry_run["found"]] == ["old"]
+    assert game_store.exists("old")
+
+    result = asyncio.run(sweeper.sweep_expired_games(30))
+    assert [summary["id"] for summary in result["deleted"]] == ["old"]
+    assert result["backlog"] == 0
+    assert not game_store.exists("old") and game_store.exists("new")
+
+
+def test_orphan_gc_keeps_referenced_and_recent_images(stores, game_factory):
+    game_store, image_store, _, sweeper = stores
+    used = add_image(image_store, b"used")
+    orphan = add_image(image_store, b"orphan")
+    recent = add_image(image_store, b"recent", age=0)
+    game_store.put(with_image(game_factory(), image_store, used))
+
+    result = asyncio.run(sweeper.sweep_orphaned_images())
+    assert [entry["file"] for entry in result["deleted"]] == [orphan]
+    remaining = {path.name for path in image_store.directory.iterdir()}
+    assert remaining == {used, recent}
+
+
+def test_orphan_gc_keeps_images_of_earlier_versions(stores, game_factory):
+    game_store, image_store, version_store, sweeper = stores
+    earlier = add_image(image_store, b"earlier")
+    version_store.create(with_image(game_factory(), image_store, earlier))
+    version_store.patch("g1", {}, [{"id": "start", "imageUrl": None, "story": "이미지 없음"}], [], [], [])
+    assert earlier not in game_store.get_bytes("g1").decode("utf-8")
+
+    result = asyncio.run(sweeper.sweep_orphaned_images())
+    assert result["deleted"] == []
+    assert (image_store.directory / earlier).exists()
+
+
+def test_orphan_gc_keeps_images_moved_out_by_bundles(stores, game_factory):
+    game_store, image_store, _, sweeper = stores
+    bundles = BundleStore(
+        game_store.path.with_name("bundles.sqlite3"), game_store,
+        store_image=lambda value: image_store.store_data_uri(value)[0],
+    )
+    sweeper.bundle_store = bundles
+    game_store.add_observer(bundles)
+    # 이전 버전에서 저장되어 본문에 인라인 이미지가 남은 게임
+    game = game_factory()
+    game["nodes"][0]["imageUrl"] = "data:image/png;base64," + base64.b64encode(b"inline").decode("ascii")
+    game_store.put(game)
+    bundles.flush()
+    asset = bundles.get_bundle(bundles.current("g1")["hash"])["assets"][0].rsplit("/", 1)[1]
+    sweeper.image_grace_seconds = 0
+
+    result = asyncio.run(sweeper.sweep_orphaned_images())
+    assert result["deleted"] == []
+    assert (image_store.directory / asset).exists()
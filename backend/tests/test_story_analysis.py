@@ -0,0 +1,72 @@
+"""스토리 그래프 분석 (CSR 배열, 분석 캐시)"""
+import json
+import threading
+
+from story_analysis import AnalysisCache, analyze_story, graph_hash
+
+
+def edges(*pairs):
+    return [{"id": f"{source}-{target}", "source": source, "target": target} for source, target in pairs]
+
+
+def test_analyze_branching_story():
+    analysis = json.loads(analyze_story(["a", "b", "c", "d"], edges(("a", "b"), ("a", "c"), ("b", "d"))))
+    assert analysis["startNode"] == "a"
+    assert sorted(analysis["endingNodes"]) == ["c", "d"]
+    assert analysis["endingPaths"] == 2
+    assert analysis["shortestPlay"] == 1
+    assert analysis["longestPlay"] == 2
+    assert not analysis["hasCycles"]
+    assert analysis["unreachableNodes"] == []
+
+
+def test_analyze_detects_cycles_and_unreachable_nodes():
+    graph_edges = edges(("s", "a"), ("a", "b"), ("b", "a"), ("b", "c"))
+    analysis = json.loads(analyze_story(["s", "a", "b", "c", "x"], graph_edges))
+    assert analysis["hasCycles"]
+    assert sorted(analysis["cycleNodes"]) == ["a", "b"]
+    assert analysis["unboundedPlay"]
+    assert analysis["longestPlay"] is None
+    assert analysis["orphanNodes"] == ["x"]
+    assert analysis["unreachableNodes"] == ["x"]
+
+
+def test_analyze_ignores_edges_to_missing_nodes():
+    analysis = json.loads(analyze_story(["a", "b"], edges(("a", "b"), ("a", "ghost"))))
+    assert analysis["ignoredEdges"] == 1
+    assert analysis["edgeCount"] == 1
+
+
+def test_graph_hash_ignores_unrelated_fields():
+    first = edges(("a", "b"))
+    second = [{**edge, "style": {"stroke": "red"}} for edge in first]
+    assert graph_hash(["a", "b"], first) == graph_hash(["a", "b"], second)
+    assert graph_hash(["a", "b"], first) != graph_hash(["a", "b"], edges(("b", "a")))
+
+
+def test_analysis_cache_reuses_result():
+    cache = AnalysisCache(max_entries=1)
+    first = analyze_story(["a", "b"], edges(("a", "b")), cache)
+    assert analyze_story(["a", "b"], edges(("a", "b")), cache) is first
+    analyze_story(["a"], [], cache)
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_analysis_cache_is_thread_safe():
+    cache = AnalysisCache(max_entries=4)
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(200):
+                analyze_story([f"n{(n + i) % 8}"], [], cache)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert cache.stats()["entries"] <= 4
@@ -0,0 +1,271 @@
+"""
+스트리밍 이미지 업로드
+
+- UploadSizeLimitMiddleware: 요청 본문을 받는 도중 크기 제한을 넘으면 즉시 413 응답
+- ResumableUploads: 불안정한 모바일 네트워크를 위한 이어 올리기(청크) 업로드 세션
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException
+
+from image_store import ImageStore, MIME_EXTENSIONS
+
+UPLOAD_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+EXTENSION_PATTERN = re.compile(r"[a-z0-9]{1,8}")
+
+
+def upload_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"파일 크기는 {max_bytes // (1024 * 1024)}MB 이하여야 합니다."
+    )
+
+
+def image_extension(filename: Optional[str], content_type: Optional[str]) -> str:
+    """업로드 파일의 확장자 결정 (파일명 → MIME 타입 → 기본값 jpg 순)"""
+    if filename and '.' in filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if EXTENSION_PATTERN.fullmatch(extension):
+            return extension
+    return MIME_EXTENSIONS.get((content_type or "").lower(), "jpg")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    경로별 요청 본문 크기 제한 (ASGI 미들웨어)
+
+    Content-Length가 제한보다 크면 본문을 읽기 전에 거절하고,
+    Content-Length 없이 들어오는 본문은 받은 바이트를 세다가 넘는 순간 거절합니다.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    def _limit_for(self, path: str) -> Optional[int]:
+        for prefix, limit in self.limits.items():
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # 본문 파싱 중 발생한 HTTPException은 FastAPI가 그대로 응답으로 변환
+                    raise upload_too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send, limit: int):
+        body = json.dumps({"detail": upload_too_large(limit).detail}, ensure_ascii=False).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class _Session:
+    def __init__(self, meta: Dict[str, Any]):
+        self.meta = meta
+        self.lock = asyncio.Lock()
+        # 순서대로 받은 바이트의 해시 (재시작 등으로 없으면 완료 시 다시 계산)
+        self.hasher: Optional["hashlib._Hash"] = None
+        self.hashed_bytes = 0
+
+
+class ResumableUploads:
+    """
+    이어 올리기 업로드 세션 관리
+
+    세션 메타데이터(<id>.json)와 받은 데이터(<id>.part)는 디스크에 있으므로
+    서버가 재시작되어도 클라이언트는 GET으로 현재 오프셋을 확인한 뒤 이어서 보낼 수 있습니다.
+    """
+
+    def __init__(self, image_store: ImageStore, directory: Path, max_bytes: int, session_ttl: float = 24 * 3600):
+        self.image_store = image_store
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.session_ttl = session_ttl
+        self.directory.mkdir(exist_ok=True, parents=True)
+        self._sessions: Dict[str, _Session] = {}
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.directory / f"{upload_id}.json"
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.directory / f"{upload_id}.part"
+
+    def _offset(self, upload_id: str) -> int:
+        try:
+            return self._part_path(upload_id).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _session(self, upload_id: str) -> _Session:
+        if not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+            raise HTTPException(status_code=404, detail="업로드 세션을 찾을 수 없습니다.")
+        session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+        try:
+            with open(self._meta_path(upload_id), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            raise HTTPException(status_code=404, detail="업로드 세션을 찾을 수 없습니다.")
+        session = self._sessions[upload_id] = _Session(meta)
+        return session
+
+    def _status(self, upload_id: str, session: _Session) -> Dict[str, Any]:
+        return {
+            "uploadId": upload_id,
+            "offset": self._offset(upload_id),
+            "size": session.meta["size"],
+        }
+
+    def _remove(self, upload_id: str):
+        self._sessions.pop(upload_id, None)
+        self._meta_path(upload_id).unlink(missing_ok=True)
+        self._part_path(upload_id).unlink(missing_ok=True)
+
+    def purge_expired(self) -> int:
+        """오래된 미완료 세션 정리"""
+        removed = 0
+        cutoff = time.time() - self.session_ttl
+        for meta_path in self.directory.glob("*.json"):
+            try:
+                if meta_path.stat().st_mtime < cutoff:
+                    self._remove(meta_path.stem)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def create(self, filename: Optional[str], content_type: Optional[str], size: int) -> Dict[str, Any]:
+        if not content_type or not content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="이미지 파일만 업로드 가능합니다.")
+        if size <= 0:
+            raise HTTPException(status_code=400, detail="파일 크기가 올바르지 않습니다.")
+        if size > self.max_bytes:
+            raise upload_too_large(self.max_bytes)
+
+        self.purge_expired()
+
+        upload_id = uuid.uuid4().hex
+        meta = {
+            "filename": filename,
+            "contentType": content_type,
+            "extension": image_extension(filename, content_type),
+            "size": size,
+            "createdAt": time.time(),
+        }
+        with open(self._meta_path(upload_id), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self._part_path(upload_id).touch()
+
+        session = self._sessions[upload_id] = _Session(meta)
+        session.hasher = hashlib.sha256()
+        return self._status(upload_id, session)
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        return self._status(upload_id, self._session(upload_id))
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """offset 위치부터 받은 청크를 이어 쓰기 (오프셋이 맞지 않으면 409)"""
+        session = await asyncio.to_thread(self._session, upload_id)
+        async with session.lock:
+            current = await asyncio.to_thread(self._offset, upload_id)
+            if offset != current:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "업로드 오프셋이 일치하지 않습니다.", "offset": current}
+                )
+
+            # 이어 쓰는 위치까지 해시가 계산되어 있을 때만 증분 해시 유지
+            hasher = session.hasher if session.hasher is not None and session.hashed_bytes == current else None
+            session.hasher = None
+
+            size = session.meta["size"]
+            part_file = await asyncio.to_thread(open, self._part_path(upload_id), "ab")
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if current + len(chunk) > size:
+                        raise HTTPException(status_code=413, detail="선언한 파일 크기를 초과했습니다.")
+                    await asyncio.to_thread(part_file.write, chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    current += len(chunk)
+            finally:
+                await asyncio.to_thread(part_file.close)
+                if hasher is not None and current == await asyncio.to_thread(self._offset, upload_id):
+                    session.hasher = hasher
+                    session.hashed_bytes = current
+
+            return await asyncio.to_thread(self._status, upload_id, session)
+
+    def _finalize(self, upload_id: str, session: _Session) -> Dict[str, Any]:
+        part_path = self._part_path(upload_id)
+        if session.hasher is not None and session.hashed_bytes == session.meta["size"]:
+            digest = session.hasher.hexdigest()
+        else:
+            hasher = hashlib.sha256()
+            with open(part_path, "rb") as f:
+                for chunk in iter(lambda: f.read(64 * 1024), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+
+        filename, _ = self.image_store.adopt_file(part_path, digest, session.meta["extension"])
+        self._remove(upload_id)
+        return {"imageUrl": self.image_store.url_for(filename), "filename": filename}
+
+    async def complete(self, upload_id: str) -> Dict[str, Any]:
+        session = await asyncio.to_thread(self._session, upload_id)
+        async with session.lock:
+            offset = await asyncio.to_thread(self._offset, upload_id)
+            if offset != session.meta["size"]:
+                raise HTTPException(
+                    status_code=409,
+                    detail={"message": "업로드가 아직 완료되지 않았습니다.", "offset": offset}
+                )
+            return await asyncio.to_thread(self._finalize, upload_id, session)
+
+    def abort(self, upload_id: str):
+        self._session(upload_id)
+        self._remove(upload_id)
@@ -66,6 +66,35 @@ const saveToStorage = (nodes, edges, nodeId, gameConfig) => {
   }
 };
 
+// 서버에 저장한 게임과 비교할 노드 필드
+const toGameNode = (node) => ({
+  id: node.id,
+  label: node.data.label,
+  story: node.data.story,
+  choice: node.data.choice,
+  statChanges: node.data.statChanges,
+  imageUrl: node.data.imageUrl
+});
+
+// 저장 시점의 노드/엣지 (이후 편집분만 골라 보내기 위해)
+const snapshotSavedGame = (gameId, nodes, edges) => ({
+  gameId,
+  nodes: new Map(nodes.map(node => [node.id, JSON.stringify(toGameNode(node))])),
+  edgeIds: new Set(edges.map(edge => edge.id))
+});
+
+// 저장 이후 바뀐 노드와 추가/삭제된 엣지
+const diffSavedGame = (snapshot, nodes, edges) => {
+  const currentEdgeIds = new Set(edges.map(edge => edge.id));
+  return {
+    nodeUpdates: nodes
+      .map(toGameNode)
+      .filter(node => snapshot.nodes.get(node.id) !== JSON.stringify(node)),
+    addedEdges: edges.filter(edge => !snapshot.edgeIds.has(edge.id)),
+    removedEdgeIds: [...snapshot.edgeIds].filter(id => !currentEdgeIds.has(id))
+  };
+};
+
 const savedData = loadFromStorage();
 const initialNodes = savedData.nodes;
 const initialEdges = savedData.edges;
@@ -81,6 +110,7 @@ function MindMapFlow() {
   const [showGameConfig, setShowGameConfig] = useState(false);
   const [showStoryEditor, setShowStoryEditor] = useState(false);
   const [shareUrl, setShareUrl] = useState('');
+  const [savedGame, setSavedGame] = useState(null);
   const [showShareModal, setShowShareModal] = useState(false);
   const [gameConfig, setGameConfig] = useState(savedData.gameConfig || {
     storyTitle: t('appTitle'),
@@ -295,20 +325,14 @@ function MindMapFlow() {
       const gameData = {
         title: gameConfig.storyTitle || t('appTitle') || '제목 없는 게임',
         description: gameConfig.storyDescription || '',
-        nodes: nodes.map(node => ({
-          id: node.id,
-          label: node.data.label,
-          story: node.data.story,
-          choice: node.data.choice,
-          statChanges: node.data.statChanges,
-          imageUrl: node.data.imageUrl
-        })),
+        nodes: nodes.map(toGameNode),
         edges: edges,
         gameConfig: gameConfig
       };
 
       const { saveGame } = await import('./utils/api');
       const result = await saveGame(gameData);
+      setSavedGame(snapshotSavedGame(result.gameId, nodes, edges));
       const fullShareUrl = `${window.location.origin}/game/${result.gameId}`;
       setShareUrl(fullShareUrl);
       setShowShareModal(true);
@@ -409,39 +433,61 @@ function MindMapFlow() {
   // 스토리 생성 함수
   const handleGenerateStory = useCallback(async (context) => {
     try {
-      const storyRequest = {
-        currentNode: {
-          id: context.currentNode.id,
-          label: context.currentNode.data.label,
-          story: context.currentNode.data.story,
-          choice: context.currentNode.data.choice,
-          statChanges: context.currentNode.data.statChanges
-        },
-        parentNodes: context.parentNodes.map(node => ({
-          id: node.id,
-          label: node.data.label,
-          story: node.data.story,
-          choice: node.data.choice
-        })),
-        childNodes: context.childNodes.map(node => ({
-          id: node.id,
-          label: node.data.label,
-          story: node.data.story,
-          choice: node.data.choice
-        })),
-        gameConfig: context.gameConfig,
-        allNodes: context.allNodes.map(node => ({
-          id: node.id,
-          label: node.data.label,
-          story: node.data.story,
-          choice: node.data.choice
-        })),
-        allEdges: context.allEdges,
-        provider: 'claude' // 기본값으로 Claude 사용
-      };
+      const { generateStory, generateStoryFromGame } = await import('./utils/api');
+      let result = null;
+
+      // 공유한 게임이면 게임 ID와 저장 이후 편집분만 보내고 서버에서 부모/자식 노드를 구성
+      if (savedGame) {
+        try {
+          result = await generateStoryFromGame({
+            gameId: savedGame.gameId,
+            nodeId: context.currentNode.id,
+            ...diffSavedGame(savedGame, context.allNodes, context.allEdges),
+            gameConfig: context.gameConfig,
+            provider: 'claude'
+          });
+        } catch (error) {
+          // 서버에서 게임이 지워졌으면 전체 그래프를 보내는 방식으로
+          if (!error.message.startsWith('HTTP 404')) {
+            throw error;
+          }
+          setSavedGame(null);
+        }
+      }
 
-      const { generateStory } = await import('./utils/api');
-      const result = await generateStory(storyRequest);
+      if (!result) {
+        const storyRequest = {
+          currentNode: {
+            id: context.currentNode.id,
+            label: context.currentNode.data.label,
+            story: context.currentNode.data.story,
+            choice: context.currentNode.data.choice,
+            statChanges: context.currentNode.data.statChanges
+          },
+          parentNodes: context.parentNodes.map(node => ({
+            id: node.id,
+            label: node.data.label,
+            story: node.data.story,
+            choice: node.data.choice
+          })),
+          childNodes: context.childNodes.map(node => ({
+            id: node.id,
+            label: node.data.label,
+            story: node.data.story,
+            choice: node.data.choice
+          })),
+          gameConfig: context.gameConfig,
+          allNodes: context.allNodes.map(node => ({
+            id: node.id,
+            label: node.data.label,
+            story: node.data.story,
+            choice: node.data.choice
+          })),
+          allEdges: context.allEdges,
+          provider: 'claude' // 기본값으로 Claude 사용
+        };
+        result = await generateStory(storyRequest);
+      }
       
       // 생성된 스토리로 노드 업데이트
       const updatedNode = {
@@ -469,7 +515,7 @@ function MindMapFlow() {
       console.error('스토리 생성 실패:', error);
       alert(t('storyGenerationFailed'));
     }
-  }, [setNodes, editingNode, t]);
+  }, [setNodes, editingNode, savedGame, t]);
 
   // 게임 모드일 때 게임 컴포넌트 렌더링
   if (gameMode) {
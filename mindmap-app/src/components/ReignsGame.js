@@ -1,8 +1,9 @@
 import React, { useState, useEffect, useCallback, useRef, useMemo } from 'react';
 import './ReignsGame.css';
 import useTranslation from '../hooks/useTranslation';
+import { buildPlayGraph, choicesPending } from '../utils/playGraph';
 
-const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig }) => {
+const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig, playGraph, onNodeEnter }) => {
   const { t } = useTranslation();
   const [currentNodeId, setCurrentNodeId] = useState(null);
   const [gameStats, setGameStats] = useState(
@@ -20,19 +21,25 @@ const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig }) => {
   const [keyboardSelection, setKeyboardSelection] = useState(null);
   const cardRef = useRef(null);
 
-  // 게임 시작 시 루트 노드 찾기
+  // 노드/선택지 인덱스 (공유 게임은 서버에서 컴파일한 번들을 그대로 사용)
+  const graph = useMemo(
+    () => playGraph || buildPlayGraph(nodes, edges),
+    [playGraph, nodes, edges]
+  );
+
+  // 게임 시작 시 루트 노드로 이동
   useEffect(() => {
-    if (nodes.length > 0 && !currentNodeId) {
-      const rootNode = nodes.find(node => 
-        !edges.some(edge => edge.target === node.id)
-      );
-      if (rootNode) {
-        setCurrentNodeId(rootNode.id);
-      } else {
-        setCurrentNodeId(nodes[0].id);
-      }
+    if (graph.rootId && !currentNodeId) {
+      setCurrentNodeId(graph.rootId);
     }
-  }, [nodes, edges, currentNodeId]);
+  }, [graph, currentNodeId]);
+
+  // 노드 이동 알림 (공유 게임은 다음 선택지를 미리 불러옴)
+  useEffect(() => {
+    if (currentNodeId && onNodeEnter) {
+      onNodeEnter(currentNodeId);
+    }
+  }, [currentNodeId, onNodeEnter]);
 
   // gameConfig가 변경될 때 초기 스탯 업데이트
   useEffect(() => {
@@ -43,7 +50,7 @@ const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig }) => {
 
   // 현재 노드 정보 가져오기
   const getCurrentNode = useCallback(() => {
-    const node = nodes.find(node => node.id === currentNodeId);
+    const node = graph.nodesById.get(currentNodeId);
     if (node) {
       console.log('Current node data:', {
         id: node.id,
@@ -53,15 +60,12 @@ const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig }) => {
       });
     }
     return node;
-  }, [nodes, currentNodeId]);
+  }, [graph, currentNodeId]);
 
   // 현재 노드의 선택지(자식 노드들) 가져오기
   const getChoices = useCallback(() => {
-    return edges
-      .filter(edge => edge.source === currentNodeId)
-      .map(edge => nodes.find(node => node.id === edge.target))
-      .filter(Boolean);
-  }, [edges, nodes, currentNodeId]);
+    return graph.childrenById.get(currentNodeId) || [];
+  }, [graph, currentNodeId]);
 
   // 마우스/터치 이벤트 처리
   const handlePointerDown = (e) => {
@@ -209,6 +213,18 @@ const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig }) => {
 
   const currentNode = getCurrentNode();
   const choices = getChoices();
+  // 다음 구간(또는 번들)을 아직 받지 못한 노드는 선택지가 없는 엔딩이 아니라 불러오는 중
+  const loadingChoices = choicesPending(graph, currentNodeId);
+
+  // 이전 요청이 실패했을 수 있으므로 기다리는 동안 다시 요청
+  useEffect(() => {
+    if (!loadingChoices || !currentNodeId || !onNodeEnter) {
+      return undefined;
+    }
+    const timer = setInterval(() => onNodeEnter(currentNodeId), 3000);
+    return () => clearInterval(timer);
+  }, [loadingChoices, currentNodeId, onNodeEnter]);
+
   const statNames = useMemo(() => {
     return gameConfig?.statNames || {
       health: t('stat') + ' 1',
@@ -228,6 +244,15 @@ const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig }) => {
   }, [gameConfig?.statIcons]);
 
   if (!currentNode) {
+    if (loadingChoices) {
+      return (
+        <div className="reigns-game-mobile">
+          <div className="game-message">
+            <p>{t('loadingChoices')}</p>
+          </div>
+        </div>
+      );
+    }
     return (
       <div className="reigns-game-mobile">
         <div className="game-message">
@@ -389,6 +414,13 @@ const ReignsGame = ({ nodes, edges, onBackToEditor, gameConfig }) => {
         </div>
       )}
 
+      {/* 선택지 불러오는 중 */}
+      {loadingChoices && (
+        <div className="keyboard-hint">
+          <span>⏳ {t('loadingChoices')}</span>
+        </div>
+      )}
+
       {/* 키보드 안내 */}
       {choices.length > 0 && (
         <div className="keyboard-hint">
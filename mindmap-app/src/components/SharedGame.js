@@ -1,8 +1,14 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import ReignsGame from './ReignsGame';
 import './SharedGame.css';
 import useTranslation from '../hooks/useTranslation';
+import { playGraphFromBundle, mergePlayWindow, hasNextChoices } from '../utils/playGraph';
+
+// 첫 카드와 함께 받을 선택지 단계 수
+const PREFETCH_DEPTH = 2;
+// 이 이하 노드 수의 게임은 첫 카드 이후 전체 번들을 받아 이후 선택은 요청 없이 진행
+const FULL_BUNDLE_MAX_NODES = 500;
 
 const SharedGame = () => {
   const { gameId } = useParams();
@@ -11,15 +17,36 @@ const SharedGame = () => {
   const [gameData, setGameData] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const pendingWindows = useRef(new Set());
+  // 노드 이동 콜백이 최신 그래프를 보도록 렌더링마다 갱신 (자식의 effect가 먼저 실행되므로 effect에서 갱신하지 않음)
+  const graphRef = useRef(null);
+  graphRef.current = gameData?.playGraph || null;
 
   useEffect(() => {
     const fetchGame = async () => {
       try {
         console.log('게임 조회 시작:', gameId);
-        const { getGame } = await import('../utils/api');
-        const data = await getGame(gameId);
-        console.log('게임 데이터 조회 성공:', data);
-        setGameData(data);
+        const { getPlayWindow, getGameBundle, resolveAssetUrl } = await import('../utils/api');
+        // 시작 노드와 그 아래 선택지만 먼저 받음 (게임 크기와 무관하게 첫 카드를 바로 표시)
+        const playWindow = await getPlayWindow(gameId, null, PREFETCH_DEPTH);
+        console.log('첫 카드 조회 성공:', playWindow.nodes.length, '/', playWindow.nodeCount, '개 노드');
+        // 서버에 저장된 이미지 참조는 백엔드 URL로 변환
+        setGameData({
+          title: playWindow.game.title,
+          description: playWindow.game.description,
+          gameConfig: playWindow.game.gameConfig || {},
+          playGraph: mergePlayWindow(null, playWindow, resolveAssetUrl)
+        });
+
+        // 작은 게임은 저장 시점에 컴파일된 번들 전체로 교체 (선택지는 엣지를 훑지 않고 바로 찾음)
+        if (playWindow.nodeCount <= FULL_BUNDLE_MAX_NODES) {
+          getGameBundle(gameId)
+            .then(bundle => setGameData(prev => prev && {
+              ...prev,
+              playGraph: playGraphFromBundle(bundle, resolveAssetUrl)
+            }))
+            .catch(err => console.error('번들 조회 오류:', err));
+        }
       } catch (err) {
         console.error('게임 조회 오류:', err);
         if (err.message.includes('404')) {
@@ -37,6 +64,27 @@ const SharedGame = () => {
     }
   }, [gameId]);
 
+  // 노드에 도착하면 다음 선택의 선택지까지 미리 받음 (번들 전체를 받았으면 요청 없음)
+  const handleNodeEnter = useCallback(async (nodeId) => {
+    const graph = graphRef.current;
+    if (!graph || !graph.choiceIds || hasNextChoices(graph, nodeId) || pendingWindows.current.has(nodeId)) {
+      return;
+    }
+    pendingWindows.current.add(nodeId);
+    try {
+      const { getPlayWindow, resolveAssetUrl } = await import('../utils/api');
+      const playWindow = await getPlayWindow(gameId, nodeId, PREFETCH_DEPTH);
+      setGameData(prev => prev && prev.playGraph.choiceIds ? {
+        ...prev,
+        playGraph: mergePlayWindow(prev.playGraph, playWindow, resolveAssetUrl)
+      } : prev);
+    } catch (err) {
+      console.error('선택지 조회 오류:', err);
+    } finally {
+      pendingWindows.current.delete(nodeId);
+    }
+  }, [gameId]);
+
   const handleBackToHome = () => {
     navigate('/');
   };
@@ -90,17 +138,10 @@ const SharedGame = () => {
       </div>
       
       <ReignsGame
-        nodes={gameData.nodes.map(node => ({
-          id: node.id,
-          data: {
-            label: node.label,
-            story: node.story,
-            choice: node.choice,
-            statChanges: node.statChanges,
-            imageUrl: node.imageUrl
-          }
-        }))}
-        edges={gameData.edges}
+        nodes={gameData.playGraph.nodes}
+        edges={[]}
+        playGraph={gameData.playGraph}
+        onNodeEnter={handleNodeEnter}
         gameConfig={gameData.gameConfig}
         onBackToEditor={handleBackToHome}
       />
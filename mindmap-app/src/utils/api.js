@@ -6,6 +6,14 @@ const getBackendUrl = () => {
   return url.replace(/\/$/, '');
 };
 
+// 백엔드에 저장된 이미지(/uploads/...)는 백엔드 주소 기준으로 변환
+export const resolveAssetUrl = (url) => {
+  if (url && url.startsWith('/uploads/')) {
+    return `${getBackendUrl()}${url}`;
+  }
+  return url;
+};
+
 export const apiCall = async (endpoint, options = {}) => {
   const baseUrl = getBackendUrl();
   // endpoint 시작의 슬래시 확인
@@ -40,9 +48,31 @@ export const getGame = async (gameId) => {
   return apiCall(`/api/games/${gameId}`);
 };
 
+// 플레이용 번들 (정수 인덱스 노드, 노드별 자식 목록, 시작 노드, 이미지 URL 목록)
+export const getGameBundle = async (gameId) => {
+  return apiCall(`/api/games/${gameId}/bundle`);
+};
+
+// 노드 하나와 선택지(depth단계 아래까지)만 조회 (nodeId가 없으면 시작 노드)
+export const getPlayWindow = async (gameId, nodeId = null, depth = 1) => {
+  const params = new URLSearchParams({ depth: String(depth) });
+  if (nodeId) {
+    params.set('node', nodeId);
+  }
+  return apiCall(`/api/games/${gameId}/play?${params}`);
+};
+
 export const generateStory = async (storyRequest) => {
   return apiCall('/api/generate-story', {
     method: 'POST',
     body: JSON.stringify(storyRequest),
   });
-}; 
\ No newline at end of file
+}; 
+
+// 저장된 게임 ID + 노드 ID로 스토리 생성 (서버에서 부모/자식 노드 구성)
+export const generateStoryFromGame = async (gameStoryRequest) => {
+  return apiCall('/api/generate-story/from-game', {
+    method: 'POST',
+    body: JSON.stringify(gameStoryRequest),
+  });
+};
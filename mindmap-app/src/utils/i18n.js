@@ -61,6 +61,7 @@ const translations = {
     noNodesMessage: '게임을 시작하려면 최소 하나의 노드가 필요합니다.',
     cannotStartGame: '게임을 시작할 수 없습니다',
     noNodesOrConnection: '노드가 없거나 연결되지 않았습니다.',
+    loadingChoices: '선택지를 불러오는 중...',
     doubleClickToAdd: '빈 공간을 더블클릭하여 노드를 추가하세요',
     doubleClickToEdit: '노드를 더블클릭하여 편집하세요',
     confirmClearAll: '정말로 모든 데이터를 지우시겠습니까?',
@@ -218,6 +219,7 @@ const translations = {
     noNodesMessage: 'ゲームを開始するには最低1つのノードが必要です。',
     cannotStartGame: 'ゲームを開始できません',
     noNodesOrConnection: 'ノードがないか、接続されていません。',
+    loadingChoices: '選択肢を読み込み中...',
     doubleClickToAdd: '空いている場所をダブルクリックしてノードを追加してください',
     doubleClickToEdit: 'ノードをダブルクリックして編集してください',
     confirmClearAll: '本当にすべてのデータを削除しますか？',
@@ -425,6 +427,7 @@ const translations = {
     noNodesMessage: 'At least one node is required to start the game.',
     cannotStartGame: 'Cannot start game',
     noNodesOrConnection: 'No nodes or no connections.',
+    loadingChoices: 'Loading choices...',
     doubleClickToAdd: 'Double-click on empty space to add a node',
     doubleClickToEdit: 'Double-click on a node to edit it',
     confirmClearAll: 'Are you sure you want to clear all data?',
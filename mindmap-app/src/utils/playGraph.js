@@ -0,0 +1,90 @@
+// 플레이용 그래프 인덱스
+// 선택할 때마다 edges를 훑지 않도록 노드 ID별 노드와 선택지(자식 노드 목록)를 한 번만 만들어 둡니다.
+
+// 에디터의 nodes/edges로 만들기 (시작 노드는 어떤 엣지의 target도 아닌 첫 노드)
+export const buildPlayGraph = (nodes, edges) => {
+  const nodesById = new Map(nodes.map(node => [node.id, node]));
+  const childrenById = new Map(nodes.map(node => [node.id, []]));
+  const targeted = new Set();
+  edges.forEach(edge => {
+    targeted.add(edge.target);
+    const child = nodesById.get(edge.target);
+    if (child && childrenById.has(edge.source)) {
+      childrenById.get(edge.source).push(child);
+    }
+  });
+  const rootNode = nodes.find(node => !targeted.has(node.id)) || nodes[0];
+  return { nodesById, childrenById, rootId: rootNode ? rootNode.id : null };
+};
+
+// 서버에서 컴파일한 번들(GET /api/games/{id}/bundle)로 만들기
+export const playGraphFromBundle = (bundle, resolveAssetUrl = url => url) => {
+  const nodes = bundle.nodes.map(node => ({
+    id: node.id,
+    data: {
+      label: node.label,
+      story: node.story,
+      choice: node.choice,
+      statChanges: node.statChanges,
+      imageUrl: node.image != null ? resolveAssetUrl(bundle.assets[node.image]) : undefined
+    }
+  }));
+  const nodesById = new Map(nodes.map(node => [node.id, node]));
+  const childrenById = new Map(
+    nodes.map((node, index) => [node.id, bundle.children[index].map(child => nodes[child])])
+  );
+  return {
+    nodes,
+    nodesById,
+    childrenById,
+    rootId: bundle.root != null ? nodes[bundle.root].id : null
+  };
+};
+
+// 플레이 구간(GET /api/games/{id}/play)을 기존 그래프에 합치기
+// 선택지 노드가 모두 받아진 노드만 childrenById에 넣음 (없는 노드는 아직 불러오는 중)
+export const mergePlayWindow = (graph, playWindow, resolveAssetUrl = url => url) => {
+  const nodesById = new Map(graph ? graph.nodesById : []);
+  const choiceIds = new Map(graph ? graph.choiceIds : []);
+  playWindow.nodes.forEach(node => {
+    if (!nodesById.has(node.id)) {
+      nodesById.set(node.id, {
+        id: node.id,
+        data: {
+          label: node.label,
+          story: node.story,
+          choice: node.choice,
+          statChanges: node.statChanges,
+          imageUrl: resolveAssetUrl(node.imageUrl)
+        }
+      });
+    }
+    choiceIds.set(node.id, node.choices);
+  });
+  const childrenById = new Map();
+  choiceIds.forEach((ids, id) => {
+    const children = ids.map(childId => nodesById.get(childId));
+    if (children.every(Boolean)) {
+      childrenById.set(id, children);
+    }
+  });
+  return {
+    nodes: Array.from(nodesById.values()),
+    nodesById,
+    childrenById,
+    choiceIds,
+    rootId: graph ? graph.rootId : playWindow.root
+  };
+};
+
+// 노드에 도착했을 때 다음 선택의 선택지까지 받아져 있는지
+export const hasNextChoices = (graph, nodeId) => {
+  const children = graph.childrenById.get(nodeId);
+  return Boolean(children) && children.every(child => graph.childrenById.has(child.id));
+};
+
+// 노드의 선택지를 아직 불러오는 중인지 (구간 그래프에서 노드나 선택지 노드가 아직 받아지지 않음)
+// 전체 그래프(에디터, 번들)에는 모든 노드의 선택지가 있으므로 항상 false
+export const choicesPending = (graph, nodeId) => {
+  return Boolean(graph.choiceIds) && !graph.childrenById.has(nodeId);
+};